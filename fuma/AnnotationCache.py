@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+
+"""[License: GNU General Public License v3 (GPLv3)]
+ 
+ This file is part of FuMa.
+ 
+ FuMa is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+ 
+ FuMa is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+ Documentation as defined by:
+ <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
+"""
+
+import logging,collections,cPickle,os
+
+
+class AnnotationCache:
+	"""Bounded LRU cache of the genes annotated at a (chromosome, position)
+	of a GeneAnnotation, counting its hits and misses.
+	
+	It can be stored in a directory, in a file named after the checksum
+	of the annotation, so that later runs with the same annotation file
+	can reuse it. The genes are stored as their numbers within the
+	annotation, so the file is only used if it was written with the same
+	cache_version.
+	"""
+	logger = logging.getLogger("FuMa::AnnotationCache")
+	
+	# Increase when the numbering of the genes of a GeneAnnotation, the
+	# genes found at a position or the file format changes
+	cache_version = 3
+	
+	def __init__(self,size,directory=None,checksum=None):
+		self.size = size
+		self.entries = collections.OrderedDict()
+		
+		self.hits = 0
+		self.misses = 0
+		
+		if directory != None and checksum != None:
+			self.filename = os.path.join(directory,checksum+".annotation-cache")
+		else:
+			self.filename = None
+	
+	def __len__(self):
+		return len(self.entries)
+	
+	def get(self,chromosome,position):
+		"""@return: list of genes, or None if the position is not cached
+		"""
+		key = (chromosome,position)
+		genes = self.entries.pop(key,None)
+		if genes == None:
+			self.misses += 1
+		else:
+			self.entries[key] = genes# most recently used
+			self.hits += 1
+		
+		return genes
+	
+	def set(self,chromosome,position,genes):
+		self.entries[(chromosome,position)] = genes
+		if len(self.entries) > self.size:
+			self.entries.popitem(False)
+	
+	def load(self,genes):
+		"""Loads the cache file, if it exists.
+		
+		@param genes: GeneTable of the annotation, to which the positions
+		in the file refer
+		"""
+		if self.filename != None and os.path.isfile(self.filename):
+			with open(self.filename,"rb") as fh:
+				cache = cPickle.load(fh)
+			
+			# Files of version 1 do not have a header
+			if not isinstance(cache,dict) or cache.get("version") != self.cache_version:
+				self.logger.info("Ignoring annotation cache of another version: "+self.filename)
+				return
+			
+			entries = cache["entries"]
+			for key, gene_numbers in entries:
+				self.set(key[0],key[1],[genes[i] for i in gene_numbers])
+			
+			self.logger.debug("Loaded "+str(len(entries))+" cached annotations from: "+self.filename)
+	
+	def save(self,genes):
+		"""Saves the cache, with the genes stored as their positions in
+		genes (a GeneTable), if a directory was given. It is written to a
+		temporary file first, so that a run that is interrupted or
+		another run loading it never sees an incomplete file.
+		"""
+		if self.filename != None:
+			gene_numbers = {}
+			for i, gene in genes.created():
+				gene_numbers[id(gene)] = i
+			
+			entries = [(key,[gene_numbers[id(gene)] for gene in genes_key]) for key, genes_key in self.entries.items()]
+			
+			cache = {
+				"version": self.cache_version,
+				"entries": entries}
+			
+			filename_tmp = self.filename+"."+str(os.getpid())+".tmp"
+			with open(filename_tmp,"wb") as fh:
+				cPickle.dump(cache,fh,cPickle.HIGHEST_PROTOCOL)
+			os.rename(filename_tmp,self.filename)
+			
+			self.logger.debug("Saved "+str(len(entries))+" cached annotations to: "+self.filename)
+	
+	def __str__(self):
+		return "hits: "+str(self.hits)+", misses: "+str(self.misses)+", size: "+str(len(self))+"/"+str(self.size)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+
+"""[License: GNU General Public License v3 (GPLv3)]
+ 
+ This file is part of FuMa.
+ 
+ FuMa is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+ 
+ FuMa is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+ Documentation as defined by:
+ <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
+"""
+
+import logging,gc
+
+
+class BulkLoad:
+	"""Disables the cyclic garbage collector while experiments are being
+	parsed, and restores it afterwards:
+	
+	with BulkLoad():
+		experiment = ReadDefuse(filename,name)
+	
+	Parsing allocates many objects, each of which counts towards the next
+	collection, while fusions, genes and experiments do not form
+	reference cycles and are freed by reference counting alone.
+	"""
+	logger = logging.getLogger("FuMa::BulkLoad")
+	
+	def __init__(self):
+		self.gc_was_enabled = None
+	
+	def __enter__(self):
+		self.gc_was_enabled = gc.isenabled()
+		gc.disable()
+		
+		return self
+	
+	def __exit__(self,exc_type,exc_value,traceback):
+		if self.gc_was_enabled:
+			gc.enable()
+		
+		return False
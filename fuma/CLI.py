@@ -22,7 +22,7 @@
 """
 
 import fuma
-import sys,argparse,textwrap,datetime
+import sys,argparse,textwrap,datetime,re
 
 
 def show_formats():
@@ -95,15 +95,29 @@ def CLI(argv=None):
 	
 	parser.add_argument("-a","--add-gene-annotation",help="annotation_alias:filename  * file in BED format",nargs="*")
 	
-	parser.add_argument("-s","--add-sample",nargs="+",required=True,help="sample_alias:format:filename (available formats: %(prog)s --formats)")
+	parser.add_argument("-s","--add-sample",nargs="+",required=True,help="sample_alias:format:filename[:min_reads=N] (available formats: %(prog)s --formats); min_reads skips the fusion genes with fewer supporting reads, for the formats that provide them")
 	parser.add_argument("-l","--link-sample-to-annotation",help="sample_alias:annotation_alias",nargs="*")
 	
 	parser.add_argument("-f","--format",default="list",choices=["summary","list","extensive"],help="Output-format")
 	
+	parser.add_argument("--min-support",default=1,type=int,help="Minimal number of chimeric reads of a junction in RNA STAR's Chimeric.out.junction files, unless the sample is given with its own min_reads=N; the reads of identical junctions are merged into one fusion gene")
+	
 	parser.add_argument("-g","--long-gene-size",default=200000,type=int,help="Gene-name based matching is more sensitive to long genes. This is the gene size used to mark fusion genes spanning a 'long gene' as reported the output. Use 0 to disable this feature.")
 	
 	parser.add_argument("-o","--output",help="output filename; '-' for stdout",default="output_fuma.txt")
 	
+	parser.add_argument("--annotation-backend",default="htseq",choices=["htseq","numpy"],help="Index used to find the genes annotated at a breakpoint; numpy does not require HTSeq and queries all breakpoints on a chromosome at once")
+	parser.add_argument("--lazy-annotation",action="store_true",help="Only parse the chromosomes of the gene annotation (BED) files on which breakpoints are annotated; a block index of each BED file is stored next to it as <filename>.fuma-block-index")
+	parser.add_argument("--annotation-cache-size",default=100000,type=int,help="Number of breakpoint positions of which the annotated genes are cached per gene annotation; use 0 to disable the cache")
+	parser.add_argument("--annotation-cache-dir",help="Directory in which the cached annotations are stored, per checksum of the gene annotation file, so that they are reused by later runs")
+	
+	parser.add_argument("-j","--jobs",default=1,type=int,help="Number of processes used to match the fusion genes. The candidate pairs are split into independent components: fusion genes are bucketed on their chromosome pair, and buckets sharing a candidate pair are joined. With subset matching only the pairwise comparisons run in parallel; the merged fusion genes are grouped afterwards in a single process")
+	
+	parser.add_argument("--columnar-storage",action="store_true",help="Store the fusion genes of each sample in compact columns and only create the objects of the fusion genes when they are needed. This uses less memory, but is not supported for the summary format")
+	
+	parser.add_argument("--save-state",help="Save the annotated fusion genes and their matches to this file, so that the results can be extended with more samples using --resume-state")
+	parser.add_argument("--resume-state",help="Extend the results saved with --save-state with the samples given with -s; only these samples are matched with the saved fusion genes")
+	
 	if(argv == None):
 		return parser.parse_args()
 	else:
@@ -111,6 +125,63 @@ def CLI(argv=None):
 		return parser.parse_args(argv)
 
 
+# Filters that can be given per sample, and the type of their value
+sample_filters = {'min_reads':int}
+
+def parse_sample(sample):
+	"""Parses a sample given with -s: sample_alias:format:filename,
+	optionally followed by :key=value,key=value,... with the filters
+	(see sample_filters) that the reader applies to the fusion genes,
+	e.g. min_reads=3. Filenames may contain ':' as well, so only a last
+	field consisting of key=value pairs is taken as filters.
+	
+	@return: tuple (sample_alias, format, filename, dict of filters)
+	"""
+	sample_name, input_format, sample_filename = sample.split(":",2)
+	
+	filters = {}
+	
+	fields = sample_filename.rsplit(":",1)
+	if(len(fields) == 2 and re.match("^\w+=[^,=/]+(,\w+=[^,=/]+)*$",fields[1])):
+		sample_filename = fields[0]
+		
+		for key_value in fields[1].split(","):
+			key, value = key_value.split("=")
+			
+			if(not sample_filters.has_key(key)):
+				raise Exception("Unknown filter for sample '"+sample_name+"': "+key+" (available filters: "+", ".join(sorted(sample_filters.keys()))+")")
+			
+			try:
+				filters[key] = sample_filters[key](value)
+			except ValueError:
+				raise Exception("Invalid value of filter "+key+" for sample '"+sample_name+"': "+value)
+	
+	return sample_name, input_format, sample_filename, filters
+
+# Formats (lowercase, without '-', '_' and ' ') that provide the number of
+# supporting reads, and can therefore be filtered
+filterable_formats = ["defuse","fusionmap","chimera","soapfusefinalgene","soapfusefinaltranscript","rnastarchimeric","starfusionfinal"]
+
+def get_sample_filters(sample_name,input_format,filters,min_support):
+	"""Checks the filters of a sample (see parse_sample()) against its
+	format. --min-support only applies to the rna-star_chimeric format,
+	as the default of its min_reads; the other formats are only
+	filtered if their sample is given with filters.
+	
+	@return: dict of the filters that the reader applies
+	"""
+	input_format_stripped = input_format.lower().replace("-","").replace("_","").replace(" ","")
+	
+	if(input_format_stripped not in filterable_formats):
+		if(len(filters) > 0):
+			raise Exception("Sample '"+sample_name+"' can not be filtered: format "+input_format+" has no supporting reads")
+	elif(input_format_stripped == "rnastarchimeric" and not filters.has_key('min_reads')):
+		filters = dict(filters)
+		filters['min_reads'] = min_support
+	
+	return filters
+
+
 def CLI_ensmble_gtf_to_bed_converter(argv=None):
 	"""
 		CLI for gtf to bed converter
@@ -129,3 +200,20 @@ def CLI_ensmble_gtf_to_bed_converter(argv=None):
 	else:
 		# Argumented parameters are used in the unit tests.
 		return parser.parse_args(argv)
+
+def CLI_index_annotation(argv=None):
+	"""
+		CLI for the annotation indexer
+	"""
+	
+	parser = argparse.ArgumentParser(formatter_class=argparse.RawDescriptionHelpFormatter,epilog="For more info please visit:\n<https://github.com/yhoogstrate/fuma>")
+	parser.add_argument('-V','--version', action='version', version=textwrap.dedent("%(prog)s "+fuma.__version__+"\n\nCopyright (C) 2013-"+str(datetime.datetime.now().year)+" Youri Hoogstrate.\n\nLicense GPLv3+: GNU GPL version 3 or later <http://gnu.org/licenses/gpl.html>\nThis is free software: you are free to change and redistribute it.\nThere is NO WARRANTY, to the extent permitted by law.\n"))
+	
+	parser.add_argument("-o","--output",help="output filename of the index",required=True)
+	parser.add_argument("bed_file",nargs=1,help="Input gene annotation in BED format")
+	
+	if(argv == None):
+		return parser.parse_args()
+	else:
+		# Argumented parameters are used in the unit tests.
+		return parser.parse_args(argv)
@@ -25,6 +25,7 @@ import logging
 
 from Fusion import Fusion
 from FusionDetectionExperiment import FusionDetectionExperiment
+from FusionIndex import FusionIndex
 
 
 class CompareFusionsBySpanningGenes:
@@ -47,29 +48,37 @@ class CompareFusionsBySpanningGenes:
 			matches_exp_1 = set()
 			matches_exp_2 = set()
 			
-			for chromosome_left in self.experiment_1.index.items():
-				for chromosome_right in chromosome_left[1].items():
-					for fusion_1 in chromosome_right[1]:
+			# Only fusions sharing a gene on both junctions are compared
+			fusion_index = FusionIndex()
+			for fusion_2 in self.experiment_2:
+				fusion_index.add_fusion(fusion_2)
+			
+			for left_chr, right_chr in self.experiment_1.get_chromosome_pairs():
+				for fusion_id in self.experiment_1.get_fusion_ids(left_chr,right_chr):
+					fusion_1 = self.experiment_1[fusion_id]
+					
+					for i in fusion_index.find_matches(fusion_1):
+						fusion_2 = fusion_index[i]
 						
-						if(self.experiment_2.index.has_key(chromosome_left[0]) and self.experiment_2.index[chromosome_left[0]].has_key(chromosome_right[0])):
-							for fusion_2 in self.experiment_2.index[chromosome_left[0]][chromosome_right[0]]:
+						if(fusion_2.get_left_chromosome() == left_chr and fusion_2.get_right_chromosome() == right_chr):
+							
+							## Do the gene-name comparison
+							#if(self.args.matching_method == 'egm'):
+							#	match = self.match_fusions_egm(fusion_1,fusion_2,False)
+							#else:
+							match = self.match_fusions(fusion_1,fusion_2,False)
+							
+							if(match):
+								match.matches = fusion_1.matches | fusion_2.matches
+								match.dataset_mask = fusion_1.dataset_mask | fusion_2.dataset_mask
 								
-								## Do the gene-name comparison
-								#if(self.args.matching_method == 'egm'):
-								#	match = self.match_fusions_egm(fusion_1,fusion_2,False)
-								#else:
-								match = self.match_fusions(fusion_1,fusion_2,False)
+								matches_exp_1.add(fusion_1)
+								matches_exp_2.add(fusion_2)
 								
-								if(match):
-									match.matches = fusion_1.matches | fusion_2.matches
-									
-									matches_exp_1.add(fusion_1)
-									matches_exp_2.add(fusion_2)
-									
-									fusion_1.matched_datasets[fusion_2.dataset_name] = True
-									fusion_2.matched_datasets[fusion_1.dataset_name] = True
-									
-									overlap_between_experiments.add_fusion(match)
+								fusion_1.matched_datasets |= fusion_2.tested_datasets
+								fusion_2.matched_datasets |= fusion_1.tested_datasets
+								
+								overlap_between_experiments.add_fusion(match)
 			
 			overlap_between_experiments.remove_duplicates(self.args)
 			
@@ -96,17 +105,12 @@ class CompareFusionsBySpanningGenes:
 			return (fusion_1.acceptor_donor_direction == fusion_2.acceptor_donor_direction)
 	
 	
-	def match_fusions(self,fusion_1,fusion_2,allow_empty = True):
-		"""Matches whether two fusion objects are the same prediction
-				# fusion_1 <=> fusion_2; for both left and right position:
-				# [a,b,c] == [a,b,c]     ->    [a,b,c]
-				# [a,b,c] == [a,b]       ->    [a,b,c]
-				# 
-				
-				# [a,b,c,d] != [a,b,e]
-				#	BECAUSE: [a,b] can not be located in C, never
-				#
-				# (not is_empty(a)) and subset(a,b) or subset(b,a)
+	def match_fusion_genes(self,fusion_1,fusion_2,allow_empty = True):
+		"""Matches the strands, acceptor-donor direction and gene sets of
+		two fusions, without creating a merged Fusion object.
+		
+		@return: (matches_left, matches_right) as sets of gene ids, or None
+		if they do not match
 		"""
 		
 		# First check whether the strands match, if strand-specific-matching is enabled:
@@ -115,22 +119,15 @@ class CompareFusionsBySpanningGenes:
 			if((fusion_1.annotated_genes_left and fusion_1.annotated_genes_right and fusion_2.annotated_genes_left and fusion_2.annotated_genes_right)):
 				# Check if all of the smallest are in the largest;
 				# if you do it otherwise you don't know if all from the smallest are also in the largest
-				
-				fusion_1_annotated_genes_left =  fusion_1.get_annotated_genes_left(True)
-				fusion_1_annotated_genes_right = fusion_1.get_annotated_genes_right(True)
-				
-				fusion_2_annotated_genes_left =  fusion_2.get_annotated_genes_left(True)
-				fusion_2_annotated_genes_right = fusion_2.get_annotated_genes_right(True)
-				
 				if(self.args.matching_method == 'overlap'):
-					matches_left  = self.match_overlap( set(fusion_1_annotated_genes_left.keys()), set(fusion_2_annotated_genes_left.keys()) )
-					matches_right = self.match_overlap( set(fusion_1_annotated_genes_right.keys()), set(fusion_2_annotated_genes_right.keys()) )
+					matches_left  = self.match_overlap( fusion_1.get_gene_ids_left(), fusion_2.get_gene_ids_left() )
+					matches_right = self.match_overlap( fusion_1.get_gene_ids_right(), fusion_2.get_gene_ids_right() )
 				elif(self.args.matching_method == 'egm'):
-					matches_left  = self.match_egm( set(fusion_1_annotated_genes_left.keys()), set(fusion_2_annotated_genes_left.keys()) )
-					matches_right = self.match_egm( set(fusion_1_annotated_genes_right.keys()), set(fusion_2_annotated_genes_right.keys()) )
+					matches_left  = self.match_egm( fusion_1.get_gene_ids_left(), fusion_2.get_gene_ids_left() )
+					matches_right = self.match_egm( fusion_1.get_gene_ids_right(), fusion_2.get_gene_ids_right() )
 				else:
-					matches_left  = self.match_sets( set(fusion_1_annotated_genes_left.keys()), set(fusion_2_annotated_genes_left.keys()) )
-					matches_right = self.match_sets( set(fusion_1_annotated_genes_right.keys()), set(fusion_2_annotated_genes_right.keys()) )
+					matches_left  = self.match_sets( fusion_1.get_gene_ids_left(), fusion_2.get_gene_ids_left() )
+					matches_right = self.match_sets( fusion_1.get_gene_ids_right(), fusion_2.get_gene_ids_right() )
 				
 				# Do we allow empty matches as empty results or 2x empty input? >> if the latter, the if should be in the beginning of the function
 				if(matches_left and matches_right and \
@@ -140,62 +137,76 @@ class CompareFusionsBySpanningGenes:
 						len(fusion_2.annotated_genes_left) > 0 and \
 						len(fusion_2.annotated_genes_right) > 0)) \
 					):
-					
-					fusion_merged = Fusion( \
-						fusion_1.get_left_chromosome(), \
-						fusion_1.get_right_chromosome(), \
-						fusion_1.get_left_break_position(), \
-						fusion_1.get_right_break_position(), \
-						fusion_1.left_strand, \
-						fusion_1.right_strand, \
-						fusion_1.dataset_name+"_vs._"+fusion_2.dataset_name, \
-						"", \
-						(fusion_1.acceptor_donor_direction != None and fusion_2.acceptor_donor_direction != None)
-					)
-					
-					# Fancy oneliners: create a list of all Gene objects based on the gene names in matches_left
-					#print [item for sublist in matches_left for item in fusion_1_annotated_genes_left[sublist]+fusion_2_annotated_genes_left[sublist]]
-					
-					fusion_merged.annotate_genes_left(list(set([item for sublist in matches_left for item in ((fusion_1_annotated_genes_left[sublist]) if fusion_1_annotated_genes_left.has_key(sublist) else [])+((fusion_2_annotated_genes_left[sublist]) if fusion_2_annotated_genes_left.has_key(sublist) else [])])))
-					fusion_merged.annotate_genes_right(list(set([item for sublist in matches_right for item in ((fusion_1_annotated_genes_right[sublist]) if fusion_1_annotated_genes_right.has_key(sublist) else [])+((fusion_2_annotated_genes_right[sublist]) if fusion_2_annotated_genes_right.has_key(sublist) else [])])))
-					
-					#@todo Check whether keeping the references to the original fusion objects is much more intensive or not - if not, use it instead
-					#   otherwise, make a Location() object and use it and save the reference in the fusion class
-					#for location in fusion_1.locations()+fusion_2.locations():
-					#	fusion_merged.add_location(location)
-					
-					# If one fusion is (A,B) and the other (B,A), the directions are opposite
-					# Therefore not the direction of fusion_1 should be chosen, but it should be set to "None" / unknown
-					acceptor_donor_directions = set([fusion_1.acceptor_donor_direction,fusion_2.acceptor_donor_direction])
-					if(len(acceptor_donor_directions) != 1):
-						fusion_merged.acceptor_donor_direction = None
-					else:
-						fusion_merged.acceptor_donor_direction = list(acceptor_donor_directions)[0]
-					
-					# If one fusion's left strand is (+) and the other is (-) the strand should be unknown, similarly for the right
-					left_strands = set([fusion_1.left_strand,fusion_2.left_strand])
-					if(len(left_strands) != 1):
-						fusion_merged.left_strand = None
-					else:
-						fusion_merged.left_strand = list(left_strands)[0]
-						
-					right_strands = set([fusion_1.right_strand,fusion_2.right_strand])
-					if(len(right_strands) != 1):
-						fusion_merged.right_strand = None
-					else:
-						fusion_merged.right_strand = list(right_strands)[0]
-					
-					return fusion_merged
-				else:
-					return False
-			else:
-				return False
-		else:
+					return (matches_left, matches_right)
+		
+		return None
+	
+	def match_fusions(self,fusion_1,fusion_2,allow_empty = True):
+		"""Matches whether two fusion objects are the same prediction
+				# fusion_1 <=> fusion_2; for both left and right position:
+				# [a,b,c] == [a,b,c]     ->    [a,b,c]
+				# [a,b,c] == [a,b]       ->    [a,b,c]
+				# 
+				
+				# [a,b,c,d] != [a,b,e]
+				#	BECAUSE: [a,b] can not be located in C, never
+				#
+				# (not is_empty(a)) and subset(a,b) or subset(b,a)
+		"""
+		
+		matches = self.match_fusion_genes(fusion_1,fusion_2,allow_empty)
+		if(matches == None):
 			return False
+		
+		matches_left, matches_right = matches
+		
+		fusion_merged = Fusion( \
+			fusion_1.get_left_chromosome(), \
+			fusion_1.get_right_chromosome(), \
+			fusion_1.get_left_break_position(), \
+			fusion_1.get_right_break_position(), \
+			fusion_1.left_strand, \
+			fusion_1.right_strand, \
+			fusion_1.dataset_name+"_vs._"+fusion_2.dataset_name, \
+			"", \
+			(fusion_1.acceptor_donor_direction != None and fusion_2.acceptor_donor_direction != None)
+		)
+		
+		# Create a list of all Gene objects of both fusions of which the gene id is in matches_left
+		fusion_merged.annotate_genes_left(list(set([gene for gene in fusion_1.annotated_genes_left + fusion_2.annotated_genes_left if gene.id in matches_left])))
+		fusion_merged.annotate_genes_right(list(set([gene for gene in fusion_1.annotated_genes_right + fusion_2.annotated_genes_right if gene.id in matches_right])))
+		
+		#@todo Check whether keeping the references to the original fusion objects is much more intensive or not - if not, use it instead
+		#   otherwise, make a Location() object and use it and save the reference in the fusion class
+		#for location in fusion_1.locations()+fusion_2.locations():
+		#	fusion_merged.add_location(location)
+		
+		# If one fusion is (A,B) and the other (B,A), the directions are opposite
+		# Therefore not the direction of fusion_1 should be chosen, but it should be set to "None" / unknown
+		acceptor_donor_directions = set([fusion_1.acceptor_donor_direction,fusion_2.acceptor_donor_direction])
+		if(len(acceptor_donor_directions) != 1):
+			fusion_merged.acceptor_donor_direction = None
+		else:
+			fusion_merged.acceptor_donor_direction = list(acceptor_donor_directions)[0]
+		
+		# If one fusion's left strand is (+) and the other is (-) the strand should be unknown, similarly for the right
+		left_strands = set([fusion_1.left_strand,fusion_2.left_strand])
+		if(len(left_strands) != 1):
+			fusion_merged.left_strand = None
+		else:
+			fusion_merged.left_strand = list(left_strands)[0]
+			
+		right_strands = set([fusion_1.right_strand,fusion_2.right_strand])
+		if(len(right_strands) != 1):
+			fusion_merged.right_strand = None
+		else:
+			fusion_merged.right_strand = list(right_strands)[0]
+		
+		return fusion_merged
 	
 	def match_sets(self,superset,subset):								#https://docs.python.org/2/library/sets.html
 		if(len(subset) > len(superset)):
-			return self.match_sets(subset,superset)						# Gene names have to be provided as sets
+			return self.match_sets(subset,superset)						# Gene ids have to be provided as sets
 		elif(subset.issubset(superset)):
 			return subset
 		else:
@@ -208,11 +219,10 @@ class CompareFusionsBySpanningGenes:
 			return None
 	
 	def match_overlap(self,set1,set2):									#https://docs.python.org/2/library/sets.html
-		overlap = set1.intersection(set2)
-		if(not overlap):
+		if(set1.isdisjoint(set2)):
 			return None
 		else:
-			return overlap
+			return set1.intersection(set2)
 	
 	""" 
 	#This type of matching increases the sets after multiple iterations
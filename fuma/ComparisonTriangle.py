@@ -24,6 +24,8 @@
 from Readers import *
 
 from ParseBED import ParseBED
+from FusionIndex import FusionIndex
+from MatchGraph import MatchGraph
 from FusionDetectionExperiment import FusionDetectionExperiment
 from MergedFusion import MergedFusion
 
@@ -33,8 +35,12 @@ from Fusion import AD_DIRECTION_FORWARD
 from Fusion import STRAND_FORWARD
 from Fusion import STRAND_REVERSE
 
+from Fusion import dataset_ids
+from Fusion import get_dataset_mask
+from Gene import get_gene_id
 
-import os.path,sys,itertools
+
+import os.path,sys,itertools,multiprocessing,cPickle,fuma
 
 
 class ComparisonTriangle:
@@ -43,6 +49,12 @@ class ComparisonTriangle:
 	def __init__(self,args):
 		self.experiments = []
 		self.args = args
+		
+		# State of the pairwise matching, see save_state() and load_state()
+		self.fusion_index = None
+		self.match_graph = None
+		self.merged_fusions = {}
+		self.n_experiments_indexed = 0
 	
 	def add_experiment(self,arg_experiment):
 		if not isinstance(arg_experiment, FusionDetectionExperiment):
@@ -56,97 +68,545 @@ class ComparisonTriangle:
 	def overlay_fusions(self):
 		fh = self.export_list_header()
 		
-		export_fusions = []# Fusions to be exported after current iteration
-		merged_fusions = []# MergedFusions to be used for next iteration
+		if self.args.matching_method == 'egm':
+			self.overlay_fusions_egm(fh)
+		else:
+			self.overlay_fusions_pairwise(fh)
 		
-		for tmp,fusion in self:
-			export_fusions.append(fusion)
+		if self.args.output != "-":
+			fh.close()
+	
+	def overlay_fusions_pairwise(self,fh):
+		"""All pairwise matches between fusions of different datasets are
+		determined once and stored as a MatchGraph. With overlap matching
+		the merged fusions are the maximal cliques of this graph of which
+		the fusions share a gene as a whole. With subset matching they
+		are grouped around their smallest gene sets, as the k-level
+		expansion did (see find_subset_groups()).
 		
-		n_total = int(round(0.5 * (len(export_fusions) * (len(export_fusions) + 1)) ))
-		passed = 0
-		previous_percentage = -100.0
+		After load_state(), only the fusions of the experiments that were
+		added since are compared, and with overlap matching only the
+		cliques that they are part of have to be searched for.
+		"""
+		if self.fusion_index == None:
+			self.fusion_index = FusionIndex()
+			self.match_graph = MatchGraph()
 		
-		self.logger.info("Starting "+str(n_total)+" comparisons for k=1")
+		# Only fusions that share a gene on both the left and the right
+		# junction are able to match
+		fusion_index = self.fusion_index
+		start = len(fusion_index)
+		for experiment in self.experiments[self.n_experiments_indexed:]:
+			for fusion in experiment:
+				fusion_index.add_fusion(fusion)
+		self.n_experiments_indexed = len(self.experiments)
 		
-		for y,fusion_y in self:
-			for x,fusion_x in self:
-				if y >= x:
-					n_total, passed, previous_percentage = self.log_progress(n_total, passed, previous_percentage)
-					
-					# If they do not belong to the same dataset - i.e. no duplication removal - and if they are the same MergedFusion gene
-					if fusion_y and fusion_y.dataset_name not in [tmp['dataset'] for tmp in fusion_x.locations()]:# and fusion_y != fusion_x
-						comparison = self.match_fusions(fusion_y, fusion_x)
-						
-						if comparison != False:
-							# Keep is not important - hiding is only useful for for exporting..
-							export_fusions[x] = None
-							export_fusions[y] = None
-							
-							merged_fusions.append(comparison)
-					passed += 1
+		if start == 0 and self.args.matching_method == 'subset':
+			pairs = fusion_index.find_subset_pairs()
+		else:
+			pairs = [pair for pair in fusion_index.find_pairs(start)]
 		
-		n_total, passed, previous_percentage = self.log_progress(n_total, passed, previous_percentage)
+		self.logger.info("Starting "+str(len(pairs))+" comparisons")
 		
-		self.export_list_chunked(fh,export_fusions)
+		if start > 0:
+			cliques = self.update_cliques(pairs,start)
+		else:
+			if self.args.jobs > 1:
+				edges, cliques = self.find_cliques_parallel(fusion_index,pairs)
+			else:
+				edges, cliques = self.find_cliques(fusion_index,pairs)
+			
+			for y,x in edges:
+				self.match_graph.add_edge(y,x)
 		
-		#@todo put this in some kind of while loop - and add recursion limit to be better safe than sorry..
-		while len(merged_fusions) > 0:
-			merged_fusions = self.overlay_fusions_recursive(fh,merged_fusions)
+		if self.args.matching_method == 'subset':
+			cliques = self.find_subset_groups(fusion_index)
 		
-		if self.args.output != "-":
-			fh.close()
+		# Duplicates are rejected before they are merged, and merged
+		# fusions of a previous run are re-used
+		merged_fusions = {}
+		for clique in cliques:
+			key = tuple(clique)
+			if not merged_fusions.has_key(key):
+				if self.merged_fusions.has_key(key):
+					merged_fusions[key] = self.merged_fusions[key]
+				else:
+					merged_fusions[key] = self.merge_clique([fusion_index[i] for i in clique])
+		self.merged_fusions = merged_fusions
+		
+		# Fusions that have not matched pairwise are exported individually,
+		# even if a subset group took them in later on
+		export_fusions = [fusion for fusion in fusion_index.fusions]
+		for i in self.match_graph.adjacency.keys():
+			export_fusions[i] = None
+		
+		# Sorted, so that the output does not depend on the number of jobs
+		self.export_list_chunked(fh,export_fusions)
+		self.export_list_chunked(fh,sorted([merged_fusions[key] for key in sorted(merged_fusions.keys())], key=lambda merged_fusion: len(merged_fusion)))
 	
-	def overlay_fusions_recursive(self,fh,merged_fusions):
-		n_total = self.num_fusions() * len(merged_fusions)
+	def find_edges(self,fusions,pairs):
+		"""Matches the candidate pairs
+		
+		@param fusions: FusionIndex, or dict of the fusions in pairs
+		@param pairs: list of candidate pairs (y,x) as given by
+		FusionIndex.find_pairs()
+		
+		@return: list of the matching pairs
+		"""
+		n_total = len(pairs)
 		passed = 0
 		previous_percentage = -100.0
 		
-		k = len(merged_fusions[0].fusions)
-		if k > self.num_fusions():
-			raise Exception("Out of bound, reasonable recursion depth has exceeded")
+		edges = []
+		for y,x in pairs:
+			fusion_y = fusions[y]
+			fusion_x = fusions[x]
+			n_total, passed, previous_percentage = self.log_progress(n_total, passed, previous_percentage)
+			
+			# If they do not belong to the same dataset - i.e. no duplication removal
+			if fusion_y and (fusion_y.dataset_mask & fusion_x.dataset_mask) == 0:
+				if self.match_fusion_genes(fusion_y, fusion_x) != None:
+					edges.append((y,x))
+			passed += 1
+		
+		n_total, passed, previous_percentage = self.log_progress(n_total, passed, previous_percentage)
+		
+		return edges
+	
+	def find_cliques(self,fusions,pairs):
+		"""Matches the candidate pairs and, with overlap matching, finds
+		the maximal consistent cliques of the resulting MatchGraph.
+		Subset groups are not cliques and are only determined once all
+		matches are known, see find_subset_groups().
 		
-		self.logger.info("Starting "+str(n_total)+" comparisons for k="+str(k))
+		@return: tuple (edges, cliques) with the matching pairs and the
+		cliques as sorted lists of fusion ids (none with subset matching)
+		"""
+		edges = self.find_edges(fusions,pairs)
 		
-		export_fusions = [tmp for tmp in merged_fusions]
-		merged_fusions_new = []
+		if self.args.matching_method == 'subset':
+			return edges, []
 		
-		for y,fusion_y in self:
-			for x in range(len(merged_fusions)):
-				merged_fusion_x = merged_fusions[x]
-				n_total, passed, previous_percentage = self.log_progress(n_total, passed, previous_percentage)
-				
-				# - if fusion_y not in merged_fusion ? // if fusion_y.dataset_name not in [tmp['dataset'] for tmp in fusion_x.locations()]
-				if fusion_y not in merged_fusion_x.fusions:
-					comparison = self.match_fusions(fusion_y, merged_fusion_x)
-					
-					if comparison != False:
-						export_fusions[x] = None
-						merged_fusions_new.append(comparison)
+		match_graph = MatchGraph()
+		for y,x in edges:
+			match_graph.add_edge(y,x)
+		
+		self.logger.debug("Merging "+str(len(match_graph))+" fusions with "+str(match_graph.num_edges())+" matches")
+		
+		extend = self.get_clique_consistency(fusions)
+		cliques = [clique for clique in match_graph.find_maximal_consistent_cliques(extend)]
+		
+		return edges, cliques
+	
+	def update_cliques(self,pairs,start):
+		"""Adds the matches of the fusions added since the previous run
+		(those from start onwards) to self.match_graph.
+		
+		@return: list of cliques as sorted lists of fusion ids
+		"""
+		for y,x in self.find_edges(self.fusion_index,pairs):
+			self.match_graph.add_edge(y,x)
+		
+		if self.args.matching_method == 'subset':
+			return []
+		
+		extend = self.get_clique_consistency(self.fusion_index)
+		
+		# Cliques of the previous run remain, unless a new fusion extends them
+		cliques = [list(key) for key in sorted(self.merged_fusions.keys()) if self.match_graph.is_maximal(key,extend)]
+		cliques.extend(self.match_graph.find_maximal_cliques_containing(range(start,len(self.fusion_index)),extend))
+		
+		return cliques
+	
+	def get_clique_consistency(self,fusions):
+		"""The merged gene sets of overlap matching are the intersection,
+		so all fusions in a clique need to share a gene. Cliques are only
+		merged with overlap matching; EGM matching groups identical gene
+		sets in overlay_fusions_egm() and subset matching groups fusions
+		with find_subset_groups().
+		
+		@return: function for MatchGraph.find_maximal_consistent_cliques()
+		"""
+		def extend(state,i):
+			if state == None:
+				return (fusions[i].get_gene_ids_left(), fusions[i].get_gene_ids_right())
+			else:
+				state_left = state[0].intersection(fusions[i].get_gene_ids_left())
+				state_right = state[1].intersection(fusions[i].get_gene_ids_right())
+				if len(state_left) > 0 and len(state_right) > 0:
+					return (state_left, state_right)
+				else:
+					return None
+		
+		return extend
+	
+	def find_subset_groups(self,fusions):
+		"""With subset matching, a merged fusion only keeps the smallest
+		gene sets of its fusions. The former k-level expansion merged any
+		other fusion of which the gene sets were a subset or superset of
+		these smallest sets, also if it did not match each member. A group
+		of C{A:B}, C{A,C:B} and C{A,D:B} is therefore a single merged
+		fusion, although C{A,C:B} and C{A,D:B} do not match each other.
+		
+		Starting from each match of self.match_graph, the smallest gene
+		sets are shrunk by every fusion that is a subset of them, until
+		no such fusion is left. The group is then formed by all fusions
+		containing these smallest sets. Only the match a group starts
+		from has to be between different datasets; like with the k-level
+		expansion, a group may hold several fusions of one dataset.
+		
+		@param fusions: FusionIndex of which self.match_graph holds the
+		matches
+		
+		@return: list of groups as sorted lists of fusion ids
+		"""
+		def get_class(fusion):
+			# Fusions of a group have to match each others strands and
+			# acceptor-donor direction, if specific matching is enabled
+			return (self.args.strand_specific_matching and (fusion.get_left_strand(), fusion.get_right_strand()),
+				self.args.acceptor_donor_order_specific_matching and fusion.get_acceptor_donor_direction())
+		
+		def relates(set1,set2):
+			return set1.issubset(set2) or set2.issubset(set1)
+		
+		states = []
+		visited = set()
+		for y in sorted(self.match_graph.adjacency.keys()):
+			for x in sorted(self.match_graph.adjacency[y]):
+				if x < y:
+					state = (fusions.genes_left[y] & fusions.genes_left[x], fusions.genes_right[y] & fusions.genes_right[x], get_class(fusions[y]))
+					if state not in visited:
+						visited.add(state)
+						states.append(state)
+		
+		groups = set()
+		while len(states) > 0:
+			genes_left, genes_right, fusion_class = states.pop()
+			
+			group = []
+			shrinks = False
+			for i in fusions.find_candidates(genes_left,genes_right):
+				if get_class(fusions[i]) == fusion_class and relates(fusions.genes_left[i],genes_left) and relates(fusions.genes_right[i],genes_right):
+					if genes_left.issubset(fusions.genes_left[i]) and genes_right.issubset(fusions.genes_right[i]):
+						group.append(i)
+					else:
+						shrinks = True
+						state = (genes_left & fusions.genes_left[i], genes_right & fusions.genes_right[i], fusion_class)
+						if state not in visited:
+							visited.add(state)
+							states.append(state)
+			
+			if not shrinks:
+				groups.add(tuple(group))
+		
+		return [list(group) for group in sorted(groups)]
+	
+	def find_components(self,fusions,pairs):
+		"""Partitions the candidate pairs into independent units of work.
+		Fusions are bucketed on their chromosome pair, and buckets are
+		joined as soon as a candidate pair spans both of them, because
+		gene sets may also match across chromosome pairs.
+		
+		@return: list of lists of pairs, the largest first
+		"""
+		parents = {}
+		
+		def find_bucket(fusion):
+			bucket = (fusion.get_left_chromosome(False),fusion.get_right_chromosome(False))
+			if not parents.has_key(bucket):
+				parents[bucket] = bucket
+			
+			while parents[bucket] != bucket:
+				parents[bucket] = parents[parents[bucket]]
+				bucket = parents[bucket]
+			
+			return bucket
+		
+		for y,x in pairs:
+			bucket_y = find_bucket(fusions[y])
+			bucket_x = find_bucket(fusions[x])
+			if bucket_y != bucket_x:
+				parents[max(bucket_y,bucket_x)] = min(bucket_y,bucket_x)
+		
+		components = {}
+		for y,x in pairs:
+			bucket = find_bucket(fusions[y])
+			if not components.has_key(bucket):
+				components[bucket] = []
+			components[bucket].append((y,x))
+		
+		return sorted(components.values(), key=lambda component: (-len(component), component[0]))
+	
+	def find_cliques_parallel(self,fusions,pairs):
+		"""Runs find_cliques() for each independent component in a pool of
+		self.args.jobs processes. The largest components are sent first,
+		so that these do not keep a single process busy at the end.
+		
+		With subset matching the workers only match the pairs. The groups
+		are found afterwards in this process by find_subset_groups(),
+		because they depend on all matches and not only on the pairs
+		within a component.
+		
+		@return: tuple (edges, cliques) as in find_cliques()
+		"""
+		components = self.find_components(fusions,pairs)
+		
+		self.logger.info("Distributing "+str(len(components))+" independent components over "+str(self.args.jobs)+" processes")
+		
+		def tasks():
+			for component in components:
+				component_fusions = {}
+				for y,x in component:
+					component_fusions[y] = fusions[y]
+					component_fusions[x] = fusions[x]
 				
-				passed += 1
+				yield (self.args, component_fusions, component)
 		
-		n_total, passed, previous_percentage = self.log_progress(n_total, passed, previous_percentage)
+		edges = []
+		cliques = []
+		pool = multiprocessing.Pool(self.args.jobs)
+		try:
+			for component_edges, component_cliques in pool.imap_unordered(find_cliques_in_component, tasks()):
+				edges.extend(component_edges)
+				cliques.extend(component_cliques)
+			pool.close()
+		except:
+			pool.terminate()
+			raise
+		finally:
+			pool.join()
+		
+		return edges, cliques
+	
+	def get_state_settings(self):
+		return {
+			'matching_method':self.args.matching_method,
+			'strand_specific_matching':self.args.strand_specific_matching,
+			'acceptor_donor_order_specific_matching':self.args.acceptor_donor_order_specific_matching,
+			'long_gene_size':self.args.long_gene_size}
+	
+	def save_state(self,filename):
+		"""Saves the experiments, their matches and the merged fusions of
+		the last run, so that it can be extended with other experiments
+		by load_state().
+		"""
+		state = {
+			'version':fuma.__version__,
+			'settings':self.get_state_settings(),
+			'dataset_names':sorted(dataset_ids.keys(), key=lambda name: dataset_ids[name]),
+			'experiments':self.experiments,
+			'fusions':(self.fusion_index.fusions if self.fusion_index != None else None),
+			'match_graph':self.match_graph,
+			'merged_fusions':self.merged_fusions}
+		
+		with open(filename,"wb") as fh:
+			cPickle.dump(state,fh,cPickle.HIGHEST_PROTOCOL)
+		
+		self.logger.info("Saved state of "+str(len(self.experiments))+" experiments to: "+filename)
+	
+	def load_state(self,filename):
+		"""Loads a state saved by save_state(). Experiments that are added
+		hereafter are only matched with the fusions of the state, and
+		not the fusions of the state with each other.
+		"""
+		if len(self.experiments) > 0:
+			raise Exception("A state can only be loaded before experiments are added")
+		
+		with open(filename,"rb") as fh:
+			state = cPickle.load(fh)
+		
+		if state['settings'] != self.get_state_settings():
+			raise Exception("The state in '"+filename+"' was saved with other matching settings: "+str(state['settings']))
+		
+		# Gene ids and dataset masks are interned per process
+		dataset_names = state['dataset_names']
+		def reintern_mask(dataset_mask):
+			new_mask = 0
+			for i in range(len(dataset_names)):
+				if dataset_mask & (1 << i):
+					new_mask |= get_dataset_mask(dataset_names[i])
+			return new_mask
+		
+		for experiment in state['experiments']:
+			experiment.dataset_mask = get_dataset_mask(experiment.name)
+		
+		# With columnar storage the indexed fusions are not the objects
+		# within the experiments, but they share their Gene objects
+		fusions = state['fusions']
+		if fusions == None:
+			fusions = [fusion for experiment in state['experiments'] for fusion in experiment]
+		
+		for fusion in fusions:
+			self.reintern_fusion(fusion,reintern_mask)
+		
+		for merged_fusion in state['merged_fusions'].values():
+			self.reintern_fusion(merged_fusion,reintern_mask)
+		
+		self.experiments = state['experiments']
+		self.match_graph = state['match_graph']
+		self.merged_fusions = state['merged_fusions']
+		
+		if state['fusions'] != None:
+			self.fusion_index = FusionIndex()
+			for fusion in state['fusions']:
+				self.fusion_index.add_fusion(fusion)
+			
+			self.n_experiments_indexed = len(self.experiments)
+		
+		self.logger.info("Loaded state of "+str(len(self.experiments))+" experiments from: "+filename)
+	
+	def reintern_fusion(self,fusion,reintern_mask):
+		for genes in [fusion.annotated_genes_left,fusion.annotated_genes_right]:
+			if genes != None:
+				for gene in genes:
+					gene.id = get_gene_id(gene.name)
+		
+		if fusion.annotated_genes_left != None:
+			fusion.annotate_genes_left(fusion.annotated_genes_left)
+		if fusion.annotated_genes_right != None:
+			fusion.annotate_genes_right(fusion.annotated_genes_right)
+		
+		if isinstance(fusion, Fusion):
+			fusion.reintern_datasets(reintern_mask)
+		else:
+			fusion.dataset_mask = reintern_mask(fusion.dataset_mask)
+	
+	def merge_clique(self,fusions):
+		"""Merges the fusions of a clique, in the same way as they would
+		be merged pairwise by match_fusions().
+		
+		The fusions of a subset group do not all match each other, but
+		each of them matches the smallest gene sets of the group. Those
+		fusions are therefore merged first.
+		"""
+		if self.args.matching_method == 'subset':
+			smallest_left = min(fusions, key=lambda fusion: len(fusion.get_gene_ids_left()))
+			smallest_right = min(fusions, key=lambda fusion: len(fusion.get_gene_ids_right()))
+			fusions = [smallest_left] + [smallest_right] + [fusion for fusion in fusions if fusion is not smallest_left and fusion is not smallest_right]
+			if smallest_left is smallest_right:
+				fusions = fusions[1:]
+		
+		merged_fusion = self.match_fusions(fusions[1],fusions[0])
+		for fusion in fusions[2:]:
+			if merged_fusion != False:
+				merged_fusion = self.match_fusions(fusion,merged_fusion)
+		
+		if merged_fusion == False:
+			raise Exception("Inconsistent clique of fusion genes:\n\n"+"\n".join([fusion.__str__() for fusion in fusions]))
+		
+		return merged_fusion
+	
+	def overlay_fusions_egm(self,fh):
+		"""EGM matching is an equivalence relation; fusions only match if
+		their left and right gene sets (and strands and acceptor-donor
+		direction, if specific matching is enabled) are identical. Rather
+		than comparing all pairs and expanding them k-level by k-level,
+		the fusions are grouped on these properties in a single pass.
+		"""
+		export_fusions = []# Fusions to be exported individually
+		groups = {}
+		
+		for i,fusion in self:
+			export_fusions.append(fusion)
+			
+			if fusion.has_annotated_genes():
+				key = (fusion.get_gene_ids_left(),fusion.get_gene_ids_right())
+				if not groups.has_key(key):
+					groups[key] = []
+				groups[key].append((i,fusion))
+		
+		self.logger.info("Grouped "+str(len(export_fusions))+" fusions into "+str(len(groups))+" gene sets")
+		
+		merged_fusions = []
+		for group in groups.values():
+			if len(group) > 1:
+				for subgroup in self.split_egm_group(group):
+					merged_fusion = self.merge_egm_group(subgroup)
+					
+					if merged_fusion:
+						for i,fusion in subgroup:
+							export_fusions[i] = None
+						
+						merged_fusions.append(merged_fusion)
 		
-		merged_fusions_new = self.prune_duplicates(merged_fusions_new)
 		self.export_list_chunked(fh,export_fusions)
+		self.export_list_chunked(fh,merged_fusions)
+	
+	def split_egm_group(self,group):
+		"""Splits fusions with identical gene sets on their strands and
+		acceptor-donor direction, using the same checks as match_fusions()
+		"""
+		subgroups = []
+		
+		for i,fusion in group:
+			for subgroup in subgroups:
+				if self.match_fusion_gene_strands(fusion,subgroup[0][1]) and self.match_acceptor_donor_direction(fusion,subgroup[0][1]):
+					subgroup.append((i,fusion))
+					break
+			else:
+				subgroups.append([(i,fusion)])
+		
+		return subgroups
+	
+	def merge_egm_group(self,subgroup):
+		"""Merges a group of identical fusions (sorted on their position in
+		self.__iter__()) into a single MergedFusion.
+		
+		As soon as two of them come from different datasets, the former
+		k-level expansion merged all of them. The gene objects of the
+		merged fusion are taken from the same fusion as it did, so that
+		the long-gene column does not depend on the engine.
+		
+		@return: MergedFusion or None if all fusions are from the same dataset
+		"""
+		pairs = []
+		for b in range(1,len(subgroup)):
+			for a in range(b):
+				if (subgroup[b][1].dataset_mask & subgroup[a][1].dataset_mask) == 0:
+					pairs.append((b,a))
+		
+		if len(pairs) == 0:
+			return None
+		
+		genes_from = subgroup[pairs[0][0]][1]
+		for member in range(len(subgroup)):
+			missing = [pair for pair in pairs if member not in pair]
+			if len(missing) > 0:
+				genes_from = subgroup[max([c for c in range(len(subgroup)) if c not in missing[0]])][1]
+				break
+		
+		merged_fusion = MergedFusion()
+		for i,fusion in subgroup:
+			merged_fusion.add_fusion(fusion)
 		
-		return merged_fusions_new
+		merged_fusion.annotate_genes_left(genes_from.get_annotated_genes_left2())
+		merged_fusion.annotate_genes_right(genes_from.get_annotated_genes_right2())
+		
+		return merged_fusion
 	
 	def prune_duplicates(self,merged_fusions):
 		"""
-		Remove MergedFusion instances with identical Fusion objects
+		Remove MergedFusion instances with identical Fusion objects, in a
+		single pass keyed by MergedFusion.get_key(). The first occurrence
+		is kept.
 		"""
+		unique_merged_fusions = []
+		keys = set()
 		
-		for y in range(len(merged_fusions)):
-			for x in range(y+1,len(merged_fusions)):
-				if merged_fusions[x] != None and merged_fusions[y] != None and merged_fusions[x].fusions == merged_fusions[y].fusions:
-					# Do some garbage removal?
-					merged_fusions[x] = None
+		for merged_fusion in merged_fusions:
+			if merged_fusion != None:
+				key = merged_fusion.get_key()
+				if key not in keys:
+					keys.add(key)
+					unique_merged_fusions.append(merged_fusion)
 		
-		return [tmp for tmp in merged_fusions if tmp != None]
+		return unique_merged_fusions
 	
 	def log_progress(self,n_total, passed, previous_percentage):
 		# Print percentage - doesn't entirely fit yet
+		if n_total == 0:
+			return n_total, passed, previous_percentage
+		
 		percentage = 100.0 * (float(passed) / float(n_total))
 		if percentage >= previous_percentage + 5.0:# Repport each 5%
 			self.logger.debug(str(round(percentage,1))+"% completed")
@@ -154,7 +614,7 @@ class ComparisonTriangle:
 		return n_total, passed, previous_percentage
 	
 	def export_list_fg(self,fusion,fh):
-		if(self.args.acceptor_donor_order_specific_matching and fusion.acceptor_donor_direction() == AD_DIRECTION_REVERSE):
+		if(self.args.acceptor_donor_order_specific_matching and fusion.get_acceptor_donor_direction() == AD_DIRECTION_REVERSE):
 			## A-B should be reported as B-A; chr1:123\tchr1:456 as chr1:456-chr1:123
 			fh.write(":".join(sorted(list(set([str(gene) for gene in fusion.get_annotated_genes_right2()])))) + "\t")
 			fh.write(":".join(sorted(list(set([str(gene) for gene in fusion.get_annotated_genes_left2()])))))
@@ -170,9 +630,10 @@ class ComparisonTriangle:
 				
 				for location in fusion.locations():
 					if location['dataset'] == dataset.name:
-						strdata.append(str(loc['id'])+"=chr"+loc['right'][0]+':'+str(loc['right'][1])+'-chr'+loc['left'][0]+':'+str(loc['left'][1]))
+						strdata.append(str(location['id'])+"=chr"+location['right'][0]+':'+str(location['right'][1])+'-chr'+location['left'][0]+':'+str(location['left'][1]))
 				
 				fh.write(",".join(sorted(strdata)))
+			fh.write("\n")
 		else:
 			fh.write(":".join(sorted(list(set([str(gene) for gene in fusion.get_annotated_genes_left2()])))) + "\t")
 			fh.write(":".join(sorted(list(set([str(gene) for gene in fusion.get_annotated_genes_right2()])))))
@@ -248,66 +709,82 @@ class ComparisonTriangle:
 				# (not is_empty(a)) and subset(a,b) or subset(b,a)
 		"""
 		
+		matches = self.match_fusion_genes(fusion_1,fusion_2)
+		
+		if matches != None:
+			matches_left, matches_right = matches
+			
+			# Fusion only merges with MergedFusion
+			#if isinstance(fusion_1, MergedFusion) and isinstance(fusion_2, MergedFusion):
+			#	raise Exception("If (A & B) == (C & D), (A & B & C) should have matched before..")
+			#	#merged_fusion = fusion_1
+			#	#merged_fusion.merge(fusion_2)
+			#	#replace_merged_fusions = fusion_2
+			#
+			# And the  first object is always a Fusion, the second possibly a MergedFusion
+			#elif isinstance(fusion_1, MergedFusion) and isinstance(fusion_2, Fusion):
+			#	merged_fusion = fusion_1
+			#	merged_fusion.add_fusion(fusion_2)
+			#
+			# And the following can be done cleaner
+			#elif isinstance(fusion_1, Fusion) and isinstance(fusion_2, MergedFusion):
+			#	merged_fusion = fusion_2
+			#	merged_fusion.add_fusion(fusion_1)
+			#elif isinstance(fusion_1, Fusion) and isinstance(fusion_2, Fusion):
+			#	merged_fusion = MergedFusion()
+			#	merged_fusion.add_fusion(fusion_1)
+			#	merged_fusion.add_fusion(fusion_2)
+			
+			if isinstance(fusion_1, Fusion):
+				if isinstance(fusion_2, MergedFusion):
+					merged_fusion = fusion_2
+					merged_fusion.add_fusion(fusion_1)
+				elif isinstance(fusion_2, Fusion):
+					merged_fusion = MergedFusion()
+					merged_fusion.add_fusion(fusion_1)
+					merged_fusion.add_fusion(fusion_2)
+				else:
+					raise Exception("Something went wrong with the object types")
+			else:
+				raise Exception("Something went wrong with the object types")
+			
+			# This has to be pre-cached and can not be determined on the fly by a functions,
+			# because it requires the type of matching. If you would allow for functions, you could 
+			# end up with overlap and egm and subset based matching mixed up.
+			merged_fusion.annotate_genes_left(matches_left)
+			merged_fusion.annotate_genes_right(matches_right)
+			
+			return merged_fusion
+		return False
+	
+	def match_fusion_genes(self,fusion_1,fusion_2):
+		"""Matches the strands, acceptor-donor direction and gene sets of
+		two fusions, without creating a MergedFusion.
+		
+		@return: (matches_left, matches_right) or None if they do not match
+		"""
+		
 		# First check whether the strands match, if strand-specific-matching is enabled:
 		if	self.match_fusion_gene_strands(fusion_1,fusion_2) and \
 			self.match_acceptor_donor_direction(fusion_1,fusion_2) and \
 			fusion_1.has_annotated_genes() and \
 			fusion_2.has_annotated_genes():
 			
-			# Compare the fusion genes based on their gene names
+			# Compare the fusion genes based on their (interned) gene ids
 			if(self.args.matching_method == 'overlap'):
-				matches_left  = self.match_overlap(fusion_1.get_annotated_genes_left2(), fusion_2.get_annotated_genes_left2())
-				matches_right = self.match_overlap(fusion_1.get_annotated_genes_right2(), fusion_2.get_annotated_genes_right2())
+				matches_left  = self.match_overlap(fusion_1.get_annotated_genes_left2(), fusion_1.get_gene_ids_left(), fusion_2.get_gene_ids_left())
+				matches_right = self.match_overlap(fusion_1.get_annotated_genes_right2(), fusion_1.get_gene_ids_right(), fusion_2.get_gene_ids_right())
 			elif(self.args.matching_method == 'egm'):
-				matches_left  = self.match_egm(fusion_1.get_annotated_genes_left2(), fusion_2.get_annotated_genes_left2())
-				matches_right = self.match_egm(fusion_1.get_annotated_genes_right2(), fusion_2.get_annotated_genes_right2())
+				matches_left  = self.match_egm(fusion_1.get_annotated_genes_left2(), fusion_1.get_gene_ids_left(), fusion_2.get_gene_ids_left())
+				matches_right = self.match_egm(fusion_1.get_annotated_genes_right2(), fusion_1.get_gene_ids_right(), fusion_2.get_gene_ids_right())
 			else:
-				matches_left  = self.match_sets(fusion_1.get_annotated_genes_left2(), fusion_2.get_annotated_genes_left2())
-				matches_right = self.match_sets(fusion_1.get_annotated_genes_right2(), fusion_2.get_annotated_genes_right2())
+				matches_left  = self.match_sets(fusion_1.get_annotated_genes_left2(), fusion_1.get_gene_ids_left(), fusion_2.get_annotated_genes_left2(), fusion_2.get_gene_ids_left())
+				matches_right = self.match_sets(fusion_1.get_annotated_genes_right2(), fusion_1.get_gene_ids_right(), fusion_2.get_annotated_genes_right2(), fusion_2.get_gene_ids_right())
 			
 			if matches_left and matches_right:
-				# Fusion only merges with MergedFusion
-				#if isinstance(fusion_1, MergedFusion) and isinstance(fusion_2, MergedFusion):
-				#	raise Exception("If (A & B) == (C & D), (A & B & C) should have matched before..")
-				#	#merged_fusion = fusion_1
-				#	#merged_fusion.merge(fusion_2)
-				#	#replace_merged_fusions = fusion_2
-				#
-				# And the  first object is always a Fusion, the second possibly a MergedFusion
-				#elif isinstance(fusion_1, MergedFusion) and isinstance(fusion_2, Fusion):
-				#	merged_fusion = fusion_1
-				#	merged_fusion.add_fusion(fusion_2)
-				#
-				# And the following can be done cleaner
-				#elif isinstance(fusion_1, Fusion) and isinstance(fusion_2, MergedFusion):
-				#	merged_fusion = fusion_2
-				#	merged_fusion.add_fusion(fusion_1)
-				#elif isinstance(fusion_1, Fusion) and isinstance(fusion_2, Fusion):
-				#	merged_fusion = MergedFusion()
-				#	merged_fusion.add_fusion(fusion_1)
-				#	merged_fusion.add_fusion(fusion_2)
-				
-				if isinstance(fusion_1, Fusion):
-					if isinstance(fusion_2, MergedFusion):
-						merged_fusion = fusion_2
-						merged_fusion.add_fusion(fusion_1)
-					elif isinstance(fusion_2, Fusion):
-						merged_fusion = MergedFusion()
-						merged_fusion.add_fusion(fusion_1)
-						merged_fusion.add_fusion(fusion_2)
-					else:
-						raise Exception("Something went wrong with the object types")
-				else:
-					raise Exception("Something went wrong with the object types")
-				
-				# This has to be pre-cached and can not be determined on the fly by a functions,
-				# because it requires the type of matching. If you would allow for functions, you could 
-				# end up with overlap and egm and subset based matching mixed up.
-				merged_fusion.annotated_genes_left = matches_left
-				merged_fusion.annotated_genes_right = matches_right
-				
-				return merged_fusion
-		return False
+				return (matches_left, matches_right)
+		
+		return None
 	
 	def match_fusion_gene_strands(self,fusion_1,fusion_2):
 		if not self.args.strand_specific_matching:
@@ -321,40 +798,39 @@ class ComparisonTriangle:
 	def match_acceptor_donor_direction(self,fusion_1,fusion_2):
 		if(not self.args.acceptor_donor_order_specific_matching):
 			return True
-		elif(fusion_1.acceptor_donor_direction == None or fusion_2.acceptor_donor_direction == None):
+		elif(fusion_1.get_acceptor_donor_direction() == None or fusion_2.get_acceptor_donor_direction() == None):
 			raise Exception("A fusion gene without an annotated acceptor-donor direction was used for acceptor-donor-order-specific-matching.\n\n"+fusion_1.__str__()+"\n"+fusion_2.__str__())
 		else:
-			return (fusion_1.acceptor_donor_direction == fusion_2.acceptor_donor_direction)
+			return (fusion_1.get_acceptor_donor_direction() == fusion_2.get_acceptor_donor_direction())
 	
-	def match_overlap(self,set1,set2):									#https://docs.python.org/2/library/sets.html
-		set1_s = set([str(gene) for gene in set1])
-		set2_s = set([str(gene) for gene in set2])
-		
-		overlap = set1_s.intersection(set2_s)
-		if(not overlap):
+	def match_overlap(self,set1,set1_ids,set2_ids):					#https://docs.python.org/2/library/sets.html
+		if set1_ids.isdisjoint(set2_ids):
 			return None
 		else:
 			gene_list = []
 			for gene in set1:
-				if str(gene) in overlap:
+				if gene.id in set2_ids:
 					gene_list.append(gene)
 			return gene_list
 	
-	def match_egm(self,set1,set2):
-		set1_s = set([str(gene) for gene in set1])
-		set2_s = set([str(gene) for gene in set2])
-		if set1_s == set2_s:
+	def match_egm(self,set1,set1_ids,set2_ids):
+		if set1_ids == set2_ids:
 			return set1
 		else:
 			return None
 	
-	def match_sets(self,superset,subset):								#https://docs.python.org/2/library/sets.html
-		subset_s = set([str(gene) for gene in subset])
-		superset_s = set([str(gene) for gene in superset])
-		
-		if(len(subset_s) > len(superset_s)):
-			return self.match_sets(subset,superset)						# Gene names have to be provided as sets
-		elif(subset_s.issubset(superset_s)):
+	def match_sets(self,superset,superset_ids,subset,subset_ids):		#https://docs.python.org/2/library/sets.html
+		if(len(subset_ids) > len(superset_ids)):
+			return self.match_sets(subset,subset_ids,superset,superset_ids)	# Gene names have to be provided as sets
+		elif(subset_ids.issubset(superset_ids)):
 			return subset
 		else:
 			return None
+
+
+def find_cliques_in_component(task):
+	"""Entry point of the processes started by
+	ComparisonTriangle.find_cliques_parallel()
+	"""
+	args, fusions, pairs = task
+	return ComparisonTriangle(args).find_cliques(fusions,pairs)
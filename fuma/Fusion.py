@@ -28,7 +28,53 @@ STRAND_REVERSE = False
 AD_DIRECTION_FORWARD = True
 AD_DIRECTION_REVERSE = False
 
-class Fusion:
+dataset_ids = {}
+
+def get_dataset_id(name):
+	"""Interns a dataset name to an integer, which is the position of
+	its bit within the dataset masks of Fusion and MergedFusion.
+	"""
+	if not dataset_ids.has_key(name):
+		dataset_ids[name] = len(dataset_ids)
+	
+	return dataset_ids[name]
+
+def get_dataset_mask(name):
+	return 1 << get_dataset_id(name)
+
+def reset_dataset_ids():
+	"""Forgets all interned dataset names, so that the dataset masks of
+	a next run within the same process start again from the first bit.
+	The masks of fusions and experiments created before become invalid.
+	"""
+	dataset_ids.clear()
+
+def count_datasets(dataset_mask):
+	return bin(dataset_mask).count("1")
+
+class Fusion(object):
+	# Experiments contain many fusions: no __dict__ is allocated per
+	# object and the bookkeeping of merges is only allocated when needed
+	__slots__ = [ \
+		'annotated_genes_left', \
+		'annotated_genes_right', \
+		'gene_ids_left', \
+		'gene_ids_right', \
+		'left_strand', \
+		'right_strand', \
+		'_tested_datasets', \
+		'_matched_datasets', \
+		'dataset_mask', \
+		'_matches', \
+		'dataset_name', \
+		'acceptor_donor_direction', \
+		'left_chr_str', \
+		'right_chr_str', \
+		'left_break_position', \
+		'right_break_position', \
+		'uid', \
+		'support']
+	
 	def __init__(self, \
 	   arg_left_chr, \
 	   arg_right_chr, \
@@ -47,19 +93,35 @@ class Fusion:
 		self.annotated_genes_left = None
 		self.annotated_genes_right = None
 		
+		# Cached frozensets of the gene ids, set by annotate_genes_left/right()
+		self.gene_ids_left = frozenset()
+		self.gene_ids_right = frozenset()
+		
 		self.left_strand = None
 		self.right_strand = None
 		
-		self.tested_datasets = {arg_dataset_name:True}
-		self.matched_datasets = {arg_dataset_name:True}
+		# Bitmasks of the datasets (see get_dataset_id()), None until
+		# they differ from the dataset of this fusion
+		self._tested_datasets = None
+		self._matched_datasets = None
+		
+		# Datasets of the fusions in self.matches, equal to those in self.locations()
+		self.dataset_mask = get_dataset_mask(arg_dataset_name)
 		
-		self.matches = set([self])## initial (non merged) objects used for matching
+		# The initial (non merged) fusions that were merged into this one,
+		# None if there are none. The fusion itself is not stored, so that
+		# fusions do not reference themselves and are freed without the
+		# cyclic garbage collector.
+		self._matches = None
 		
 		#@todo use pointer to original dataset?
 		self.dataset_name = arg_dataset_name
 		
 		self.acceptor_donor_direction = None
 		
+		# Number of reads supporting the fusion, if given by the reader
+		self.support = None
+		
 		self.set( \
 			self.cleanup_chr_name(arg_left_chr), \
 			self.cleanup_chr_name(arg_right_chr), \
@@ -71,8 +133,55 @@ class Fusion:
 			arg_auto_set_acceptor_donor_direction
 		)
 	
-	def prepare_deletion(self):
-		del(self.matches)
+	@property
+	def matches(self):
+		"""@return: frozenset of the initial (non merged) fusions used for matching, including this one
+		"""
+		if self._matches == None:
+			return frozenset([self])
+		else:
+			return self._matches | frozenset([self])
+	
+	@matches.setter
+	def matches(self,matches):
+		matches = frozenset(matches) - frozenset([self])
+		if len(matches) == 0:
+			self._matches = None
+		else:
+			self._matches = matches
+	
+	@property
+	def tested_datasets(self):
+		if self._tested_datasets == None:
+			return get_dataset_mask(self.dataset_name)
+		else:
+			return self._tested_datasets
+	
+	@tested_datasets.setter
+	def tested_datasets(self,dataset_mask):
+		self._tested_datasets = dataset_mask
+	
+	@property
+	def matched_datasets(self):
+		if self._matched_datasets == None:
+			return self.tested_datasets
+		else:
+			return self._matched_datasets
+	
+	@matched_datasets.setter
+	def matched_datasets(self,dataset_mask):
+		self._matched_datasets = dataset_mask
+	
+	def reintern_datasets(self,reintern_mask):
+		"""Only the dataset masks that were allocated have to be
+		reinterned, the others are derived from the dataset name.
+		"""
+		self.dataset_mask = reintern_mask(self.dataset_mask)
+		
+		if self._tested_datasets != None:
+			self._tested_datasets = reintern_mask(self._tested_datasets)
+		if self._matched_datasets != None:
+			self._matched_datasets = reintern_mask(self._matched_datasets)
 	
 	def locations(self):
 		out = []
@@ -86,14 +195,11 @@ class Fusion:
 		return out
 	
 	def get_dataset_statistics(self):
-		matches = 0
-		unmatches = 0
+		tested_datasets = self.tested_datasets
+		matched_datasets = self.matched_datasets
 		
-		for match in self.matched_datasets:
-			if(match in self.tested_datasets):
-				matches += 1
-			else:
-				unmatches += 1
+		matches = count_datasets(matched_datasets & tested_datasets)
+		unmatches = count_datasets(matched_datasets & ~tested_datasets)
 		
 		return (matches,unmatches)
 	
@@ -151,7 +257,7 @@ class Fusion:
 		
 		return None
 	
-	def acceptor_donor_direction(self):
+	def get_acceptor_donor_direction(self):
 		return self.acceptor_donor_direction
 	
 	def cleanup_chr_name(self,chr_name):
@@ -224,9 +330,17 @@ class Fusion:
 	
 	def annotate_genes_left(self,gene_names):
 		self.annotated_genes_left = gene_names
+		self.gene_ids_left = frozenset([gene.id for gene in gene_names])
 		
 	def annotate_genes_right(self,gene_names):
 		self.annotated_genes_right = gene_names
+		self.gene_ids_right = frozenset([gene.id for gene in gene_names])
+	
+	def get_gene_ids_left(self):
+		return self.gene_ids_left
+	
+	def get_gene_ids_right(self):
+		return self.gene_ids_right
 	
 	def get_annotated_genes_left(self,name_indexed):
 		if(not name_indexed):
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+
+"""[License: GNU General Public License v3 (GPLv3)]
+ 
+ This file is part of FuMa.
+ 
+ FuMa is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+ 
+ FuMa is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+ Documentation as defined by:
+ <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
+"""
+
+import logging,array
+
+from fuma.Fusion import Fusion
+
+
+class FusionColumns:
+	"""Columnar storage of the fusion table of an experiment. Breakpoints,
+	strands, acceptor-donor directions and gene sets are kept in arrays
+	and the chromosomes are interned.
+	
+	It behaves like the list of Fusion objects it replaces: Fusion
+	objects are created on demand and changes made to them have to be
+	written back by assigning them, e.g. fusions[i] = fusion.
+	"""
+	logger = logging.getLogger("FuMa::FusionColumns")
+	
+	def __init__(self):
+		# All fusions of an experiment share the dataset name
+		self.dataset_name = None
+		
+		# Ids of the chromosomes in self.chromosomes
+		self.left_chrs = array.array('i')
+		self.right_chrs = array.array('i')
+		
+		self.chromosomes = []
+		self.chromosome_ids = {}
+		
+		self.left_break_positions = array.array('l')
+		self.right_break_positions = array.array('l')
+		
+		# 1 = STRAND_FORWARD / AD_DIRECTION_FORWARD, 0 = *_REVERSE, -1 = None
+		self.left_strands = array.array('b')
+		self.right_strands = array.array('b')
+		self.acceptor_donor_directions = array.array('b')
+		
+		self.uids = []
+		
+		# -1 = None
+		self.supports = array.array('l')
+		
+		# Ids of the gene sets in self.gene_sets, -1 if not annotated
+		self.genes_left = array.array('i')
+		self.genes_right = array.array('i')
+		
+		self.gene_sets = []
+		self.gene_set_ids = {}
+		
+		# Rows of the fusions that are exposed; other rows are duplicates
+		# that were merged into them, as listed in self.duplicates
+		self.rows = array.array('i')
+		self.duplicates = {}
+	
+	def __len__(self):
+		return len(self.rows)
+	
+	def __iter__(self):
+		for row in self.rows:
+			yield self.get_fusion(row)
+	
+	def __getitem__(self,i):
+		if isinstance(i, slice):
+			return [self.get_fusion(row) for row in self.rows[i]]
+		else:
+			return self.get_fusion(self.rows[i])
+	
+	def __setitem__(self,i,fusion):
+		self.set_row(self.rows[i],fusion)
+	
+	def append(self,fusion):
+		row = self.add_row(fusion)
+		self.rows.append(row)
+		
+		duplicates = [self.add_row(match) for match in fusion.matches if match != fusion]
+		if len(duplicates) > 0:
+			self.duplicates[row] = array.array('i',duplicates)
+	
+	def add_row(self,fusion):
+		row = len(self.uids)
+		
+		self.left_chrs.append(-1)
+		self.right_chrs.append(-1)
+		self.left_break_positions.append(0)
+		self.right_break_positions.append(0)
+		self.left_strands.append(-1)
+		self.right_strands.append(-1)
+		self.acceptor_donor_directions.append(-1)
+		self.uids.append(None)
+		self.supports.append(-1)
+		self.genes_left.append(-1)
+		self.genes_right.append(-1)
+		
+		self.set_row(row,fusion)
+		
+		return row
+	
+	def set_row(self,row,fusion):
+		if self.dataset_name == None:
+			self.dataset_name = fusion.dataset_name
+		elif fusion.dataset_name != self.dataset_name:
+			raise Exception("Fusion does not belong to dataset "+self.dataset_name+":\n\n"+fusion.__str__())
+		
+		self.left_chrs[row] = self.get_chromosome_id(fusion.get_left_chromosome())
+		self.right_chrs[row] = self.get_chromosome_id(fusion.get_right_chromosome())
+		self.left_break_positions[row] = fusion.get_left_break_position()
+		self.right_break_positions[row] = fusion.get_right_break_position()
+		self.left_strands[row] = self.encode(fusion.left_strand)
+		self.right_strands[row] = self.encode(fusion.right_strand)
+		self.acceptor_donor_directions[row] = self.encode(fusion.acceptor_donor_direction)
+		self.uids[row] = fusion.uid
+		self.supports[row] = (fusion.support if fusion.support != None else -1)
+		self.genes_left[row] = self.get_gene_set_id(fusion.annotated_genes_left)
+		self.genes_right[row] = self.get_gene_set_id(fusion.annotated_genes_right)
+	
+	def get_fusion(self,row):
+		fusion = self.get_row(row)
+		
+		if self.duplicates.has_key(row):
+			fusion.matches = set([fusion] + [self.get_row(duplicate) for duplicate in self.duplicates[row]])
+		
+		return fusion
+	
+	def get_row(self,row):
+		fusion = Fusion( \
+			self.chromosomes[self.left_chrs[row]], \
+			self.chromosomes[self.right_chrs[row]], \
+			self.left_break_positions[row], \
+			self.right_break_positions[row], \
+			self.decode(self.left_strands[row]), \
+			self.decode(self.right_strands[row]), \
+			self.dataset_name, \
+			self.uids[row], \
+			False)
+		
+		fusion.acceptor_donor_direction = self.decode(self.acceptor_donor_directions[row])
+		
+		if self.supports[row] != -1:
+			fusion.support = self.supports[row]
+		
+		if self.genes_left[row] != -1:
+			fusion.annotate_genes_left(list(self.gene_sets[self.genes_left[row]]))
+		if self.genes_right[row] != -1:
+			fusion.annotate_genes_right(list(self.gene_sets[self.genes_right[row]]))
+		
+		return fusion
+	
+	def get_chromosome_id(self,chromosome):
+		if not self.chromosome_ids.has_key(chromosome):
+			self.chromosome_ids[chromosome] = len(self.chromosomes)
+			self.chromosomes.append(chromosome)
+		
+		return self.chromosome_ids[chromosome]
+	
+	def get_gene_set_id(self,genes):
+		"""Identical gene sets are only stored once
+		"""
+		if genes == None:
+			return -1
+		
+		key = tuple(genes)
+		if not self.gene_set_ids.has_key(key):
+			self.gene_set_ids[key] = len(self.gene_sets)
+			self.gene_sets.append(key)
+		
+		return self.gene_set_ids[key]
+	
+	def encode(self,value):
+		if value == None:
+			return -1
+		elif value:
+			return 1
+		else:
+			return 0
+	
+	def decode(self,value):
+		if value == -1:
+			return None
+		else:
+			return value == 1
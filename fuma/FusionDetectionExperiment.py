@@ -21,7 +21,7 @@
  <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
 """
 
-import logging,sys,fuma,datetime
+import logging,sys,fuma,datetime,bisect
 
 from fuma import Fusion
 from fuma.Fusion import AD_DIRECTION_REVERSE
@@ -30,20 +30,60 @@ from fuma.Fusion import AD_DIRECTION_FORWARD
 from fuma.Fusion import STRAND_FORWARD
 from fuma.Fusion import STRAND_REVERSE
 
+from fuma.FusionIndex import FusionIndex
+from fuma.FusionColumns import FusionColumns
+
 class FusionDetectionExperiment:
 	logger = logging.getLogger("FuMa::FusionDetectionExperiment")
 	
-	def __init__(self,name):
+	# Minimal number of supporting reads of the fusions that are read,
+	# for the readers of formats that provide them (see is_supported())
+	min_reads = 0
+	
+	def __init__(self,name,columnar_storage=False):
 		self.name = name
+		self.dataset_mask = Fusion.get_dataset_mask(name)
+		
+		# Store the fusions in FusionColumns instead of lists of Fusion objects
+		self.columnar_storage = columnar_storage
 		
 		self.genes_spanning_left_junction = None
 		self.genes_spanning_right_junction = None
 		
 		self.flush()
 	
-	def __del__(self):
-		for fusion in self:
-			fusion.prepare_deletion()
+	def parse(self):
+		"""Adds all fusions of self.filename to the experiment
+		"""
+		self.logger.info("Parsing file: "+str(self.filename))
+		
+		for fusion in self.iter_fusions():
+			self.add_fusion(fusion)
+		
+		self.logger.debug("Parsed fusion genes: "+str(len(self)))
+	
+	def iter_fusions(self):
+		"""Reads the fusions of self.filename one by one, without storing
+		them in the experiment. Implemented by the readers (see Readers).
+		
+		@return: generator of Fusion objects
+		"""
+		raise Exception("Experiment '"+str(self.name)+"' can not be read from a file")
+	
+	def is_supported(self,support):
+		"""Fusions of which the support is unknown (None) only pass if
+		there is no minimal number of reads.
+		
+		@return: whether a fusion with support reads passes self.min_reads
+		"""
+		return self.min_reads == 0 or (support != None and support >= self.min_reads)
+	
+	def check_support_columns(self,columns):
+		"""Fusions can only be filtered on their support if the file has
+		the columns with the number of reads.
+		"""
+		if self.min_reads > 0 and columns == None:
+			raise Exception("Can not filter on min_reads: file '"+str(self.filename)+"' has no columns with the number of supporting reads")
 	
 	def add_fusion(self,fusion):
 		# Add left location
@@ -54,6 +94,9 @@ class FusionDetectionExperiment:
 		right_chr = fusion.get_right_chromosome(False)
 		right_pos = fusion.get_right_break_position()
 		
+		fusion_id = len(self.fusions)
+		self.fusions.append(fusion)
+		
 		###################### new type of indexing ####################
 		## ensure that chr_left < chr_right
 		if(not self.index.has_key(left_chr)):
@@ -62,10 +105,34 @@ class FusionDetectionExperiment:
 		if(not self.index[left_chr].has_key(right_chr)):
 			self.index[left_chr][right_chr] = []
 		
-		self.index[left_chr][right_chr].append(fusion)
+		ranges = self.index[left_chr][right_chr]
+		if(len(ranges) > 0 and ranges[-1][1] == fusion_id):
+			ranges[-1][1] = fusion_id + 1
+		else:
+			ranges.append([fusion_id,fusion_id + 1])
 		################################################################
 		
-		self.n += 1
+		return fusion_id
+	
+	def get_chromosome_pairs(self):
+		"""@return: sorted list of the (left_chr,right_chr) pairs that have fusions
+		"""
+		pairs = []
+		for left_chr in self.index.keys():
+			for right_chr in self.index[left_chr].keys():
+				pairs.append((left_chr,right_chr))
+		
+		return sorted(pairs)
+	
+	def get_fusion_ids(self,left_chr,right_chr):
+		"""@return: ascending list of the ids of the fusions of a chromosome pair
+		"""
+		fusion_ids = []
+		if(self.index.has_key(left_chr) and self.index[left_chr].has_key(right_chr)):
+			for start, end in self.index[left_chr][right_chr]:
+				fusion_ids.extend(range(start,end))
+		
+		return fusion_ids
 	
 	def show_me(self):
 		print self.__str__()
@@ -81,81 +148,7 @@ class FusionDetectionExperiment:
 		return out
 	
 	def export_to_CG_Junctions_file(self,filename):
-		if(filename == "-"):
-			fh = sys.stdout
-		else:
-			fh = open(filename,"w")
-		
-		fh.write("#ASSEMBLY_ID	???\n")
-		fh.write("#SOFTWARE_VERSION	FuMa v"+fuma.__version__+"\n")
-		fh.write("#GENERATED_BY	FuMa\n")
-		fh.write("#GENERATED_AT	"+str(datetime.datetime.utcnow())+"\n")
-		fh.write("#FORMAT_VERSION	2\n")
-		fh.write("#GENOME_REFERENCE	???	build	??\n")
-		fh.write("#SAMPLE	???\n")
-		fh.write("#TYPE	JUNCTIONS\n")
-		fh.write("#DBSNP_BUILD	dbSNP	build	???\n")
-		fh.write("#GENE_ANNOTATIONS	???	build	???\n")
-		fh.write("\n")
-		fh.write(">Id	LeftChr	LeftPosition	LeftStrand	LeftLength	RightChr	RightPosition	RightStrand	RightLength	StrandConsistent	Interchromosomal	Distance	DiscordantMatePairAlignments	JunctionSequenceResolved	TransitionSequence	TransitionLength	LeftRepeatClassification	RightRepeatClassification	LeftGenes	RightGenes	XRef	DeletedTransposableElement	KnownUnderrepresentedRepeat	FrequencyInBaselineGenomeSet	AssembledSequence	EventId	Type	RelatedJunctions\n")
-		
-		fid = 1
-		
-		for fusion in self.__iter__():
-			if(fusion != False):# Duplicates are flagged as False
-				fh.write(str(fid)+"	")
-				
-				fh.write(fusion.get_left_chromosome()+"	")
-				fh.write(str(fusion.get_left_break_position())+"	")
-				
-				if(fusion.left_strand == STRAND_FORWARD):
-					fh.write('+')
-				elif(fusion.left_strand == STRAND_REVERSE):
-					fh.write('-')
-
-				fh.write("	101	")
-				fh.write(fusion.get_right_chromosome()+"	")
-				fh.write(str(fusion.get_right_break_position())+"	")
-				
-				if(fusion.left_strand == STRAND_FORWARD):
-					fh.write('+')
-				elif(fusion.left_strand == STRAND_REVERSE):
-					fh.write('-')
-				
-				fh.write("	101	")
-				strand_consistent = (fusion.left_strand == fusion.right_strand)
-				interchromosomal = fusion.is_interchromosomal()#(fusion.get_left_chromosome() != fusion.get_right_chromosome())
-				distance = str(fusion.get_distance())
-				
-				if(strand_consistent):
-					fh.write("Y	")
-				else:
-					fh.write("N	")
-				
-				if(interchromosomal):
-					fh.write("Y	")
-				else:
-					fh.write("N	")
-				
-				if(distance != "-1"):
-					fh.write(distance)
-				fh.write("\t")
-				fh.write("20	Y	")
-				
-				# Sequences are not being stored as it consumes too much memory
-				fh.write("\t")
-				
-				fh.write("			")
-				
-				fh.write(":".join(fusion.get_annotated_genes_left(True).keys())+"	")
-				fh.write(":".join(fusion.get_annotated_genes_right(True).keys())+"	")
-				
-				fh.write("			1.0		"+str(fid)+"	complex	"+str(fusion.locations)+"\n")
-				
-				fid += 1
-		
-		if(filename != "-"):
-			fh.close()
+		export_fusions_to_CG_Junctions_file(self,filename)
 	
 	def export_to_list(self,fh,order,blacklist,args):
 		"""
@@ -223,46 +216,79 @@ class FusionDetectionExperiment:
 				fh.write("\n")
 	
 	def annotate_genes(self,gene_annotation):
-		self.annotate_genes_left(gene_annotation)
-		self.annotate_genes_right(gene_annotation)
+		self.annotate_junctions(gene_annotation,not self.genes_spanning_left_junction,not self.genes_spanning_right_junction)
 	
 	def annotate_genes_left(self,gene_annotation):
-		if(not self.genes_spanning_left_junction):
-			self.logger.debug("Annotating genes on the left junction: "+self.name+" - "+gene_annotation.name)
-			
-			for fusion in self.__iter__():
-				if(fusion.annotated_genes_left == None):				# if object is not set, make it an empty list
-					fusion.annotated_genes_left = []
-				
-				for gene in gene_annotation.get_annotations(fusion.get_left_chromosome(),fusion.get_left_break_position()):
-					fusion.annotated_genes_left.append(gene)
-			
-			self.genes_spanning_left_junction = [gene_annotation]
+		self.annotate_junctions(gene_annotation,not self.genes_spanning_left_junction,False)
 	
 	def annotate_genes_right(self,gene_annotation):
-		if(not self.genes_spanning_right_junction):
+		self.annotate_junctions(gene_annotation,False,not self.genes_spanning_right_junction)
+	
+	def annotate_junctions(self,gene_annotation,left,right):
+		"""Annotates the left and/or right junctions in a single pass: the
+		breakpoints are sorted per chromosome and swept along the sorted
+		gene intervals (GeneAnnotation.get_annotations_sorted()).
+		"""
+		if(left):
+			self.logger.debug("Annotating genes on the left junction: "+self.name+" - "+gene_annotation.name)
+		if(right):
 			self.logger.debug("Annotating genes on the right junction: "+self.name+" - "+gene_annotation.name)
+		
+		if(left or right):
+			# Breakpoints per chromosome as (position, 2 * fusion id + 0 for left or 1 for right)
+			breakpoints = {}
+			fusion_id = 0
+			for fusion in self.fusions:
+				if(left):
+					if(not breakpoints.has_key(fusion.left_chr_str)):
+						breakpoints[fusion.left_chr_str] = []
+					breakpoints[fusion.left_chr_str].append((fusion.left_break_position,2 * fusion_id))
+				if(right):
+					if(not breakpoints.has_key(fusion.right_chr_str)):
+						breakpoints[fusion.right_chr_str] = []
+					breakpoints[fusion.right_chr_str].append((fusion.right_break_position,2 * fusion_id + 1))
+				fusion_id += 1
+			
+			annotations = [None] * (2 * len(self.fusions))
+			for chromosome, chromosome_breakpoints in breakpoints.items():
+				chromosome_breakpoints.sort()
+				
+				genes = gene_annotation.get_annotations_sorted(chromosome,[breakpoint[0] for breakpoint in chromosome_breakpoints])
+				for breakpoint in chromosome_breakpoints:
+					annotations[breakpoint[1]] = genes.next()
 			
-			for fusion in self:
-				if(fusion.annotated_genes_right == None):				# if object is not set, make it an empty list
-					fusion.annotated_genes_right = []
+			for fusion_id in range(len(self.fusions)):
+				fusion = self.fusions[fusion_id]
+				
+				if(left):
+					if(fusion.annotated_genes_left == None):				# if object is not set, make it an empty list
+						fusion.annotate_genes_left(annotations[2 * fusion_id])
+					else:
+						fusion.annotate_genes_left(fusion.annotated_genes_left + annotations[2 * fusion_id])
+				
+				if(right):
+					if(fusion.annotated_genes_right == None):
+						fusion.annotate_genes_right(annotations[2 * fusion_id + 1])
+					else:
+						fusion.annotate_genes_right(fusion.annotated_genes_right + annotations[2 * fusion_id + 1])
 				
-				for gene in gene_annotation.get_annotations(fusion.get_right_chromosome(),fusion.get_right_break_position()):
-					fusion.annotated_genes_right.append(gene)
+				self.fusions[fusion_id] = fusion# Stores the genes in case of FusionColumns
 			
-			self.genes_spanning_right_junction = [gene_annotation]
+			if(left):
+				self.genes_spanning_left_junction = [gene_annotation]
+			if(right):
+				self.genes_spanning_right_junction = [gene_annotation]
 	
 	def __iter__(self):
-		""" Return all fusions (non-indexed but sorted on chr,chr) as iterator
+		""" Return all fusions in the order of their ids as iterator
 		"""
-		for chromosome_left in self.index.items():
-			for chromosome_right in chromosome_left[1].items():
-				for fusion in chromosome_right[1]:
-					yield fusion
+		return iter(self.fusions)
 	
 	def __getitem__(self,i):
 		"""
-		This allows to acces fusions by their id.
+		This allows to acces fusions by their id, which is the position
+		in which they were added (and is only changed by
+		remove_duplicates()). Slices are allowed as well.
 		For:
 		fusions = FusionDetectionExperiment
 		
@@ -270,14 +296,7 @@ class FusionDetectionExperiment:
 		
 		fusion_4th = fusions[3]# Use 0 based counting
 		"""
-		j = 0
-		for fusion in self:
-			if(i == j):
-				return fusion
-			else:
-				j += 1
-		
-		return None
+		return self.fusions[i]
 	
 	def remove_duplicates(self,args):
 		"""
@@ -291,71 +310,38 @@ class FusionDetectionExperiment:
 			if(self.name.find("vs.") == -1):
 				self.logger.info("Duplication removal: "+self.name+" ("+str(old_count)+" fusions)")
 		
-		unique_fusions = []
-		
 		if(args.matching_method in ["overlap","subset","egm"]):
 			from CompareFusionsBySpanningGenes import CompareFusionsBySpanningGenes
 			overlap = CompareFusionsBySpanningGenes(False,False,args)
 		else:
 			raise Exception("Unknown overlap method for removing duplicates: '"+args.matching_method+"' for dataset "+self.name)
 		
-		stats_duplicates = 0
 		stats_non_gene_spanning = 0
 		
-		fusions_to_add = []
+		# The unique fusions keep their relative order, ids are renumbered
+		fusions_to_add = {}
 		
-		for chromosome_left in self.index.items():
-			for chromosome_right in chromosome_left[1].items():
-				
-				all_fusions = chromosome_right[1]
-				n = len(all_fusions)
-				
-				queue = range(n)
-				while(len(queue) > 0):
-					duplicates = []
-					for i in queue:
-						fusion_1 = all_fusions[i]
-						if(fusion_1):
-							is_duplicate = False
-							if(len(fusion_1.get_annotated_genes_left(False)) == 0 or len(fusion_1.get_annotated_genes_right(False)) == 0):
-								stats_non_gene_spanning += 1
-								all_fusions[i] = False
-							else:
-								for j in range(i+1,n):
-									fusion_2 = all_fusions[j]
-									if(fusion_2):
-										match = overlap.match_fusions(fusion_1,fusion_2,False)
-										
-										if(match):
-											merged_matches = fusion_1.matches | fusion_2.matches
-											
-											fusion_1.matches = merged_matches
-											fusion_1.acceptor_donor_direction = match.acceptor_donor_direction
-											fusion_1.left_strand = match.left_strand
-											fusion_1.right_strand = match.right_strand
-											fusion_1.annotated_genes_left  = match.annotated_genes_left
-											fusion_1.annotated_genes_right  = match.annotated_genes_right
-											
-											all_fusions[i] = fusion_1
-											all_fusions[j] = False
-											is_duplicate = True
-											
-											match.prepare_deletion()
-											del(match)
-								
-								if(is_duplicate):
-									duplicates.append(i)
-								else:
-									unique_fusions.append(fusion_1)
-					queue = duplicates
-				
-				for fusion in all_fusions:
-					if(fusion):
-						fusions_to_add.append(fusion)
+		for left_chr, right_chr in self.get_chromosome_pairs():
+			fusion_ids = self.get_fusion_ids(left_chr,right_chr)
+			all_fusions = [self.fusions[fusion_id] for fusion_id in fusion_ids]
+			
+			for i in range(len(all_fusions)):
+				if(len(all_fusions[i].get_annotated_genes_left(False)) == 0 or len(all_fusions[i].get_annotated_genes_right(False)) == 0):
+					stats_non_gene_spanning += 1
+					all_fusions[i] = False
+			
+			if(args.matching_method == "egm"):
+				self.merge_duplicates_egm(overlap,all_fusions)
+			else:
+				self.merge_duplicates(overlap,all_fusions)
+			
+			for i in range(len(all_fusions)):
+				if(all_fusions[i]):
+					fusions_to_add[fusion_ids[i]] = all_fusions[i]
 		
 		self.flush()
-		for fusion in fusions_to_add:
-			self.add_fusion(fusion)
+		for fusion_id in sorted(fusions_to_add.keys()):
+			self.add_fusion(fusions_to_add[fusion_id])
 		
 		if(self.name.find("vs.") == -1):
 			self.logger.debug("* Full: "+str(old_count))
@@ -364,13 +350,188 @@ class FusionDetectionExperiment:
 		
 		return len(self)
 	
+	def merge_duplicates(self,overlap,fusions):
+		"""Merges duplicates within a list of fusions, in place. Each
+		fusion absorbs the subsequent fusions that it matches, which may
+		shrink its gene sets (subset and overlap matching). This repeats
+		for the fusions that absorbed others, until none of them does.
+		
+		Only fusions sharing a gene on both junctions can match. Gene sets
+		only shrink, so the candidates found in the index beforehand are
+		a superset of those that can match, and they are visited in the
+		same order as a scan over all subsequent fusions would.
+		"""
+		fusion_index = FusionIndex()
+		positions = []# Position in fusions of each fusion in the index
+		for i in range(len(fusions)):
+			if(fusions[i]):
+				fusion_index.add_fusion(fusions[i])
+				positions.append(i)
+		
+		queue = range(len(fusion_index))
+		while(len(queue) > 0):
+			duplicates = []
+			for i in queue:
+				fusion_1 = fusions[positions[i]]
+				if(fusion_1):
+					is_duplicate = False
+					
+					candidates = fusion_index.find_matches(fusion_1)
+					for j in candidates[bisect.bisect_right(candidates,i):]:
+						if(fusions[positions[j]] and self.merge_duplicate(overlap,fusion_1,fusions[positions[j]])):
+							fusions[positions[j]] = False
+							is_duplicate = True
+					
+					if(is_duplicate):
+						duplicates.append(i)
+			queue = duplicates
+	
+	def merge_duplicates_egm(self,overlap,fusions):
+		"""Exact gene matching is an equivalence relation, so duplicates
+		are found in a single pass by hashing the gene sets (and the
+		strands and acceptor-donor direction, if these have to match).
+		"""
+		first_fusions = {}
+		for i in range(len(fusions)):
+			fusion = fusions[i]
+			if(fusion):
+				key = (fusion.get_gene_ids_left(),fusion.get_gene_ids_right())
+				if(overlap.args.strand_specific_matching):
+					key += (fusion.left_strand,fusion.right_strand)
+				if(overlap.args.acceptor_donor_order_specific_matching):
+					key += (fusion.acceptor_donor_direction,)
+				
+				if(not first_fusions.has_key(key)):
+					first_fusions[key] = fusion
+				elif(self.merge_duplicate(overlap,first_fusions[key],fusion)):
+					fusions[i] = False
+				else:
+					raise Exception("Fusions with identical gene sets do not match:\n\n"+first_fusions[key].__str__()+"\n"+fusion.__str__())
+	
+	def merge_duplicate(self,overlap,fusion_1,fusion_2):
+		"""Merges fusion_2 into fusion_1 if they match, in the same way as
+		CompareFusionsBySpanningGenes.match_fusions() would merge them,
+		but without allocating a new Fusion.
+		
+		@return: True if fusion_2 was merged into fusion_1
+		"""
+		matches = overlap.match_fusion_genes(fusion_1,fusion_2,False)
+		if(matches == None):
+			return False
+		
+		matches_left, matches_right = matches
+		
+		fusion_1.matches = fusion_1.matches | fusion_2.matches
+		fusion_1.dataset_mask |= fusion_2.dataset_mask
+		
+		# Directions and strands become unknown if they differ
+		if(fusion_1.acceptor_donor_direction != fusion_2.acceptor_donor_direction):
+			fusion_1.acceptor_donor_direction = None
+		if(fusion_1.left_strand != fusion_2.left_strand):
+			fusion_1.left_strand = None
+		if(fusion_1.right_strand != fusion_2.right_strand):
+			fusion_1.right_strand = None
+		
+		fusion_1.annotate_genes_left(list(set([gene for gene in fusion_1.annotated_genes_left + fusion_2.annotated_genes_left if gene.id in matches_left])))
+		fusion_1.annotate_genes_right(list(set([gene for gene in fusion_1.annotated_genes_right + fusion_2.annotated_genes_right if gene.id in matches_right])))
+		
+		return True
+	
 	def __len__(self):
-		return self.n
+		return len(self.fusions)
 	
 	def flush(self):
-		self.n = 0
-		
 		self.n_matches_exp_1 = None
 		self.n_matches_exp_2 = None
 		
+		# Table of the fusions; their position is their id
+		if(self.columnar_storage):
+			self.fusions = FusionColumns()
+		else:
+			self.fusions = []
+		
+		# Offset ranges [start,end) into self.fusions of each chromosome pair
 		self.index = {}
+
+
+
+def export_fusions_to_CG_Junctions_file(fusions,filename):
+	"""Writes fusions to a Complete Genomics junctions file while they
+	are being iterated, so fusions can be an experiment as well as a
+	generator such as FusionDetectionExperiment.iter_fusions().
+	"""
+	if(filename == "-"):
+		fh = sys.stdout
+	else:
+		fh = open(filename,"w")
+	
+	fh.write("#ASSEMBLY_ID	???\n")
+	fh.write("#SOFTWARE_VERSION	FuMa v"+fuma.__version__+"\n")
+	fh.write("#GENERATED_BY	FuMa\n")
+	fh.write("#GENERATED_AT	"+str(datetime.datetime.utcnow())+"\n")
+	fh.write("#FORMAT_VERSION	2\n")
+	fh.write("#GENOME_REFERENCE	???	build	??\n")
+	fh.write("#SAMPLE	???\n")
+	fh.write("#TYPE	JUNCTIONS\n")
+	fh.write("#DBSNP_BUILD	dbSNP	build	???\n")
+	fh.write("#GENE_ANNOTATIONS	???	build	???\n")
+	fh.write("\n")
+	fh.write(">Id	LeftChr	LeftPosition	LeftStrand	LeftLength	RightChr	RightPosition	RightStrand	RightLength	StrandConsistent	Interchromosomal	Distance	DiscordantMatePairAlignments	JunctionSequenceResolved	TransitionSequence	TransitionLength	LeftRepeatClassification	RightRepeatClassification	LeftGenes	RightGenes	XRef	DeletedTransposableElement	KnownUnderrepresentedRepeat	FrequencyInBaselineGenomeSet	AssembledSequence	EventId	Type	RelatedJunctions\n")
+	
+	fid = 1
+	
+	for fusion in fusions:
+		if(fusion != False):# Duplicates are flagged as False
+			fh.write(str(fid)+"	")
+			
+			fh.write(fusion.get_left_chromosome()+"	")
+			fh.write(str(fusion.get_left_break_position())+"	")
+			
+			if(fusion.left_strand == STRAND_FORWARD):
+				fh.write('+')
+			elif(fusion.left_strand == STRAND_REVERSE):
+				fh.write('-')
+
+			fh.write("	101	")
+			fh.write(fusion.get_right_chromosome()+"	")
+			fh.write(str(fusion.get_right_break_position())+"	")
+			
+			if(fusion.left_strand == STRAND_FORWARD):
+				fh.write('+')
+			elif(fusion.left_strand == STRAND_REVERSE):
+				fh.write('-')
+			
+			fh.write("	101	")
+			strand_consistent = (fusion.left_strand == fusion.right_strand)
+			interchromosomal = fusion.is_interchromosomal()#(fusion.get_left_chromosome() != fusion.get_right_chromosome())
+			distance = str(fusion.get_distance())
+			
+			if(strand_consistent):
+				fh.write("Y	")
+			else:
+				fh.write("N	")
+			
+			if(interchromosomal):
+				fh.write("Y	")
+			else:
+				fh.write("N	")
+			
+			if(distance != "-1"):
+				fh.write(distance)
+			fh.write("\t")
+			fh.write("20	Y	")
+			
+			# Sequences are not being stored as it consumes too much memory
+			fh.write("\t")
+			
+			fh.write("			")
+			
+			fh.write(":".join(fusion.get_annotated_genes_left(True).keys())+"	")
+			fh.write(":".join(fusion.get_annotated_genes_right(True).keys())+"	")
+			
+			fh.write("			1.0		"+str(fid)+"	complex	"+str(fusion.locations)+"\n")
+			
+			fid += 1
+	
+	if(filename != "-"):
+		fh.close()
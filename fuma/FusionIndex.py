@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+"""[License: GNU General Public License v3 (GPLv3)]
+ 
+ This file is part of FuMa.
+ 
+ FuMa is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+ 
+ FuMa is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+ Documentation as defined by:
+ <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
+"""
+
+import logging,bisect
+
+
+class FusionIndex:
+	"""Inverted index of (interned) gene ids to the fusions that carry
+	them on the left and on the right junction.
+	
+	All matching methods (overlap, subset and egm) require at least one
+	shared gene on the left and one on the right. Instead of comparing
+	all fusions with each other, only the pairs sharing a gene on both
+	sides have to be given to the match_fusions() functions.
+	"""
+	logger = logging.getLogger("FuMa::FusionIndex")
+	
+	def __init__(self):
+		self.fusions = []
+		
+		self.genes_left = []
+		self.genes_right = []
+		
+		self.index_left = {}
+		self.index_right = {}
+	
+	def __len__(self):
+		return len(self.fusions)
+	
+	def __getitem__(self,i):
+		return self.fusions[i]
+	
+	def add_fusion(self,fusion):
+		"""Adds a fusion to the index. Fusions without annotated genes are
+		stored as well, so that the ids stay in line with the order in
+		which they were added, but they will never be a candidate.
+		
+		@return: id of the fusion within the index
+		"""
+		i = len(self.fusions)
+		
+		if fusion.has_annotated_genes():
+			genes_left = fusion.get_gene_ids_left()
+			genes_right = fusion.get_gene_ids_right()
+		else:
+			genes_left = frozenset()
+			genes_right = frozenset()
+		
+		self.fusions.append(fusion)
+		self.genes_left.append(genes_left)
+		self.genes_right.append(genes_right)
+		
+		for gene_id in genes_left:
+			if not self.index_left.has_key(gene_id):
+				self.index_left[gene_id] = []
+			self.index_left[gene_id].append(i)
+		
+		for gene_id in genes_right:
+			if not self.index_right.has_key(gene_id):
+				self.index_right[gene_id] = []
+			self.index_right[gene_id].append(i)
+		
+		return i
+	
+	def find_candidates(self,genes_left,genes_right):
+		"""Finds all fusions sharing at least one gene on the left and at
+		least one gene on the right.
+		
+		@return: sorted list of ids
+		"""
+		candidates_left = set()
+		for gene_id in genes_left:
+			if self.index_left.has_key(gene_id):
+				candidates_left.update(self.index_left[gene_id])
+		
+		if len(candidates_left) == 0:
+			return []
+		
+		candidates_right = set()
+		for gene_id in genes_right:
+			if self.index_right.has_key(gene_id):
+				candidates_right.update(self.index_right[gene_id])
+		
+		return sorted(candidates_left & candidates_right)
+	
+	def find_matches(self,fusion):
+		"""Finds the candidates for a fusion that is not (necessarily)
+		part of the index.
+		"""
+		if not fusion.has_annotated_genes():
+			return []
+		
+		return self.find_candidates(fusion.get_gene_ids_left(), fusion.get_gene_ids_right())
+	
+	def find_pairs(self,start=0):
+		"""Yields all candidate pairs (y,x) within the index, with x < y
+		so that each pair is only visited once.
+		
+		@param start: only yield the pairs with y >= start, i.e. those of
+		the fusions that were added after the first start fusions
+		"""
+		for y in range(start,len(self.fusions)):
+			for x in self.find_candidates(self.genes_left[y],self.genes_right[y]):
+				if x < y:
+					yield y,x
+				else:
+					break
+	
+	def find_subset_pairs(self):
+		"""Finds the candidate pairs (y,x), with x < y, of which the gene
+		sets are on both junctions a subset of one another, as required
+		for subset matching.
+		
+		Fusions with identical gene sets are grouped and the distinct gene
+		sets are sorted on the size of their left set. A set can then only
+		be contained in a set that comes after it, and that contains its
+		rarest gene, so only those are verified.
+		
+		@return: sorted list of pairs (y,x)
+		"""
+		groups = {}
+		for i in range(len(self.fusions)):
+			if len(self.genes_left[i]) > 0 and len(self.genes_right[i]) > 0:
+				key = (self.genes_left[i],self.genes_right[i])
+				if not groups.has_key(key):
+					groups[key] = []
+				groups[key].append(i)
+		
+		keys = sorted(groups.keys(), key=lambda key: len(key[0]))
+		
+		# Inverted index of the left genes to the (sorted) positions in keys
+		index = {}
+		for k in range(len(keys)):
+			for gene_id in keys[k][0]:
+				if not index.has_key(gene_id):
+					index[gene_id] = []
+				index[gene_id].append(k)
+		
+		pairs = []
+		for k in range(len(keys)):
+			genes_left, genes_right = keys[k]
+			members = groups[keys[k]]
+			
+			for b in range(1,len(members)):
+				for a in range(b):
+					pairs.append((members[b],members[a]))
+			
+			rarest = min(genes_left, key=lambda gene_id: len(index[gene_id]))
+			candidates = index[rarest]
+			for l in candidates[bisect.bisect_right(candidates,k):]:
+				other_left, other_right = keys[l]
+				if genes_left.issubset(other_left) and (genes_right.issubset(other_right) or other_right.issubset(genes_right)):
+					for a in members:
+						for b in groups[keys[l]]:
+							pairs.append((max(a,b),min(a,b)))
+		
+		return sorted(pairs)
@@ -21,9 +21,30 @@
  <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
 """
 
-class Gene:
+gene_ids = {}
+
+def get_gene_id(name):
+	"""Interns a gene name to an integer, so that gene sets can be
+	compared as sets of integers rather than as sets of strings.
+	"""
+	if not gene_ids.has_key(name):
+		gene_ids[name] = len(gene_ids)
+	
+	return gene_ids[name]
+
+def reset_gene_ids():
+	"""Forgets all interned gene names, so that they do not accumulate
+	over the runs of a long-lived process. Gene objects created before,
+	e.g. by the GeneAnnotations of a previous run, become invalid.
+	"""
+	gene_ids.clear()
+
+class Gene(object):
+	__slots__ = ['name','id','is_long_gene']
+	
 	def __init__(self,name,is_long_gene):
 		self.name = name
+		self.id = get_gene_id(name)
 		self.is_long_gene = is_long_gene
 	
 	def __str__(self):
@@ -21,8 +21,20 @@
  <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
 """
 
-import HTSeq
-import logging
+import logging,heapq,operator
+
+import numpy
+
+# HTSeq is only required by the (default) "htseq" backend
+try:
+	import HTSeq
+except ImportError:
+	HTSeq = None
+
+from fuma.Gene import Gene
+from fuma.AnnotationCache import AnnotationCache
+from fuma.IntervalIndex import IntervalIndex
+from fuma.GeneTable import GeneTable
 
 class GeneAnnotation:
 	"""Gene annotation is a virtual reference genome. It's only being
@@ -30,26 +42,257 @@ class GeneAnnotation:
 	"""
 	logger = logging.getLogger("FuMa::GeneAnnotation")
 	
-	def __init__(self,name):
+	def __init__(self,name,backend="htseq"):
 		self.n = 0
 		self.name = name
-		self.gas = HTSeq.GenomicArrayOfSets("auto", stranded=False)
+		self.backend = backend
+		
+		if backend == "htseq":
+			if HTSeq == None:
+				raise Exception("HTSeq is not installed, use the numpy backend of the gene annotation instead")
+			
+			self.gas = HTSeq.GenomicArrayOfSets("auto", stranded=False)
+			self.interval_index = None
+		elif backend == "numpy":
+			# The intervals refer to the genes by their number in self.genes
+			self.gas = None
+			self.interval_index = IntervalIndex()
+		else:
+			raise Exception("Unknown gene annotation backend: "+str(backend))
+		
+		# Intervals (start, stop, gene) per chromosome, for get_annotations_sorted()
+		# using the htseq backend
+		self.intervals = {}
+		self.unsorted_chromosomes = set()
+		
+		# Registry of the genes: one Gene per name, numbered in the order in
+		# which they were added, which is shared by all its intervals
+		self.genes = GeneTable(self)
+		self.gene_numbers = {}
+		
+		# Chromosomes that are loaded upon their first query (see load_chromosome())
+		self.unloaded_chromosomes = set()
+		
+		# Checksum of the parsed file, if any (see enable_cache())
+		self.checksum = None
+		self.cache = None
 	
 	def add_annotation(self,gene,chromosome,start,stop):
 		#self.logger.debug("Adding annotation "+str(self.n)+": "+chromosome+":"+str(start)+"-"+str(stop)+" = "+str(gene))
-		self.gas[HTSeq.GenomicInterval(chromosome,start,stop)] += gene
+		if not self.gene_numbers.has_key(gene.name):
+			self.gene_numbers[gene.name] = len(self.genes)
+			self.genes.append(gene)
+		
+		self.add_gene_annotation(gene.name,gene.is_long_gene,chromosome,start,stop)
+	
+	def add_gene_annotation(self,name,is_long_gene,chromosome,start,stop):
+		"""Adds an interval of the gene with the given name, which is only
+		created for its first interval. A gene is a long gene if any of
+		its intervals is.
+		"""
+		if self.gene_numbers.has_key(name):
+			i = self.gene_numbers[name]
+			if is_long_gene:
+				self.genes[i].is_long_gene = True
+		else:
+			i = len(self.genes)
+			self.gene_numbers[name] = i
+			self.genes.append(Gene(name,is_long_gene))
+		
+		self.index_annotation(i,chromosome,start,stop)
 		self.n += 1
 	
+	def index_annotation(self,i,chromosome,start,stop):
+		"""Adds an interval of gene i, which is already in the registry
+		"""
+		if self.interval_index != None:
+			self.interval_index.add(chromosome,start,stop,i)
+		else:
+			gene = self.genes[i]
+			self.gas[HTSeq.GenomicInterval(chromosome,start,stop)] += gene
+			
+			if not self.intervals.has_key(chromosome):
+				self.intervals[chromosome] = []
+			self.intervals[chromosome].append((start,stop,gene))
+			self.unsorted_chromosomes.add(chromosome)
+	
+	def get_gene(self,i):
+		"""Creates gene i of an annotation of which the registry is not
+		loaded at once (see GeneTable).
+		"""
+		raise Exception("Gene "+str(i)+" of gene annotation '"+self.name+"' does not exist")
+	
+	def load_chromosome(self,chromosome):
+		"""Loads the genes of a chromosome in self.unloaded_chromosomes
+		"""
+		raise Exception("Chromosome "+str(chromosome)+" of gene annotation '"+self.name+"' can not be loaded")
+	
+	def enable_cache(self,size,directory=None):
+		"""Memoises the annotations of the last size positions that were
+		looked up. If a directory is given and the annotation was parsed
+		from a file, the cache of an earlier run with the same file is
+		loaded from it, and flush_cache() saves it there.
+		"""
+		self.cache = AnnotationCache(size,directory,self.checksum)
+		self.cache.load(self.genes)
+	
+	def flush_cache(self):
+		if self.cache != None:
+			self.logger.info("Annotation cache of '"+self.name+"': "+str(self.cache))
+			self.cache.save(self.genes)
+	
+	def find_annotations(self,chromosome,position):
+		if chromosome in self.unloaded_chromosomes:
+			self.load_chromosome(chromosome)
+		
+		if self.interval_index != None:
+			return [self.genes[i] for i in self.interval_index.find(chromosome,position)]
+		else:
+			return self.gas[HTSeq.GenomicPosition(chromosome,position)]
+	
 	def get_annotations(self,chromosome,position):
 		#unique_genes = list(reduce(lambda s1, s2: s1 | s2, [x[1] for x in r])) << weird list construction - only neccesairy using the steps() function
-		for annotation in self.gas[HTSeq.GenomicPosition(chromosome,position)]:
+		if self.cache == None:
+			annotations = self.find_annotations(chromosome,position)
+		else:
+			annotations = self.cache.get(chromosome,position)
+			if annotations == None:
+				annotations = list(self.find_annotations(chromosome,position))
+				self.cache.set(chromosome,position,annotations)
+		
+		for annotation in annotations:
 			yield annotation
 	
+	def get_annotations_sorted(self,chromosome,positions):
+		"""Sweep-line alternative to get_annotations() for many positions
+		on one chromosome. The positions are merged with the intervals
+		sorted on their start, while a heap keeps the intervals spanning
+		the current position, ordered on their end. The numpy backend
+		queries all positions at once instead.
+		
+		@param positions: ascending positions on chromosome
+		@return: generator of the list of genes spanning each position;
+		these lists may be shared and should not be modified
+		"""
+		if chromosome in self.unloaded_chromosomes:
+			self.load_chromosome(chromosome)
+		
+		if self.interval_index != None:
+			for genes in self.get_annotations_vectorised(chromosome,positions):
+				yield genes
+		elif not self.intervals.has_key(chromosome):
+			for position in positions:
+				yield []
+		else:
+			if chromosome in self.unsorted_chromosomes:
+				self.intervals[chromosome].sort(key=operator.itemgetter(0,1))
+				self.unsorted_chromosomes.remove(chromosome)
+			
+			intervals = self.intervals[chromosome]
+			
+			active = []# heap of (stop, index in intervals)
+			genes = []
+			i = 0
+			for position in positions:
+				if self.cache != None:
+					cached_genes = self.cache.get(chromosome,position)
+					if cached_genes != None:
+						yield cached_genes
+						continue
+				
+				changed = False
+				
+				while i < len(intervals) and intervals[i][0] <= position:
+					heapq.heappush(active,(intervals[i][1],i))
+					i += 1
+					changed = True
+				
+				while len(active) > 0 and active[0][0] <= position:
+					heapq.heappop(active)
+					changed = True
+				
+				# Consecutive positions within the same genes share the list,
+				# with each gene once, even if several of its intervals span it
+				if changed:
+					genes = []
+					for stop, j in active:
+						if intervals[j][2] not in genes:
+							genes.append(intervals[j][2])
+				
+				if self.cache != None:
+					self.cache.set(chromosome,position,genes)
+				
+				yield genes
+	
+	def get_annotations_vectorised(self,chromosome,positions):
+		"""Looks up all positions on chromosome that are not cached with
+		one query of the interval index (numpy backend only).
+		
+		@return: list of the list of genes spanning each position
+		"""
+		if self.cache == None:
+			return [[self.genes[j] for j in found] for found in self.interval_index.find_all(chromosome,positions)]
+		
+		annotations = [self.cache.get(chromosome,position) for position in positions]
+		uncached = [i for i in range(len(annotations)) if annotations[i] == None]
+		
+		if len(uncached) > 0:
+			for i, found in zip(uncached,self.interval_index.find_all(chromosome,[positions[i] for i in uncached])):
+				annotations[i] = [self.genes[j] for j in found]
+				self.cache.set(chromosome,positions[i],annotations[i])
+		
+		return annotations
+	
+	def get_annotations_batch(self,chromosome,positions):
+		"""Finds the genes spanning many positions on chromosome in one
+		call, in compressed sparse row format: the genes spanning
+		positions[i] are self.genes[j] for j in
+		numbers[offsets[i]:offsets[i+1]]. The numpy backend does not use
+		the annotation cache for this.
+		
+		@param positions: numpy array or list of positions, in any order
+		@return: tuple (offsets, numbers) of numpy arrays
+		"""
+		if chromosome in self.unloaded_chromosomes:
+			self.load_chromosome(chromosome)
+		
+		if self.interval_index != None:
+			return self.interval_index.find_batch(chromosome,positions)
+		
+		positions = numpy.asarray(positions, dtype=numpy.int64)
+		order = numpy.argsort(positions, kind="mergesort")
+		
+		gene_numbers = {}
+		for i, gene in self.genes.created():
+			gene_numbers[id(gene)] = i
+		
+		found = [None] * len(positions)
+		for i, genes in zip(order.tolist(), self.get_annotations_sorted(chromosome,positions[order].tolist())):
+			found[i] = [gene_numbers[id(gene)] for gene in genes]
+		
+		offsets = numpy.zeros(len(positions) + 1, dtype=numpy.int64)
+		offsets[1:] = numpy.cumsum([len(numbers) for numbers in found])
+		
+		return offsets, numpy.array([i for numbers in found for i in numbers], dtype=numpy.int64)
+	
+	def get_chromosome_genes(self):
+		"""
+		@return: generator of (chromosome, list of the genes annotated on it)
+		"""
+		for chromosome in sorted(self.unloaded_chromosomes):
+			self.load_chromosome(chromosome)
+		
+		if self.interval_index != None:
+			for chromosome_name in self.interval_index.get_chromosomes():
+				yield chromosome_name, [self.genes[i] for i in sorted(set(self.interval_index.get_items(chromosome_name)))]
+		else:
+			for chromosome_name,chromosome_obj in self.gas.chrom_vectors.items():
+				yield chromosome_name, list(reduce(lambda s1, s2: s1 | s2, [x[1] for x in self.gas[HTSeq.GenomicInterval(chromosome_name,0,chromosome_obj['.'].iv.end)].steps()]))
+	
 	def __str__(self):
 		out = "[ Gene annotation: "+str(self.name)+" (genes: "+str(len(self))+")]"
-		for chromosome_name,chromosome_obj in self.gas.chrom_vectors.items():
+		for chromosome_name, genes in self.get_chromosome_genes():
 			out += "Chromosome: "+str(chromosome_name)+"\n"
-			genes = list(reduce(lambda s1, s2: s1 | s2, [x[1] for x in self.gas[HTSeq.GenomicInterval(chromosome_name,0,chromosome_obj['.'].iv.end)].steps()]))
 			for gene in genes:
 				out += " - "+str(gene)+"\n"
 		
@@ -59,8 +302,8 @@ class GeneAnnotation:
 		return self.n
 	
 	def __iter__(self):
-		for chromosome_name,chromosome_obj in self.gas.chrom_vectors.items():
-			for gene in list(reduce(lambda s1, s2: s1 | s2, [x[1] for x in self.gas[HTSeq.GenomicInterval(chromosome_name,0,chromosome_obj['.'].iv.end)].steps()])):
+		for chromosome_name, genes in self.get_chromosome_genes():
+			for gene in genes:
 				yield gene
 	
 	def show_me(self):
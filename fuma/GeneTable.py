@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+
+"""[License: GNU General Public License v3 (GPLv3)]
+ 
+ This file is part of FuMa.
+ 
+ FuMa is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+ 
+ FuMa is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+ Documentation as defined by:
+ <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
+"""
+
+
+class GeneTable:
+	"""The (distinct) genes of a GeneAnnotation, numbered in the order in
+	which they were added. Annotations that are not loaded at once
+	(IndexedAnnotation, or ParseBED with lazy=True) reserve the numbers of
+	all their genes, and create a gene upon its first use with
+	annotation.get_gene().
+	"""
+	def __init__(self,annotation,n=0):
+		self.annotation = annotation
+		self.genes = [None] * n
+	
+	def __len__(self):
+		return len(self.genes)
+	
+	def __getitem__(self,i):
+		gene = self.genes[i]
+		if gene == None:
+			gene = self.annotation.get_gene(i)
+			self.genes[i] = gene
+		
+		return gene
+	
+	def __setitem__(self,i,gene):
+		self.genes[i] = gene
+	
+	def append(self,gene):
+		self.genes.append(gene)
+	
+	def created(self):
+		"""
+		@return: generator of (number, gene) of the genes that exist
+		"""
+		for i in range(len(self.genes)):
+			if self.genes[i] != None:
+				yield i, self.genes[i]
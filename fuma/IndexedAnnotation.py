@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+
+"""[License: GNU General Public License v3 (GPLv3)]
+ 
+ This file is part of FuMa.
+ 
+ FuMa is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+ 
+ FuMa is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+ Documentation as defined by:
+ <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
+"""
+
+import logging,mmap,struct,cPickle
+
+import numpy
+
+from Gene import Gene
+from GeneAnnotation import GeneAnnotation
+from GeneTable import GeneTable
+
+
+class IndexedAnnotation(GeneAnnotation):
+	"""Gene annotation opened from a binary index file, as written by
+	fuma-index-annotation, instead of parsing a BED file. The file is
+	memory-mapped, so that concurrent jobs share its pages and only the
+	genes that are actually annotated are created.
+	
+	Layout of the file:
+	 - magic (8 bytes) and the size of the header (uint64)
+	 - header: pickled dict with the checksum of the BED file, the
+	   number of intervals and the positions of the arrays below
+	 - per chromosome: starts, stops and max_stops (int64) and the
+	   numbers of the genes (int32), sorted on their start
+	 - per gene, numbered as in the registry of the annotation: the
+	   largest length of its intervals (int64) and the offsets of its
+	   name (int64) in a string table
+	"""
+	logger = logging.getLogger("FuMa::IndexedAnnotation")
+	
+	magic = "FUMAIDX\x01"
+	
+	def __init__(self,filename,name,long_gene_size):
+		GeneAnnotation.__init__(self,name,"numpy")
+		self.long_gene_size = long_gene_size
+		self.open(filename)
+	
+	@staticmethod
+	def is_index(filename):
+		with open(filename,"rb") as fh:
+			return fh.read(len(IndexedAnnotation.magic)) == IndexedAnnotation.magic
+	
+	def open(self,filename):
+		self.logger.info('Opening annotation index: '+str(filename))
+		
+		with open(filename,"rb") as fh:
+			self.mmap = mmap.mmap(fh.fileno(),0,access=mmap.ACCESS_READ)
+		
+		if self.mmap[0:len(self.magic)] != self.magic:
+			raise Exception("Not a FuMa annotation index: "+str(filename))
+		
+		offset = len(self.magic)
+		header_size = struct.unpack("<Q",self.mmap[offset:offset+8])[0]
+		header = cPickle.loads(self.mmap[offset+8:offset+8+header_size])
+		self.data_start = self.get_data_start(header_size)
+		
+		for chromosome, arrays in header["chromosomes"]:
+			self.interval_index.set_arrays(chromosome, *[self.get_array(array) for array in arrays])
+		
+		self.lengths = self.get_array(header["lengths"])
+		self.name_offsets = self.get_array(header["name_offsets"])
+		self.name_data = self.data_start + header["name_data"]
+		
+		self.n = header["n"]
+		self.genes = GeneTable(self,len(self.lengths))
+		self.checksum = header["checksum"]
+		
+		self.logger.debug('Size of Gene Annotation: '+str(len(self)))
+	
+	def get_array(self,array):
+		dtype, offset, count = array
+		return numpy.frombuffer(self.mmap,dtype=dtype,count=count,offset=self.data_start+offset)
+	
+	def get_gene(self,i):
+		"""Creates gene i, upon its first use (see GeneTable)
+		"""
+		name = self.mmap[self.name_data+self.name_offsets[i]:self.name_data+self.name_offsets[i+1]]
+		is_long_gene = (self.lengths[i] > self.long_gene_size) and (self.long_gene_size != 0)
+		
+		return Gene(name, bool(is_long_gene))
+	
+	@staticmethod
+	def write(gene_annotation,filename):
+		"""Writes a gene annotation using the numpy backend (e.g. a
+		parsed BED file) as index file.
+		"""
+		if gene_annotation.interval_index == None:
+			raise Exception("Only gene annotations using the numpy backend can be written as index")
+		
+		lengths = numpy.zeros(len(gene_annotation.genes),dtype=numpy.int64)
+		
+		blocks = []
+		def add_block(array):
+			blocks.append(array)
+			return array
+		
+		chromosomes = []
+		for chromosome in gene_annotation.interval_index.get_chromosomes():
+			starts, stops, max_stops, items = gene_annotation.interval_index.get_arrays(chromosome)
+			numpy.maximum.at(lengths, items, stops - starts)
+			
+			chromosomes.append((chromosome, [add_block(starts), add_block(stops), add_block(max_stops), add_block(items.astype(numpy.int32))]))
+		
+		names = [gene.name for gene in gene_annotation.genes]
+		name_offsets = numpy.zeros(len(names) + 1,dtype=numpy.int64)
+		name_offsets[1:] = numpy.cumsum([len(name) for name in names])
+		
+		add_block(lengths)
+		add_block(name_offsets)
+		
+		# Each array is referred to by (dtype, offset, count), with the
+		# offset relative to the data, that starts after the header at a
+		# multiple of 8 bytes
+		positions = {}
+		offset = 0
+		for block in blocks:
+			positions[id(block)] = (block.dtype.str, offset, len(block))
+			offset += block.nbytes + (-block.nbytes) % 8
+		
+		header = cPickle.dumps({
+			"checksum": gene_annotation.checksum,
+			"n": len(gene_annotation),
+			"chromosomes": [(chromosome, [positions[id(array)] for array in arrays]) for chromosome, arrays in chromosomes],
+			"lengths": positions[id(lengths)],
+			"name_offsets": positions[id(name_offsets)],
+			"name_data": offset},cPickle.HIGHEST_PROTOCOL)
+		
+		with open(filename,"wb") as fh:
+			fh.write(IndexedAnnotation.magic)
+			fh.write(struct.pack("<Q",len(header)))
+			fh.write(header)
+			fh.write("\0" * (IndexedAnnotation.get_data_start(len(header)) - fh.tell()))
+			
+			for block in blocks:
+				fh.write(block.tostring())
+				fh.write("\0" * ((-block.nbytes) % 8))
+			
+			fh.write("".join(names))
+	
+	@staticmethod
+	def get_data_start(header_size):
+		header_end = len(IndexedAnnotation.magic) + 8 + header_size
+		return header_end + (-header_end) % 8
+
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+
+"""[License: GNU General Public License v3 (GPLv3)]
+ 
+ This file is part of FuMa.
+ 
+ FuMa is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+ 
+ FuMa is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+ Documentation as defined by:
+ <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
+"""
+
+import logging,operator
+
+import numpy
+
+
+class IntervalIndex:
+	"""Static index of half-open intervals [start, stop) per chromosome,
+	stored in numpy arrays sorted on their start. Next to the stops, the
+	running maximum of the stops (max_stops) is kept, so that all
+	intervals before the first one with max_stops > position are known
+	to end before that position. Both ends of the range of candidate
+	intervals are thereby found with numpy.searchsorted().
+	
+	Intervals are collected in lists and the arrays of a chromosome are
+	built upon its first query. An item may have several intervals (e.g.
+	the transcripts of a gene), but is only found once per position.
+	"""
+	logger = logging.getLogger("FuMa::IntervalIndex")
+	
+	def __init__(self):
+		self.n = 0
+		
+		# Intervals (start, stop, item) per chromosome that are not yet in the arrays
+		self.unbuilt = {}
+		
+		# (starts, stops, max_stops, items) per chromosome
+		self.arrays = {}
+	
+	def __len__(self):
+		return self.n
+	
+	def add(self,chromosome,start,stop,item):
+		if start >= stop:
+			raise Exception("Invalid interval: "+str(chromosome)+":"+str(start)+"-"+str(stop))
+		
+		if not self.unbuilt.has_key(chromosome):
+			if self.arrays.has_key(chromosome):
+				# Adding to a chromosome that was already queried
+				starts, stops, max_stops, items = self.arrays.pop(chromosome)
+				self.unbuilt[chromosome] = zip(starts.tolist(), stops.tolist(), items.tolist())
+			else:
+				self.unbuilt[chromosome] = []
+		
+		self.unbuilt[chromosome].append((start,stop,item))
+		self.n += 1
+	
+	def build(self,chromosome):
+		intervals = self.unbuilt.pop(chromosome)
+		intervals.sort(key=operator.itemgetter(0,1))
+		
+		starts = numpy.array([interval[0] for interval in intervals], dtype=numpy.int64)
+		stops = numpy.array([interval[1] for interval in intervals], dtype=numpy.int64)
+		
+		items = numpy.array([interval[2] for interval in intervals])
+		
+		self.set_arrays(chromosome, starts, stops, numpy.maximum.accumulate(stops), items)
+	
+	def set_arrays(self,chromosome,starts,stops,max_stops,items):
+		"""Sets the (already built) arrays of a chromosome, for instance
+		those of a memory-mapped file (see IndexedAnnotation).
+		"""
+		self.arrays[chromosome] = (starts, stops, max_stops, items)
+	
+	def get_arrays(self,chromosome):
+		if self.unbuilt.has_key(chromosome):
+			self.build(chromosome)
+		
+		if self.arrays.has_key(chromosome):
+			return self.arrays[chromosome]
+		else:
+			return None
+	
+	def get_chromosomes(self):
+		return sorted(set(self.arrays.keys()) | set(self.unbuilt.keys()))
+	
+	def get_items(self,chromosome):
+		"""
+		@return: list of all items on chromosome, sorted on their start
+		"""
+		arrays = self.get_arrays(chromosome)
+		if arrays == None:
+			return []
+		else:
+			return arrays[3].tolist()
+	
+	def find(self,chromosome,position):
+		"""
+		@return: list of the items of which the interval spans position
+		"""
+		arrays = self.get_arrays(chromosome)
+		if arrays == None:
+			return []
+		
+		starts, stops, max_stops, items = arrays
+		
+		first = numpy.searchsorted(max_stops, position, side="right")
+		last = numpy.searchsorted(starts, position, side="right")
+		if first >= last:
+			return []
+		
+		found = []
+		for item in items[first:last][stops[first:last] > position].tolist():
+			if item not in found:
+				found.append(item)
+		
+		return found
+	
+	def find_batch(self,chromosome,positions):
+		"""Vectorised find() of many positions on one chromosome, in
+		compressed sparse row format: the items spanning positions[i] are
+		items[offsets[i]:offsets[i+1]].
+		
+		@return: tuple (offsets, items) of numpy arrays
+		"""
+		positions = numpy.asarray(positions, dtype=numpy.int64)
+		
+		arrays = self.get_arrays(chromosome)
+		if arrays == None:
+			return numpy.zeros(len(positions) + 1, dtype=numpy.int64), numpy.zeros(0, dtype=numpy.int64)
+		
+		starts, stops, max_stops, items = arrays
+		
+		firsts = numpy.searchsorted(max_stops, positions, side="right")
+		lasts = numpy.searchsorted(starts, positions, side="right")
+		lengths = numpy.maximum(lasts - firsts, 0)
+		
+		# The candidate ranges [first, last) of all positions, concatenated
+		candidate_positions = numpy.repeat(numpy.arange(len(positions)), lengths)
+		candidates = numpy.arange(lengths.sum()) + numpy.repeat(firsts - (numpy.cumsum(lengths) - lengths), lengths)
+		
+		spanning = stops[candidates] > positions[candidate_positions]
+		found_positions = candidate_positions[spanning]
+		found = items[candidates[spanning]]
+		
+		# Only the first of the overlapping intervals of an item is kept;
+		# the sort is stable, so duplicates follow their first occurrence
+		order = numpy.lexsort((found, found_positions))
+		unique = numpy.ones(len(found), dtype=bool)
+		unique[order[1:]] = (found_positions[order[1:]] != found_positions[order[:-1]]) | (found[order[1:]] != found[order[:-1]])
+		
+		offsets = numpy.zeros(len(positions) + 1, dtype=numpy.int64)
+		offsets[1:] = numpy.cumsum(numpy.bincount(found_positions[unique], minlength=len(positions)))
+		
+		return offsets, found[unique]
+	
+	def find_all(self,chromosome,positions):
+		"""
+		@return: list with the list of spanning items per position
+		"""
+		offsets, items = self.find_batch(chromosome,positions)
+		
+		offsets = offsets.tolist()
+		items = items.tolist()
+		
+		return [items[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+
+"""[License: GNU General Public License v3 (GPLv3)]
+ 
+ This file is part of FuMa.
+ 
+ FuMa is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+ 
+ FuMa is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+ Documentation as defined by:
+ <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
+"""
+
+import logging
+
+
+class MatchGraph:
+	"""Sparse undirected graph in which the nodes are fusions (referred to
+	by an integer, e.g. their position in ComparisonTriangle) and the
+	edges are pairwise matches between them.
+	
+	With overlap matching, the merged fusions are the maximal cliques of
+	this graph of which the fusions still share a gene as a whole.
+	"""
+	logger = logging.getLogger("FuMa::MatchGraph")
+	
+	def __init__(self):
+		self.adjacency = {}
+	
+	def __len__(self):
+		return len(self.adjacency)
+	
+	def add_edge(self,i,j):
+		if i == j:
+			raise Exception("A fusion can not match with itself: "+str(i))
+		
+		if not self.adjacency.has_key(i):
+			self.adjacency[i] = set()
+		if not self.adjacency.has_key(j):
+			self.adjacency[j] = set()
+		
+		self.adjacency[i].add(j)
+		self.adjacency[j].add(i)
+	
+	def num_edges(self):
+		n = 0
+		for node in self.adjacency.values():
+			n += len(node)
+		return n / 2
+	
+	def find_maximal_consistent_cliques(self,extend):
+		"""Bron-Kerbosch for cliques that also have to be consistent as a
+		whole, for instance because their gene sets need to share a
+		gene. This has to be hereditary: each subset of a consistent
+		clique must be consistent as well. Pivoting can not be used,
+		because a pivot may be inconsistent with the current clique.
+		Only nodes having at least one edge are part of the graph, so
+		all cliques have a size >= 2.
+		
+		@param extend: function (state, node) returning the state of the
+		clique extended with node, or None if that is inconsistent. The
+		state of the empty clique is None.
+		
+		@return: generator of sorted lists of nodes
+		"""
+		return self.bron_kerbosch_consistent(set(), None, set(self.adjacency.keys()), set(), extend)
+	
+	def bron_kerbosch_consistent(self,r,state,p,x,extend):
+		if len(p) == 0 and len(x) == 0:
+			if len(r) > 1:
+				yield sorted(r)
+		else:
+			for node in sorted(p):
+				state_node = extend(state, node)
+				neighbours = self.adjacency[node]
+				
+				p_node = set([candidate for candidate in (p & neighbours) if extend(state_node, candidate) != None])
+				x_node = set([candidate for candidate in (x & neighbours) if extend(state_node, candidate) != None])
+				
+				for clique in self.bron_kerbosch_consistent(r | set([node]), state_node, p_node, x_node, extend):
+					yield clique
+				
+				p.remove(node)
+				x.add(node)
+	
+	def find_maximal_cliques_containing(self,nodes,extend):
+		"""Finds the maximal cliques that contain at least one of nodes,
+		e.g. the fusions added since the previous run. All other maximal
+		cliques did already exist before these nodes were added.
+		
+		Each clique is found from its smallest node in nodes; the nodes
+		before it are excluded, so that every clique is found only once.
+		
+		@param extend: as in find_maximal_consistent_cliques()
+		
+		@return: generator of sorted lists of nodes
+		"""
+		excluded = set()
+		for node in sorted(nodes):
+			if self.adjacency.has_key(node):
+				neighbours = self.adjacency[node]
+				
+				state = extend(None, node)
+				p = set([candidate for candidate in (neighbours - excluded) if extend(state, candidate) != None])
+				x = set([candidate for candidate in (neighbours & excluded) if extend(state, candidate) != None])
+				
+				for clique in self.bron_kerbosch_consistent(set([node]), state, p, x, extend):
+					yield clique
+			
+			excluded.add(node)
+	
+	def is_maximal(self,clique,extend):
+		"""Checks whether a clique can not be extended with any other
+		node that is consistent with it
+		"""
+		candidates = set(self.adjacency[clique[0]])
+		for node in clique[1:]:
+			candidates &= self.adjacency[node]
+		
+		if len(candidates) > 0:
+			state = None
+			for node in clique:
+				state = extend(state, node)
+			
+			candidates = [candidate for candidate in candidates if extend(state, candidate) != None]
+		
+		return len(candidates) == 0
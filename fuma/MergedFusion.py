@@ -32,18 +32,32 @@ from fuma.Fusion import STRAND_FORWARD
 from fuma.Fusion import STRAND_REVERSE
 
 
-class MergedFusion:
+class MergedFusion(object):
+	__slots__ = ['fusions','dataset_mask','annotated_genes_left','annotated_genes_right','gene_ids_left','gene_ids_right']
+	
 	logger = logging.getLogger("FuMa::MergedFusion")
 	
 	def __init__(self):
 		self.fusions = set()
+		self.dataset_mask = 0
+		
+		self.annotated_genes_left = None
+		self.annotated_genes_right = None
 		
-		annotated_genes_left = None
-		annotated_genes_right = None
+		self.gene_ids_left = frozenset()
+		self.gene_ids_right = frozenset()
 	
 	def __len__(self):
 		return len(self.fusions)
 	
+	def get_key(self):
+		"""Two MergedFusion instances containing the same Fusion objects
+		are duplicates, regardless of the order in which they were added.
+		
+		@return: frozenset of the ids of the fusions
+		"""
+		return frozenset([id(fusion) for fusion in self.fusions])
+	
 	def add_fusion(self,arg_fusion):
 		if not isinstance(arg_fusion, Fusion):
 			raise Exception("MergedFusion objects can only be expanded with Fusion objects and not with: "+arg_fusion.__class__.__name__)
@@ -54,6 +68,8 @@ class MergedFusion:
 			if new_len == len_a:
 				raise Exception("MergedFusion is updated with one that it already contains")
 			
+			self.dataset_mask |= arg_fusion.dataset_mask
+			
 			#if new_len == 2:
 			#	self.logger.debug("Merged fusion genes")
 			#elif new_len > 2:
@@ -106,11 +122,11 @@ class MergedFusion:
 		else:
 			return strands[0]
 	
-	def acceptor_donor_direction(self):
+	def get_acceptor_donor_direction(self):
 		directions = []
 		
 		for fusion in self.fusions:
-			directions.append(fusion.acceptor_donor_direction())
+			directions.append(fusion.get_acceptor_donor_direction())
 		
 		directions = list(set(directions))
 		
@@ -130,6 +146,20 @@ class MergedFusion:
 		
 		return False
 	
+	def annotate_genes_left(self,genes):
+		self.annotated_genes_left = genes
+		self.gene_ids_left = frozenset([gene.id for gene in genes])
+	
+	def annotate_genes_right(self,genes):
+		self.annotated_genes_right = genes
+		self.gene_ids_right = frozenset([gene.id for gene in genes])
+	
+	def get_gene_ids_left(self):
+		return self.gene_ids_left
+	
+	def get_gene_ids_right(self):
+		return self.gene_ids_right
+	
 	def get_annotated_genes_left2(self):
 		if(not self.has_annotated_genes()):
 			raise Exception("Requested empty gene list")
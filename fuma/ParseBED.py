@@ -34,31 +34,169 @@ chr1	8335050	8406334	NM_001042682	0	-	8337733	8346780	0	13	2717,181,147,721,223,
 
 import logging
 import sys
+import os
+import hashlib
+import cPickle
 
 from Gene import Gene
 from GeneAnnotation import GeneAnnotation
-
-import HTSeq
+from GeneTable import GeneTable
 
 class ParseBED(GeneAnnotation):
 	logger = logging.getLogger("FuMa::ParseBED")
 	
-	def __init__(self,filename,name,long_gene_size):
-		GeneAnnotation.__init__(self,name)
+	block_index_version = 1
+	
+	def __init__(self,filename,name,long_gene_size,backend="htseq",lazy=False):
+		GeneAnnotation.__init__(self,name,backend)
 		self.long_gene_size = long_gene_size
-		self.parse(filename)
+		
+		if lazy:
+			self.open_lazy(filename)
+		else:
+			self.parse(filename)
 	
 	def parse(self,filename):
 		self.logger.info('Parsing BED file: '+str(filename))
 		
+		checksum = hashlib.md5()
 		with open(filename,"r") as fh:
 			for line in fh:
+				checksum.update(line)
+				
 				line = line.strip()
 				if(len(line) > 0):
-					self.parse_line(line)
+					annotation = self.parse_line(line)
+					if annotation != None:
+						name, chromosome, start, stop = annotation
+						self.add_gene_annotation(name, self.is_long_gene(abs(stop - start)), chromosome, start, stop)
+		
+		self.checksum = checksum.hexdigest()
 		
 		self.logger.debug('Size of Gene Annotation: '+str(len(self)))
 	
+	def is_long_gene(self,length):
+		return (length > self.long_gene_size) and (self.long_gene_size != 0)
+	
+	def open_lazy(self,filename):
+		"""Only reads the block index of the file, and parses each
+		chromosome upon its first query (see load_chromosome()).
+		"""
+		self.logger.info('Opening BED file: '+str(filename))
+		
+		self.filename = filename
+		block_index = self.get_block_index(filename)
+		
+		self.blocks = block_index["blocks"]
+		self.unloaded_chromosomes = set(self.blocks.keys())
+		
+		# The registry of the genes is known in advance
+		self.gene_names = block_index["names"]
+		self.gene_spans = block_index["spans"]
+		self.gene_numbers = dict([(self.gene_names[i], i) for i in range(len(self.gene_names))])
+		self.genes = GeneTable(self,len(self.gene_names))
+		
+		self.n = block_index["n"]
+		self.checksum = block_index["checksum"]
+		
+		self.logger.debug('Size of Gene Annotation: '+str(len(self)))
+	
+	def get_block_index(self,filename):
+		"""The block index, stored next to the BED file, keeps per
+		chromosome the blocks of consecutive lines of that chromosome as
+		(offset, size). In a BED file sorted on chromosome every
+		chromosome is a single block. It also keeps the names of the
+		genes, in order of their first line, with the largest length of
+		their intervals. The index is rebuilt if the size or modification
+		time of the file changed.
+		"""
+		index_filename = filename+".fuma-block-index"
+		stat = os.stat(filename)
+		
+		if os.path.isfile(index_filename):
+			with open(index_filename,"rb") as fh:
+				block_index = cPickle.load(fh)
+			
+			if block_index.get("version") == self.block_index_version and block_index["size"] == stat.st_size and block_index["mtime"] == stat.st_mtime:
+				return block_index
+		
+		self.logger.info('Building block index: '+str(index_filename))
+		
+		checksum = hashlib.md5()
+		blocks = {}
+		n = 0
+		names = []
+		spans = []
+		gene_numbers = {}
+		offset = 0
+		block = None
+		with open(filename,"rb") as fh:
+			for line in fh:
+				checksum.update(line)
+				
+				# The same lines as parse_line() accepts
+				columns = line.strip().split("\t",4)
+				if len(columns) >= 4:
+					chromosome = self.cleanup_chr_name(columns[0])
+					
+					if block == None or block[0] != chromosome:
+						block = [chromosome,offset,0]
+						if not blocks.has_key(chromosome):
+							blocks[chromosome] = []
+						blocks[chromosome].append(block)
+					
+					span = abs(int(columns[2]) - int(columns[1]))
+					if gene_numbers.has_key(columns[3]):
+						i = gene_numbers[columns[3]]
+						spans[i] = max(spans[i],span)
+					else:
+						gene_numbers[columns[3]] = len(names)
+						names.append(columns[3])
+						spans.append(span)
+					
+					n += 1
+				
+				offset += len(line)
+				if block != None:
+					block[2] = offset - block[1]
+		
+		block_index = {
+			"version": self.block_index_version,
+			"size": stat.st_size,
+			"mtime": stat.st_mtime,
+			"checksum": checksum.hexdigest(),
+			"n": n,
+			"names": names,
+			"spans": spans,
+			"blocks": dict([(chromosome, [(block[1],block[2]) for block in blocks[chromosome]]) for chromosome in blocks.keys()])}
+		
+		try:
+			with open(index_filename,"wb") as fh:
+				cPickle.dump(block_index,fh,cPickle.HIGHEST_PROTOCOL)
+		except IOError:
+			self.logger.warning("Could not store the block index: "+str(index_filename))
+		
+		return block_index
+	
+	def load_chromosome(self,chromosome):
+		self.logger.debug('Loading chromosome '+str(chromosome)+' of: '+str(self.filename))
+		
+		self.unloaded_chromosomes.remove(chromosome)
+		
+		with open(self.filename,"r") as fh:
+			for offset, size in self.blocks[chromosome]:
+				fh.seek(offset)
+				for line in fh.read(size).split("\n"):
+					line = line.strip()
+					if(len(line) > 0):
+						annotation = self.parse_line(line)
+						if annotation != None:
+							name, chromosome, start, stop = annotation
+							self.index_annotation(self.gene_numbers[name], chromosome, start, stop)
+	
+	def get_gene(self,i):
+		return Gene(self.gene_names[i], self.is_long_gene(self.gene_spans[i]))
+	
 	def cleanup_chr_name(self,chr_name):
 		"""Given the large number of fusion genes, we remove all 'chr'
 		prefixes because they add 6 bytes per fusion gene. They can be
@@ -69,14 +207,15 @@ class ParseBED(GeneAnnotation):
 		return chr_name[3:] if chr_name[0:3] == "chr" else chr_name
 	
 	def parse_line(self,line):
+		"""
+		@return: (gene name, chromosome, start, stop), or None if the
+		line is not an annotation
+		"""
 		line = line.split("\t")
 		if(len(line) >= 4):
-			
-			start = int(line[1])
-			stop = int(line[2])
-			length = abs(stop - start)
-			is_long_gene = (length > self.long_gene_size) and (self.long_gene_size != 0)
-			self.add_annotation(Gene(line[3], is_long_gene), self.cleanup_chr_name(line[0]), start, stop )
+			return (line[3], self.cleanup_chr_name(line[0]), int(line[1]), int(line[2]))
+		else:
+			return None
 		
 		#@ deprecated - exon-type BED files
 		#self.index[line[3]].append([line[0],int(line[1]),int(line[2])])
@@ -26,12 +26,38 @@ import re
 
 from Fusion import Fusion
 from FusionDetectionExperiment import FusionDetectionExperiment
+from FusionDetectionExperiment import export_fusions_to_CG_Junctions_file
+
+
+def find_columns(header,names):
+	"""
+	@return: list with the position of each of names in header, or None
+	if any of them is not a column
+	"""
+	try:
+		return [header.index(name) for name in names]
+	except ValueError:
+		return None
+
+def get_support(line,columns):
+	"""Sums the read counts in columns of a line, e.g. the split and the
+	spanning reads of a fusion.
+	
+	@return: number of supporting reads, or None if they are not given
+	"""
+	if columns == None:
+		return None
+	
+	try:
+		return sum([int(line[column]) for column in columns])
+	except (ValueError, IndexError):
+		return None
 
 class ReadCGhighConfidenceJunctionsBeta(FusionDetectionExperiment):
 	logger = logging.getLogger("FuMa::Readers::ReadCGhighConfidenceJunctionsBeta")
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
 		
@@ -41,7 +67,8 @@ class ReadCGhighConfidenceJunctionsBeta(FusionDetectionExperiment):
 		self.parse_left_pos_column = -1
 		self.parse_right_pos_column = -1
 		
-		self.parse()
+		if(parse):
+			self.parse()
 	
 	def parse_line(self,line):
 		line = line.strip()
@@ -51,7 +78,7 @@ class ReadCGhighConfidenceJunctionsBeta(FusionDetectionExperiment):
 				if(line[0] == ">"):
 					self.parse_line__header(line)
 				else:
-					self.parse_line__fusion(line)
+					return self.parse_line__fusion(line)
 	
 	def parse_line__header(self,line):
 		line = line[1:]
@@ -84,31 +111,28 @@ class ReadCGhighConfidenceJunctionsBeta(FusionDetectionExperiment):
 			left_strand = None
 			right_strand = None
 		
-		f = Fusion(left_chr, right_chr, left_pos, right_pos, left_strand, right_strand, self.name,line[self.parse_id],True)
-		
-		self.add_fusion(f)
+		return Fusion(left_chr, right_chr, left_pos, right_pos, left_strand, right_strand, self.name,line[self.parse_id],True)
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
-		
+	def iter_fusions(self):
 		with open(self.filename,"r") as fh:
 			for line in fh:
-				self.parse_line(line)
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
+				f = self.parse_line(line)
+				if(f != None):
+					yield f
 
 
 
 class ReadIlluminaHiSeqVCF(FusionDetectionExperiment):
 	logger = logging.getLogger("FuMa::Readers::ReadCGhighConfidenceJunctionsBeta")
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.breaks = {}
 		
 		self.filename = arg_filename
-		self.parse()
+		if(parse):
+			self.parse()
 	
 	def parse_line(self,line):
 		line = line.strip()
@@ -120,14 +144,16 @@ class ReadIlluminaHiSeqVCF(FusionDetectionExperiment):
 				if(sv_type == "DEL"):
 					end = line[7].split("END=",1)[1].split(";",1)[0]
 					
-					f = Fusion(line[0],line[0],line[1],end,None,None,self.name,line[2],True)
-					self.add_fusion(f)
+					return Fusion(line[0],line[0],line[1],end,None,None,self.name,line[2],True)
 					
 				elif(sv_type == "BND"):
 					mate = line[7].split("MATEID=",1)[1].split(";",1)[0]
 					self.breaks[line[2]] = {'line':line,'mate':mate}
 	
 	def process_mates(self):
+		"""
+		@return: generator of the fusions of the pairs of mates in self.breaks
+		"""
 		while(len(self.breaks) > 0):
 			item_1 = self.breaks.keys()[0]
 			item_2 = self.breaks[item_1]["mate"]
@@ -138,28 +164,31 @@ class ReadIlluminaHiSeqVCF(FusionDetectionExperiment):
 				
 				f = Fusion(line_1[0],line_2[0],line_1[1],line_2[1],None,None,self.name,line_1[2],True)
 				
-				self.add_fusion(f)
-				
 				del(self.breaks[item_2])
 				
 				f.show_me()
+				
+				yield f
 			else:
 				self.logger.error("Inappropriate file - missing link to: "+item_2)
 			
 			del(self.breaks[item_1])
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
-		
+	def iter_fusions(self):
+		"""The breakends (BND) are only paired with their mates after the
+		whole file has been read, so these fusions come last.
+		"""
 		self.i = 0
+		self.breaks = {}
 		with open(self.filename,"r") as fh:
 			for line in fh:
 				self.i += 1
-				self.parse_line(line)
+				f = self.parse_line(line)
+				if(f != None):
+					yield f
 		
-		self.process_mates()
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
+		for f in self.process_mates():
+			yield f
 
 
 
@@ -169,11 +198,12 @@ class ReadTophatFusionPre(FusionDetectionExperiment):
 	
 	logger = logging.getLogger("FuMa::Readers::ReadTophatFusionPre")
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
-		self.parse()
+		if(parse):
+			self.parse()
 	
 	def parse_line(self,line):
 		line = line.strip()
@@ -186,19 +216,16 @@ class ReadTophatFusionPre(FusionDetectionExperiment):
 			
 			chromosomes = line[0][0].split("-")
 			
-			f = Fusion(chromosomes[0],chromosomes[1],line[0][1],line[0][2],line[0][3][0],line[0][3][1],self.name,str(self.i),True)
-			self.add_fusion(f)
+			return Fusion(chromosomes[0],chromosomes[1],line[0][1],line[0][2],line[0][3][0],line[0][3][1],self.name,str(self.i),True)
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
-		
+	def iter_fusions(self):
 		self.i = 0
 		with open(self.filename,"r") as fh:
 			for line in fh:
 				self.i += 1
-				self.parse_line(line)
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
+				f = self.parse_line(line)
+				if(f != None):
+					yield f
 
 
 
@@ -208,12 +235,13 @@ class ReadTophatFusionPostPotentialFusion(FusionDetectionExperiment):
 	
 	logger = logging.getLogger("FuMa::Readers::ReadTophatFusionPostPotentialFusion")
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
 		
-		self.parse()
+		if(parse):
+			self.parse()
 	
 	def reset(self):
 		self.chr_1 = False
@@ -237,9 +265,7 @@ class ReadTophatFusionPostPotentialFusion(FusionDetectionExperiment):
 		self.left_strand = line[4][0]
 		self.right_strand = line[4][1]
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
-		
+	def iter_fusions(self):
 		self.reset()
 		
 		with open(self.filename,"r") as fh:
@@ -251,12 +277,9 @@ class ReadTophatFusionPostPotentialFusion(FusionDetectionExperiment):
 					self.parse_line_type_0(line)
 					j += 1
 					
-					f = Fusion(self.chr_1,self.chr_2,self.break_1,self.break_2,self.left_strand,self.right_strand,self.name,str(j),True)
-					self.add_fusion(f)
+					yield Fusion(self.chr_1,self.chr_2,self.break_1,self.break_2,self.left_strand,self.right_strand,self.name,str(j),True)
 				
 				i += 1
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
 
 
 
@@ -272,24 +295,22 @@ class ReadTophatFusionPostResult(FusionDetectionExperiment):
 	break_left = 3
 	break_right = 6
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
-		
-		self.i = 0
+	def __init__(self,arg_filename,name,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
-		self.parse()
+		if(parse):
+			self.parse()
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
-		
+	def iter_fusions(self):
+		self.i = 0
 		self.parse_header = True
 		
 		with open(self.filename,"r") as fh:
 			for line in fh:
-				self.parse_line(line)
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
+				f = self.parse_line(line)
+				if(f != None):
+					yield f
 	
 	def parse_line(self,line):
 		line_stripped = line.strip()
@@ -297,9 +318,10 @@ class ReadTophatFusionPostResult(FusionDetectionExperiment):
 			line = line.split("\t")
 			
 			f = Fusion(line[self.parse_left_chr_column],line[self.parse_right_chr_column],line[self.break_left],line[self.break_right],None,None,self.name,str(self.i),True)
-			self.add_fusion(f)
 			
 			self.i += 1
+			
+			return f
 
 
 
@@ -337,34 +359,34 @@ class ReadTophatFusionPostResultHtml(FusionDetectionExperiment):
 	td_match = ".*?<TD [^>]+>([^<]+)</TD>"
 	table_block_match = re.compile('href="#fusion_([^"]+)">'+td_match+td_match+td_match+td_match+td_match+td_match,re.S)
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
-		self.parse()
+		if(parse):
+			self.parse()
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
-		
+	def iter_fusions(self):
+		"""The regexes span multiple lines, so the file is read at once
+		"""
 		fh = open(self.filename,"r")
 		content = fh.read()
 		fh.close()
 		
-		self.parse_ppp_blocks(content)
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
+		for f in self.parse_ppp_blocks(content):
+			yield f
 	
 	def parse_ppp_blocks(self,content):
 		for match in re.finditer(self.ppp_block_match,content):
 			match = match.groups()
-			self.parse_table_blocks(match[0],match[1],match[2])
+			for f in self.parse_table_blocks(match[0],match[1],match[2]):
+				yield f
 	
 	def parse_table_blocks(self,strand1,strand2,ppp_block):
 		for match in re.finditer(self.table_block_match,ppp_block):
 			match = match.groups()
 			
-			f = Fusion(match[2],match[5],match[3],match[6],strand1,strand2,self.name,match[0],True)
-			self.add_fusion(f)
+			yield Fusion(match[2],match[5],match[3],match[6],strand1,strand2,self.name,match[0],True)
 
 
 
@@ -375,17 +397,20 @@ class ReadDefuse(FusionDetectionExperiment):
 	
 	logger = logging.getLogger("FuMa::Readers::ReadDefuse")
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,min_reads=0,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
-		self.parse()
+		self.min_reads = min_reads
+		
+		if(parse):
+			self.parse()
 	
 	def parse_line(self,line):
 		if(self.parse_header):
 			self.parse_line__header(line)
 		else:
-			self.parse_line__fusion(line)
+			return self.parse_line__fusion(line)
 	
 	def parse_line__header(self,line):
 		line = line.strip().split("\t")
@@ -401,11 +426,18 @@ class ReadDefuse(FusionDetectionExperiment):
 		
 		self.parse_id = line.index("cluster_id")
 		
+		self.parse_support_columns = find_columns(line,["splitr_count","span_count"])
+		self.check_support_columns(self.parse_support_columns)
+		
 		self.parse_header = False
 	
 	def parse_line__fusion(self,line):
 		line = line.strip().split("\t")
 		
+		support = get_support(line,self.parse_support_columns)
+		if(not self.is_supported(support)):
+			return None
+		
 		left_pos = int(line[self.parse_left_pos_column])
 		right_pos = int(line[self.parse_right_pos_column])
 		
@@ -420,32 +452,33 @@ class ReadDefuse(FusionDetectionExperiment):
 			line[self.parse_id], \
 			True
 		)
+		f.support = support
 		
-		self.add_fusion(f)
+		return f
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
-		
+	def iter_fusions(self):
 		self.parse_header = True
 		
 		with open(self.filename,"r") as fh:
 			for line in fh:
-				self.parse_line(line)
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
+				f = self.parse_line(line)
+				if(f != None):
+					yield f
 
 
 
 class ReadFusionMap(FusionDetectionExperiment):
 	logger = logging.getLogger("FuMa::Readers::ReadFusionMap")
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,min_reads=0,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
 		self.parse_header = False
+		self.min_reads = min_reads
 		
-		self.parse()
+		if(parse):
+			self.parse()
 	
 	def parse_line__header(self,line):
 		line = line.strip().split("\t")
@@ -460,11 +493,19 @@ class ReadFusionMap(FusionDetectionExperiment):
 		
 		self.parse_id_column = line.index("FusionID")
 		
+		# The read counts are prefixed with the name of the sample, e.g. "all.SeedCount"
+		self.parse_support_columns = find_columns([column.split(".")[-1] for column in line],["SeedCount","RescuedCount"])
+		self.check_support_columns(self.parse_support_columns)
+		
 		self.parse_header = True
 	
 	def parse_line__fusion(self,line):
 		line = line.strip().split("\t")
 		
+		support = get_support(line,self.parse_support_columns)
+		if(not self.is_supported(support)):
+			return None
+		
 		f = Fusion(
 			line[self.parse_left_chr_column], \
 			line[self.parse_right_chr_column], \
@@ -476,10 +517,12 @@ class ReadFusionMap(FusionDetectionExperiment):
 			line[self.parse_id_column], \
 			True
 		)
-		self.add_fusion(f)
+		f.support = support
+		
+		return f
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
+	def iter_fusions(self):
+		self.parse_header = False
 		
 		with open(self.filename,"r") as fh:
 			for line in fh:
@@ -488,9 +531,9 @@ class ReadFusionMap(FusionDetectionExperiment):
 					if(self.parse_header == False):
 						self.parse_line__header(line)
 					else:
-						self.parse_line__fusion(line)
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
+						f = self.parse_line__fusion(line)
+						if(f != None):
+							yield f
 
 
 
@@ -534,13 +577,16 @@ class ReadChimeraScanAbsoluteBEDPE(FusionDetectionExperiment):
 	
 	logger = logging.getLogger("FuMa::Readers::ReadChimeraScanAbsoluteBEDPE")
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
-		self.parse()
+		if(parse):
+			self.parse()
 	
 	def parse_line(self,line):
+		f = None
+		
 		if(self.parse_header):
 			if(line[0] == "#"):
 				self.parse_line__header(line)
@@ -559,11 +605,13 @@ class ReadChimeraScanAbsoluteBEDPE(FusionDetectionExperiment):
 				
 				self.parse_id = 6
 				
-				self.parse_line__fusion(line)
+				f = self.parse_line__fusion(line)
 			
 			self.parse_header = False
 		else:
-			self.parse_line__fusion(line)
+			f = self.parse_line__fusion(line)
+		
+		return f
 	
 	def parse_line__header(self,line):
 		line = line.strip().split("\t")
@@ -606,23 +654,27 @@ class ReadChimeraScanAbsoluteBEDPE(FusionDetectionExperiment):
 			line[self.parse_id], \
 			True
 		)
-		self.add_fusion(f)
+		return f
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
-		
+	def iter_fusions(self):
 		self.parse_header = True
 		
 		with open(self.filename,"r") as fh:
 			for line in fh:
 				line = line.strip()
 				if(len(line) > 0):
-					self.parse_line(line)
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
+					f = self.parse_line(line)
+					if(f != None):
+						yield f
 	
 	def convert_to_absolute_coordinates(self,gene_features,output):
-		for fusion in self:
+		"""Converts the fusions of a "relative" BEDPE file while they are
+		read from it and writes them to a CG junctions file
+		"""
+		export_fusions_to_CG_Junctions_file(self.iter_absolute_coordinates(gene_features),output)
+	
+	def iter_absolute_coordinates(self,gene_features):
+		for fusion in self.iter_fusions():
 			gene_id_left = fusion.get_left_chromosome()#[3:]
 			gene_id_right = fusion.get_right_chromosome()#[3:]
 			
@@ -644,8 +696,8 @@ class ReadChimeraScanAbsoluteBEDPE(FusionDetectionExperiment):
 				fusion.set(left_gene[0],right_gene[0],new_left_pos,new_right_pos,fusion.sequence,fusion.transition_sequence,fusion.left_strand,fusion.right_strand)
 			else:
 				self.logger.warning("Can not find genes with id: "+", ".join(go))
-		
-		self.export_to_CG_Junctions_file(output)
+			
+			yield fusion
 
 
 
@@ -655,11 +707,12 @@ class ReadFusionCatcherFinalList(FusionDetectionExperiment):
 	
 	logger = logging.getLogger("FuMa::Readers::ReadFusionCatcherFinalList")
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
-		self.parse()
+		if(parse):
+			self.parse()
 	
 	def parse_line(self,line):
 		line = line.strip()
@@ -668,7 +721,7 @@ class ReadFusionCatcherFinalList(FusionDetectionExperiment):
 			if(self.parse_header):
 				self.parse_line__header(line)
 			else:
-				self.parse_line__fusion(line)
+				return self.parse_line__fusion(line)
 	
 	def parse_line__header(self,line):
 		line = line.split("\t")
@@ -699,21 +752,20 @@ class ReadFusionCatcherFinalList(FusionDetectionExperiment):
 			str(self.i), \
 			True
 			)
-		self.add_fusion(f)
 		
 		self.i += 1
-	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
 		
+		return f
+	
+	def iter_fusions(self):
 		self.parse_header = True
 		self.i = 1
 		
 		with open(self.filename,"r") as fh:
 			for line in fh:
-				self.parse_line(line)
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
+				f = self.parse_line(line)
+				if(f != None):
+					yield f
 
 
 class FusionCatcherIndices:
@@ -808,25 +860,24 @@ class FusionCatcherIndices:
 class ReadFusionCatcherMAP(FusionDetectionExperiment):
 	logger = logging.getLogger("FuMa::Readers::ReadFusionCatcherMAP")
 	
-	def __init__(self,arg_filename,name,references):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,references,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
 		self.references = references
 		
-		self.parse()
+		if(parse):
+			self.parse()
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
-		
+	def iter_fusions(self):
 		self.parse_header = True
 		self.i = 1
 		
 		with open(self.filename,"r") as fh:
 			for line in fh:
-				self.parse_line(line)
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
+				f = self.parse_line(line)
+				if(f != None):
+					yield f
 	
 	def parse_line(self,line):
 		line = line.strip("\n")
@@ -839,9 +890,10 @@ class ReadFusionCatcherMAP(FusionDetectionExperiment):
 			exon2 = self.references.exon_index[exons[1]]
 			
 			f = Fusion(exon1['chromosome'],exon2['chromosome'],exon1['center'],exon2['center'],None,None,self.name,str(self.i),True)
-			self.add_fusion(f)
 			
 			self.i += 1
+			
+			return f
 
 
 
@@ -851,27 +903,28 @@ class ReadFusionCatcherPreliminaryList(FusionDetectionExperiment):
 	parse_left_gene = 0
 	parse_right_gene = 1
 	
-	def __init__(self,arg_filename,name,references):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,references,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
 		self.references = references
 		
-		self.parse()
+		if(parse):
+			self.parse()
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
-		
+	def iter_fusions(self):
 		self.parse_header = True
 		self.i = 0
 		
 		with open(self.filename,"r") as fh:
 			for line in fh:
-				self.parse_line(line)
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
+				f = self.parse_line(line)
+				if(f != None):
+					yield f
 	
 	def parse_line(self,line):
+		f = None
+		
 		line = line.strip("\n")
 		if(len(line) > 0):
 			if(self.i >= 1):
@@ -881,9 +934,10 @@ class ReadFusionCatcherPreliminaryList(FusionDetectionExperiment):
 				gene2 = self.references.gene_index[params[self.parse_right_gene]]
 				
 				f = Fusion(gene1['chromosome'],gene2['chromosome'],gene1['center'],gene2['center'],None,None,self.name,str(self.i),True)
-				self.add_fusion(f)
 			
 			self.i += 1
+		
+		return f
 
 
 class ReadRNASTARChimeric(FusionDetectionExperiment):
@@ -902,34 +956,61 @@ chr7	99638140	+	chr7	99638098	-	0	0	3	HWI-1KL113:71:D1G2NACXX:1:1102:17025:16070
 	
 	logger = logging.getLogger("FuMa::Readers::ReadRNASTARChimeric")
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,min_reads=0,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
-		self.parse()
-	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
+		self.min_reads = min_reads
 		
+		if(parse):
+			self.parse()
+	
+	def iter_fusions(self):
+		"""Each line is a chimeric read. The reads of identical junctions
+		are counted in a dict and each junction with at least
+		self.min_reads reads becomes one fusion, with the line of its
+		first read as uid. The fusions are yielded after the whole file
+		has been read, in the order of their first read.
+		"""
 		self.i = 1
 		
+		junctions = {}# junction -> [uid, support]
+		order = []
+		
 		with open(self.filename,"r") as fh:
 			for line in fh:
 				line = line.strip()
 				if(len(line) > 0):
-					self.parse_line(line)
+					junction = self.parse_line(line)
+					
+					if(junctions.has_key(junction)):
+						junctions[junction][1] += 1
+					else:
+						junctions[junction] = [str(self.i),1]
+						order.append(junction)
+					
 					self.i += 1
 		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
+		self.logger.debug("Chimeric reads: "+str(self.i - 1)+", unique junctions: "+str(len(order)))
+		
+		for junction in order:
+			uid, support = junctions.pop(junction)
+			if(self.is_supported(support)):
+				f = Fusion(junction[0],junction[3],junction[1],junction[4],junction[2],junction[5],self.name,uid,True)
+				f.support = support
+				
+				yield f
 	
 	def parse_line(self,line):
+		"""
+		@return: tuple (left chr, left pos, left strand, right chr, right pos, right strand)
+		"""
 		line = line.strip().split("\t")
 		
 		left_pos = int(line[self.parse_left_pos_column])
 		right_pos = int(line[self.parse_right_pos_column])
 		
-		f = Fusion(line[self.parse_left_chr_column],line[self.parse_right_chr_column],left_pos,right_pos,line[self.parse_left_strand_column],line[self.parse_right_strand_column],self.name,str(self.i),True)
-		self.add_fusion(f)
+		return (line[self.parse_left_chr_column],left_pos,line[self.parse_left_strand_column],line[self.parse_right_chr_column],right_pos,line[self.parse_right_strand_column])
 
 
 class ReadRNASTARFusionFinal(FusionDetectionExperiment):
@@ -941,34 +1022,39 @@ EPB41--YIPF3	5	0	INCL_NON_REF_SPLICE	EPB41^ENSG00000159023.14	chr1:29446010:+	YI
 	"""
 	logger = logging.getLogger("FuMa::Readers::ReadRNASTARFusionFinal")
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,min_reads=0,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
 		self.header = None
+		self.min_reads = min_reads
 		
-		self.parse()
+		if(parse):
+			self.parse()
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
-		
+	def iter_fusions(self):
 		self.i = 1
+		self.header = None
 		
 		with open(self.filename,"r") as fh:
 			for line in fh:
 				line = line.strip()
 				if(len(line) > 0):
 					if(self.header):
-						self.parse_line(line)
+						f = self.parse_line(line)
+						if(f != None):
+							yield f
 						self.i += 1
 					else:
 						self.parse_header_line(line)
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
 	
 	def parse_line(self,line):
 		line = line.strip().split("\t")
 		
+		support = get_support(line,self.header["parse_support_columns"])
+		if(not self.is_supported(support)):
+			return None
+		
 		left_break = line[self.header["parse_left_column"]].split(":")
 		right_break = line[self.header["parse_right_column"]].split(":")
 		
@@ -983,7 +1069,9 @@ EPB41--YIPF3	5	0	INCL_NON_REF_SPLICE	EPB41^ENSG00000159023.14	chr1:29446010:+	YI
 					str(self.i),
 					True
 				)
-		self.add_fusion(f)
+		f.support = support
+		
+		return f
 	
 	def parse_header_line(self,line):
 		line = line.split("\t")
@@ -991,6 +1079,12 @@ EPB41--YIPF3	5	0	INCL_NON_REF_SPLICE	EPB41^ENSG00000159023.14	chr1:29446010:+	YI
 		self.header = {}
 		self.header["parse_left_column"] = line.index("LeftBreakpoint")
 		self.header["parse_right_column"] = line.index("RightBreakpoint")
+		
+		# Renamed in later versions of STAR-Fusion
+		self.header["parse_support_columns"] = find_columns(line,["JunctionReads","SpanningFrags"])
+		if(self.header["parse_support_columns"] == None):
+			self.header["parse_support_columns"] = find_columns(line,["JunctionReadCount","SpanningFragCount"])
+		self.check_support_columns(self.header["parse_support_columns"])
 
 
 
@@ -1002,27 +1096,30 @@ class ReadChimeraPrettyPrint(FusionDetectionExperiment):
 	"""
 	logger = logging.getLogger("FuMa::Readers::ReadChimeraPrettyPrint")
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,min_reads=0,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		self.filename = arg_filename
 		self.columns = None
-		self.parse()
+		self.min_reads = min_reads
+		if(parse):
+			self.parse()
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
+	def iter_fusions(self):
+		self.columns = None
+		self.i = 0
 		
 		with open(self.filename,"r") as fh:
 			for line in fh:
-				self.parse_line(line.strip())
+				f = self.parse_line(line.strip())
+				if f != None:
+					yield f
 	
 	def parse_line(self,line):
 		if len(line) > 0:
 			if self.columns == None:
 				self.parse_line__header(line)
 			else:
-				self.parse_line__fusion(line)
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
+				return self.parse_line__fusion(line)
 	
 	def cleanup_params(self,params):
 		params_clean = []
@@ -1044,7 +1141,10 @@ class ReadChimeraPrettyPrint(FusionDetectionExperiment):
 			'left_pos':     params.index('breakpoint.gene1') , \
 			'right_pos':    params.index('breakpoint.gene2') , \
 			'left_strand':  params.index('strand.gene1') , \
-			'right_strand': params.index('strand.gene2') }
+			'right_strand': params.index('strand.gene2') , \
+			'support':      find_columns(params,['supporting.reads']) }
+		
+		self.check_support_columns(self.columns['support'])
 	
 	def parse_line__fusion(self,line):
 		line = self.cleanup_params(line.split("\t"))
@@ -1058,10 +1158,17 @@ class ReadChimeraPrettyPrint(FusionDetectionExperiment):
 		left_strand = line[self.columns['left_strand']]
 		right_strand = line[self.columns['right_strand']]
 		
-		uid = str(len(self))
+		uid = str(self.i)
+		self.i += 1
+		
+		support = get_support(line,self.columns['support'])
+		if not self.is_supported(support):
+			return None
 		
 		f = Fusion(left_chr, right_chr, left_pos, right_pos, left_strand, right_strand, self.name, uid,True)
-		self.add_fusion(f)
+		f.support = support
+		
+		return f
 
 
 
@@ -1082,16 +1189,19 @@ DPF2	chr11	+	65116155	M	DYNLRB1	chr20	+	33114078	M	28	4	INTERCHR-SS	NA
 	parse_left_pos_column = 3
 	parse_right_pos_column = 8
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	# Span_reads_num and Junc_reads_num
+	parse_support_columns = [10,11]
+	
+	def __init__(self,arg_filename,name,min_reads=0,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
+		self.min_reads = min_reads
 		
-		self.parse()
+		if(parse):
+			self.parse()
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
-		
+	def iter_fusions(self):
 		self.i = 0
 		
 		with open(self.filename,"r") as fh:
@@ -1099,15 +1209,19 @@ DPF2	chr11	+	65116155	M	DYNLRB1	chr20	+	33114078	M	28	4	INTERCHR-SS	NA
 				line = line.strip()
 				if(len(line) > 0):
 					if(self.i > 0):
-						self.parse_line(line)
+						f = self.parse_line(line)
+						if(f != None):
+							yield f
 					
 					self.i += 1
 		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
-		
 	def parse_line(self,line):
 		line = line.strip().split("\t")
 		
+		support = get_support(line,self.parse_support_columns)
+		if(not self.is_supported(support)):
+			return None
+		
 		left_pos = int(line[self.parse_left_pos_column])
 		right_pos = int(line[self.parse_right_pos_column])
 		
@@ -1122,7 +1236,9 @@ DPF2	chr11	+	65116155	M	DYNLRB1	chr20	+	33114078	M	28	4	INTERCHR-SS	NA
 			str(self.i), \
 			True
 		)
-		self.add_fusion(f)
+		f.support = support
+		
+		return f
 
 
 
@@ -1143,16 +1259,19 @@ DPF2	DPF2-004	chr11	+	3294	65116155	6exon-M	DYNLRB1	DYNLRB1-002	chr20	+	59	33114
 	parse_left_pos_column = 5
 	parse_right_pos_column = 12
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	# Span_reads_num and Junc_reads_num
+	parse_support_columns = [14,15]
+	
+	def __init__(self,arg_filename,name,min_reads=0,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
+		self.min_reads = min_reads
 		
-		self.parse()
+		if(parse):
+			self.parse()
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
-		
+	def iter_fusions(self):
 		self.i = 0
 		
 		with open(self.filename,"r") as fh:
@@ -1160,15 +1279,19 @@ DPF2	DPF2-004	chr11	+	3294	65116155	6exon-M	DYNLRB1	DYNLRB1-002	chr20	+	59	33114
 				line = line.strip()
 				if(len(line) > 0):
 					if(self.i > 0):
-						self.parse_line(line)
+						f = self.parse_line(line)
+						if(f != None):
+							yield f
 					
 					self.i += 1
 		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
-		
 	def parse_line(self,line):
 		line = line.strip().split("\t")
 		
+		support = get_support(line,self.parse_support_columns)
+		if(not self.is_supported(support)):
+			return None
+		
 		left_pos = int(line[self.parse_left_pos_column])
 		right_pos = int(line[self.parse_right_pos_column])
 		
@@ -1183,7 +1306,9 @@ DPF2	DPF2-004	chr11	+	3294	65116155	6exon-M	DYNLRB1	DYNLRB1-002	chr20	+	59	33114
 			str(self.i), \
 			True
 		)
-		self.add_fusion(f)
+		f.support = support
+		
+		return f
 
 
 
@@ -1208,16 +1333,15 @@ XIAP	FEM1A	X	Unable to predict breakpoint position	+	19	4798223	+	ENSG0000010196
 	parse_left_strand_column = 4
 	parse_right_strand_column = 7
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
 		
-		self.parse()
+		if(parse):
+			self.parse()
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
-		
+	def iter_fusions(self):
 		self.i = 0
 		
 		with open(self.filename,"r") as fh:
@@ -1225,12 +1349,12 @@ XIAP	FEM1A	X	Unable to predict breakpoint position	+	19	4798223	+	ENSG0000010196
 				line = line.strip()
 				if(len(line) > 0):
 					if(self.i > 0):
-						self.parse_line(line)
+						f = self.parse_line(line)
+						if(f != None):
+							yield f
 					
 					self.i += 1
 		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
-		
 	def parse_line(self,line):
 		line = line.strip().split("\t")
 		
@@ -1250,7 +1374,7 @@ XIAP	FEM1A	X	Unable to predict breakpoint position	+	19	4798223	+	ENSG0000010196
 				str(self.i), \
 				True
 			)
-			self.add_fusion(f)
+			return f
 		else:
 			self.logger.warning("Could not determine break point for item "+str(self.i)+": "+line[self.parse_left_chr_column]+":"+left_pos+"-"+	line[self.parse_right_chr_column]+":"+right_pos)
 
@@ -1272,16 +1396,15 @@ class ReadJaffaResults(FusionDetectionExperiment):
 	
 	logger = logging.getLogger("FuMa::Readers::ReadJaffaResults")
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
 		
-		self.parse()
+		if(parse):
+			self.parse()
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
-		
+	def iter_fusions(self):
 		self.i = 0
 		
 		with open(self.filename,"r") as fh:
@@ -1289,11 +1412,9 @@ class ReadJaffaResults(FusionDetectionExperiment):
 				line = line.strip()
 				if(len(line) > 0):
 					if(self.i > 0):# otherwise it's the header
-						self.parse_line(line)
+						yield self.parse_line(line)
 					
 					self.i += 1
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
 	
 	def parse_line(self,line):
 		line = line.strip().split(",")
@@ -1315,7 +1436,7 @@ class ReadJaffaResults(FusionDetectionExperiment):
 			str(self.i), \
 			False # The authors claim that for this tool acceptator donor strand is not preserved - therefore this has to be false
 		)
-		self.add_fusion(f)
+		return f
 
 
 
@@ -1338,19 +1459,20 @@ This means that it should not be possible to use
 	
 	logger = logging.getLogger("FuMa::Readers::Read123SVDeNovo")
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
 		
-		self.parse()
+		if(parse):
+			self.parse()
 	
 	def parse_line(self,line):
 		line = line.strip()
 		
 		if(len(line) > 0):
 			if(line[0] != "#"):
-				self.parse_line__fusion(line)
+				return self.parse_line__fusion(line)
 	
 	def parse_line__fusion(self,line):
 		line = line.split("\t")
@@ -1378,17 +1500,14 @@ This means that it should not be possible to use
 		
 		uid = line[0]+":"+line[1]+","+line[2]+"-"+line[3]+":"+line[4]+","+line[5]
 		
-		f = Fusion(left_chr, right_chr, left_pos, right_pos, left_strand, right_strand,self.name,uid,True)
-		self.add_fusion(f)
+		return Fusion(left_chr, right_chr, left_pos, right_pos, left_strand, right_strand,self.name,uid,True)
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
-		
+	def iter_fusions(self):
 		with open(self.filename,"r") as fh:
 			for line in fh:
-				self.parse_line(line)
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
+				f = self.parse_line(line)
+				if(f != None):
+					yield f
 
 
 
@@ -1408,22 +1527,21 @@ Chimeric.out.junction	183	EPI	2	0	chr3:52300997>chr19:36726707	WDR82	Yes	Exon	3
 	
 	logger = logging.getLogger("FuMa::Readers::ReadOncofuse")
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		self.filename = arg_filename
-		self.parse()
+		if(parse):
+			self.parse()
 	
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
-		
+	def iter_fusions(self):
 		with open(self.filename,"r") as fh:
 			for line in fh:
 				line = line.strip()
 				if(len(line) > 0):
-					self.parse_line(line)
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
+					f = self.parse_line(line)
+					if(f != None):
+						yield f
 	
 	def parse_line(self,line):
 		line = line.strip().split("\t")
@@ -1434,10 +1552,7 @@ Chimeric.out.junction	183	EPI	2	0	chr3:52300997>chr19:36726707	WDR82	Yes	Exon	3
 			left = left.split(":")
 			right = right.split(":")
 			
-			f = Fusion(left[0],right[0],int(left[1]),int(right[1]),None,None,self.name,line[self.parse_fusionid_column],True)
-			self.add_fusion(f)
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
+			return Fusion(left[0],right[0],int(left[1]),int(right[1]),None,None,self.name,line[self.parse_fusionid_column],True)
 
 
 
@@ -1457,16 +1572,15 @@ class ReadTrinityGMAP(FusionDetectionExperiment):
 	
 	logger = logging.getLogger("FuMa::Readers::ReadTrinityGMAP")
 	
-	def __init__(self,arg_filename,name):
-		FusionDetectionExperiment.__init__(self,name)
+	def __init__(self,arg_filename,name,parse=True,columnar_storage=False):
+		FusionDetectionExperiment.__init__(self,name,columnar_storage)
 		
 		
 		self.filename = arg_filename
-		self.parse()
-		
-	def parse(self):
-		self.logger.info("Parsing file: "+str(self.filename))
+		if(parse):
+			self.parse()
 		
+	def iter_fusions(self):
 		contig_chunk = []
 		contig_name = False
 		
@@ -1496,11 +1610,9 @@ class ReadTrinityGMAP(FusionDetectionExperiment):
 						
 						distance = f.get_distance()
 						if(distance > 100000 or distance == -1):
-							self.add_fusion(f)
+							yield f
 					else:
 						contig_chunk.append(line)
-		
-		self.logger.debug("Parsed fusion genes: "+str(len(self)))
 	
 	def parse_contig(self,contig_name,contig_chunk):
 		path = 0
@@ -1539,3 +1651,15 @@ class ReadTrinityGMAP(FusionDetectionExperiment):
 				m = re.search(self.regexes[key],line)
 				keys[key] = m.groups()
 		return keys
+
+
+
+def iter_fusions(reader,filename,name="",**kwargs):
+	"""Reads the fusions of a file in the format of a reader class, e.g.
+	iter_fusions(ReadDefuse,"results.tsv",min_reads=5), without storing
+	them in an experiment. Additional keyword arguments are passed on to
+	the reader.
+	
+	@return: generator of Fusion objects
+	"""
+	return reader(filename,name,parse=False,**kwargs).iter_fusions()
@@ -33,7 +33,7 @@ setup(name='fuma',
 		maintainer=fuma.__author__,
 		license=fuma.__license__,
 		url=fuma.__homepage__,
-		scripts=["bin/fuma","bin/defuse-clusters-to-CG",'bin/chimerascan-exclude-transcriptome-events',"bin/fusioncatcher-to-CG","bin/chimerascan-relative-bedpe-to-CG","bin/fuma-list-to-boolean-list","bin/fuma-gencode-gtf-to-bed"],
+		scripts=["bin/fuma","bin/defuse-clusters-to-CG",'bin/chimerascan-exclude-transcriptome-events',"bin/fusioncatcher-to-CG","bin/chimerascan-relative-bedpe-to-CG","bin/fuma-list-to-boolean-list","bin/fuma-gencode-gtf-to-bed","bin/fuma-index-annotation"],
 		packages=['fuma'],
 		test_suite="tests",
 		install_requires=['HTSeq >= 0.6.1','numpy'],
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+"""[License: GNU General Public License v3 (GPLv3)]
+ 
+ This file is part of FuMa.
+ 
+ FuMa is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+ 
+ FuMa is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+ Documentation as defined by:
+ <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
+ 
+ Memory benchmark: bytes per fusion gene of the Edgren test data, of
+ which the annotated fusion genes are replicated (1000 times by default):
+ 
+	python -m tests.benchmark_Fusion [--scale N] [--columnar-storage]
+"""
+
+import argparse,resource,gc,sys
+
+from fuma.Fusion import Fusion
+from fuma.FusionDetectionExperiment import FusionDetectionExperiment
+from fuma.ParseBED import ParseBED
+from fuma.Readers import ReadChimeraScanAbsoluteBEDPE
+from fuma.Readers import ReadDefuse
+from fuma.Readers import ReadFusionMap
+
+def get_memory_usage():
+	"""@return: peak resident set size in bytes (Linux reports kB)
+	"""
+	return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def replicate(fusion,i):
+	copy = Fusion( \
+		fusion.get_left_chromosome(), \
+		fusion.get_right_chromosome(), \
+		fusion.get_left_break_position(), \
+		fusion.get_right_break_position(), \
+		fusion.left_strand, \
+		fusion.right_strand, \
+		fusion.dataset_name, \
+		fusion.uid+"_"+str(i), \
+		False)
+	
+	copy.acceptor_donor_direction = fusion.acceptor_donor_direction
+	copy.annotate_genes_left(list(fusion.annotated_genes_left))
+	copy.annotate_genes_right(list(fusion.annotated_genes_right))
+	
+	return copy
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--scale",default=1000,type=int,help="Number of times the fusion genes are replicated")
+	parser.add_argument("--columnar-storage",action="store_true")
+	args = parser.parse_args()
+	
+	prefix = "tests/data/test_Functional.test_Edgren_hg19"
+	experiments = [ \
+		ReadChimeraScanAbsoluteBEDPE(prefix+".ChimeraScan.txt","chimerascan"), \
+		ReadDefuse(prefix+".Defuse.txt","defuse"), \
+		ReadFusionMap(prefix+".FusionMap.txt","fusionmap"), \
+		ReadFusionMap(prefix+".TruePositives.txt","edgren_tp")]
+	
+	genes = ParseBED("tests/data/refseq_genes_hg19.bed","hg19",200000)
+	for experiment in experiments:
+		experiment.annotate_genes(genes)
+	
+	gc.collect()
+	memory_before = get_memory_usage()
+	
+	n = 0
+	replicated_experiments = []
+	for experiment in experiments:
+		replicated_experiment = FusionDetectionExperiment(experiment.name,args.columnar_storage)
+		for i in range(args.scale):
+			for fusion in experiment:
+				replicated_experiment.add_fusion(replicate(fusion,i))
+				n += 1
+		
+		replicated_experiments.append(replicated_experiment)
+	
+	gc.collect()
+	memory_after = get_memory_usage()
+	
+	sys.stdout.write("fusion genes:     "+str(n)+"\n")
+	sys.stdout.write("memory:           "+str((memory_after - memory_before) / (1024 * 1024))+" MB\n")
+	sys.stdout.write("bytes per fusion: "+str((memory_after - memory_before) / n)+"\n")
+
+if __name__ == '__main__':
+	main()
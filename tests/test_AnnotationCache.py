@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+"""[License: GNU General Public License v3 (GPLv3)]
+ 
+ This file is part of FuMa.
+ 
+ FuMa is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+ 
+ FuMa is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+ Documentation as defined by:
+ <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
+"""
+
+import unittest,logging,sys,os,shutil,tempfile,cPickle
+logging.basicConfig(level=logging.DEBUG,format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",stream=sys.stdout)
+
+from fuma.Gene import Gene
+from fuma.GeneTable import GeneTable
+from fuma.AnnotationCache import AnnotationCache
+
+class TestAnnotationCache(unittest.TestCase):
+	def test_01(self):
+		gene_A = Gene("A", False)
+		gene_B = Gene("B", False)
+		
+		cache = AnnotationCache(2)
+		
+		self.assertEqual(cache.get("1",100), None)
+		
+		cache.set("1",100,[gene_A])
+		cache.set("1",200,[])
+		
+		self.assertEqual(cache.get("1",100), [gene_A])
+		self.assertEqual(cache.get("1",200), [])
+		
+		# The least recently used position, 1:100, is removed
+		cache.get("1",100)
+		cache.set("2",100,[gene_A,gene_B])
+		
+		self.assertEqual(len(cache), 2)
+		self.assertEqual(cache.get("1",200), None)
+		self.assertEqual(cache.get("2",100), [gene_A,gene_B])
+		self.assertEqual(cache.get("1",100), [gene_A])
+		
+		self.assertEqual(cache.hits, 5)
+		self.assertEqual(cache.misses, 2)
+	
+	def test_02(self):
+		"""The cache file is only loaded if it has the same version
+		"""
+		genes = GeneTable(None)
+		genes.append(Gene("A", False))
+		genes.append(Gene("B", False))
+		
+		directory = tempfile.mkdtemp()
+		try:
+			cache = AnnotationCache(2,directory,"checksum")
+			cache.set("1",100,[genes[1]])
+			cache.save(genes)
+			
+			self.assertEqual(os.listdir(directory), ["checksum.annotation-cache"])
+			
+			cache = AnnotationCache(2,directory,"checksum")
+			cache.load(genes)
+			self.assertEqual(cache.get("1",100), [genes[1]])
+			
+			# Version 1 did not have a header
+			with open(os.path.join(directory,"checksum.annotation-cache"),"wb") as fh:
+				cPickle.dump([(("1",100),[0])],fh,cPickle.HIGHEST_PROTOCOL)
+			
+			cache = AnnotationCache(2,directory,"checksum")
+			cache.load(genes)
+			self.assertEqual(len(cache), 0)
+		finally:
+			shutil.rmtree(directory)
+
+def main():
+	unittest.main()
+
+if __name__ == '__main__':
+	main()
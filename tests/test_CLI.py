@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+"""[License: GNU General Public License v3 (GPLv3)]
+ 
+ This file is part of FuMa.
+ 
+ FuMa is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+ 
+ FuMa is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+ Documentation as defined by:
+ <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
+"""
+
+import unittest,logging,sys
+logging.basicConfig(level=logging.DEBUG,format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",stream=sys.stdout)
+
+from fuma.CLI import parse_sample
+from fuma.CLI import get_sample_filters
+
+
+class TestParseSample(unittest.TestCase):
+	def test_01(self):
+		self.assertEqual(parse_sample("star:star-fusion_final:results/star.final") , ("star","star-fusion_final","results/star.final",{}))
+		self.assertEqual(parse_sample("star:star-fusion_final:results/star.final:min_reads=3") , ("star","star-fusion_final","results/star.final",{'min_reads':3}))
+	
+	def test_02(self):
+		"""Filenames may contain ':', only a last field of key=value
+		pairs contains filters
+		"""
+		self.assertEqual(parse_sample("defuse:defuse:/data/run:1/results.tsv") , ("defuse","defuse","/data/run:1/results.tsv",{}))
+		self.assertEqual(parse_sample("defuse:defuse:/data/run:1/results.tsv:min_reads=10") , ("defuse","defuse","/data/run:1/results.tsv",{'min_reads':10}))
+		self.assertEqual(parse_sample("defuse:defuse:/data/run=1:results.tsv") , ("defuse","defuse","/data/run=1:results.tsv",{}))
+	
+	def test_03(self):
+		self.assertRaises(Exception, parse_sample, "star:star-fusion_final:star.final:max_reads=3")
+		self.assertRaises(Exception, parse_sample, "star:star-fusion_final:star.final:min_reads=three")
+
+
+class TestGetSampleFilters(unittest.TestCase):
+	def test_01(self):
+		"""--min-support is only the default min_reads of rna-star_chimeric
+		samples
+		"""
+		self.assertEqual(get_sample_filters("star","rna-star_chimeric",{},5) , {'min_reads':5})
+		self.assertEqual(get_sample_filters("star","rna-star_chimeric",{'min_reads':2},5) , {'min_reads':2})
+		
+		for input_format in ["defuse","fusionmap","chimera","soapfuse-final-gene","soapfuse-final-transcript","star-fusion_final"]:
+			self.assertEqual(get_sample_filters("sample",input_format,{},5) , {})
+			self.assertEqual(get_sample_filters("sample",input_format,{'min_reads':2},5) , {'min_reads':2})
+	
+	def test_02(self):
+		"""Formats without supporting reads can not be filtered
+		"""
+		self.assertEqual(get_sample_filters("sample","chimerascan",{},5) , {})
+		self.assertRaises(Exception, get_sample_filters, "sample", "chimerascan", {'min_reads':2}, 5)
+
+
+def main():
+	unittest.main()
+
+if __name__ == '__main__':
+	main()
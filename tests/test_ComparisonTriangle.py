@@ -34,6 +34,7 @@ from fuma.Gene import Gene
 from fuma.GeneAnnotation import GeneAnnotation
 from fuma.ParseBED import ParseBED
 from fuma.ComparisonTriangle import ComparisonTriangle
+from fuma.FusionIndex import FusionIndex
 from fuma.CLI import CLI
 
 
@@ -1795,6 +1796,214 @@ f5=                                            [--A6--]
 		if files_identical:
 			os.remove(output_file_b)
 		#---------------------------------------------------------------#
+	
+	def test_egm_01(self):
+		"""
+		f1, f2 and f3 have identical gene sets, but f3 is on the other
+		strand. With strand-specific matching f1 and f2 are merged while
+		f3 is reported separately; otherwise all three are merged.
+		"""
+		output_file = 'test_ComparisonTriangle.test_egm_01.output.txt'
+		
+		gene_A = Gene("A", False)
+		gene_B = Gene("B", False)
+		
+		experiments = []
+		for i, strand in [(1,"+"),(2,"+"),(3,"-")]:
+			fusion = Fusion("chr1","chr2",15000,15000,strand,"+","Experiment_"+str(i),str(i),True)
+			fusion.annotate_genes_left([gene_A])
+			fusion.annotate_genes_right([gene_B])
+			
+			experiment = FusionDetectionExperiment("Experiment_"+str(i))
+			experiment.add_fusion(fusion)
+			experiments.append(experiment)
+		
+		for strand_specific, n_lines in [('--strand-specific-matching',1+2),('--no-strand-specific-matching',1+1)]:
+			args = CLI(['-m','egm',strand_specific,'-s','','-o',output_file])
+			
+			overlap = ComparisonTriangle(args)
+			for experiment in experiments:
+				overlap.add_experiment(experiment)
+			overlap.overlay_fusions()
+			
+			num_lines = sum(1 for line in open(output_file,'r'))
+			self.assertEqual(num_lines, n_lines)
+		
+		os.remove(output_file)
+
+	
+	def test_jobs_01(self):
+		"""
+		f1: [gene_1] -> [gene_2] (chrX, chr2)
+		f2: [gene_1] -> [gene_2] (chrX, chr2)
+		f3: [gene_1] -> [gene_2] (chrX, chr3)
+		f4: [gene_3] -> [gene_4] (chr5, chr6)
+		f5: [gene_3] -> [gene_4] (chr5, chr6)
+		
+		The chrX-chr2 and chrX-chr3 buckets are joined because f3 matches
+		f1 and f2. The output has to be identical to a single process.
+		"""
+		output_files = ['test_ComparisonTriangle.test_jobs_01.j1.output.txt','test_ComparisonTriangle.test_jobs_01.j2.output.txt']
+		
+		gene_1 = Gene("gene_1", False)
+		gene_2 = Gene("gene_2", False)
+		gene_3 = Gene("gene_3", False)
+		gene_4 = Gene("gene_4", False)
+		
+		for jobs,output_file in zip(['1','2'],output_files):
+			args = CLI(['-m','subset','-f','list','--no-strand-specific-matching','-s','','-o',output_file,'-j',jobs])
+			
+			fusion_1 = Fusion("chrX","chr2",15000,60000,"+","+","Experiment_1","uid",True)
+			fusion_2 = Fusion("chrX","chr2",15000,80000,"+","+","Experiment_2","uid",True)
+			fusion_3 = Fusion("chrX","chr3",15000,70000,"+","+","Experiment_3","uid",True)
+			fusion_4 = Fusion("chr5","chr6",15000,70000,"+","+","Experiment_1","uid",True)
+			fusion_5 = Fusion("chr5","chr6",15000,70000,"+","+","Experiment_2","uid",True)
+			
+			for fusion in [fusion_1,fusion_2,fusion_3]:
+				fusion.annotate_genes_left([gene_1])
+				fusion.annotate_genes_right([gene_2])
+			
+			for fusion in [fusion_4,fusion_5]:
+				fusion.annotate_genes_left([gene_3])
+				fusion.annotate_genes_right([gene_4])
+			
+			experiment_1 = FusionDetectionExperiment("Experiment_1")
+			experiment_2 = FusionDetectionExperiment("Experiment_2")
+			experiment_3 = FusionDetectionExperiment("Experiment_3")
+			
+			experiment_1.add_fusion(fusion_1)
+			experiment_1.add_fusion(fusion_4)
+			experiment_2.add_fusion(fusion_2)
+			experiment_2.add_fusion(fusion_5)
+			experiment_3.add_fusion(fusion_3)
+			
+			overlap = ComparisonTriangle(args)
+			overlap.add_experiment(experiment_1)
+			overlap.add_experiment(experiment_2)
+			overlap.add_experiment(experiment_3)
+			
+			fusion_index = FusionIndex()
+			for tmp,fusion in overlap:
+				fusion_index.add_fusion(fusion)
+			
+			components = overlap.find_components(fusion_index,[pair for pair in fusion_index.find_pairs()])
+			self.assertEqual([len(component) for component in components], [3,1])
+			
+			overlap.overlay_fusions()
+		
+		with open(output_files[0],'r') as fh:
+			output_1 = fh.read()
+		with open(output_files[1],'r') as fh:
+			output_2 = fh.read()
+		
+		self.assertEqual(output_1, output_2)
+		self.assertEqual(len(output_1.strip().split("\n")), 3)
+		
+		for output_file in output_files:
+			os.remove(output_file)
+
+	
+	def test_state_01(self):
+		"""
+		Experiment_3 is added to the saved state of Experiment_1 and
+		Experiment_2, and has to give the same result as all at once.
+		"""
+		output_file = 'test_ComparisonTriangle.test_state_01.output.txt'
+		validation_file = 'tests/data/test_ComparisonTriangle.test_oc_05.output.txt'
+		state_file = 'test_ComparisonTriangle.test_state_01.state'
+		
+		args = CLI(['-m','subset','-f','list','--no-strand-specific-matching','-s','','-o',output_file])
+		
+		gene_1 = Gene("gene_1", False)
+		gene_2 = Gene("gene_2", False)
+		
+		fusion_1 = Fusion("chrX","chr2",15000,60000,"+","+","Experiment_1","uid",True)
+		fusion_2 = Fusion("chrX","chr2",15000,80000,"+","+","Experiment_2","uid",True)
+		fusion_3 = Fusion("chrX","chr3",15000,70000,"+","+","Experiment_3","uid",True)
+		
+		for fusion in [fusion_1,fusion_2,fusion_3]:
+			fusion.annotate_genes_left([gene_1])
+			fusion.annotate_genes_right([gene_2])
+		
+		experiment_1 = FusionDetectionExperiment("Experiment_1")
+		experiment_2 = FusionDetectionExperiment("Experiment_2")
+		experiment_3 = FusionDetectionExperiment("Experiment_3")
+		
+		experiment_1.add_fusion(fusion_1)
+		experiment_2.add_fusion(fusion_2)
+		experiment_3.add_fusion(fusion_3)
+		
+		overlap = ComparisonTriangle(args)
+		overlap.add_experiment(experiment_1)
+		overlap.add_experiment(experiment_2)
+		overlap.overlay_fusions()
+		overlap.save_state(state_file)
+		
+		overlap = ComparisonTriangle(args)
+		overlap.load_state(state_file)
+		overlap.add_experiment(experiment_3)
+		overlap.overlay_fusions()
+		
+		self.assertEqual(len(overlap), 3)
+		self.assertEqual(overlap.match_graph.num_edges(), 3)
+		
+		files_identical = match_files_unsorted(output_file,validation_file)
+		self.assertTrue(files_identical)
+		
+		# Other matching settings are not allowed
+		args = CLI(['-m','overlap','-f','list','--no-strand-specific-matching','-s','','-o',output_file])
+		self.assertRaises(Exception, ComparisonTriangle(args).load_state, state_file)
+		
+		if files_identical:
+			os.remove(output_file)
+		os.remove(state_file)
+	
+	def test_subset_01(self):
+		"""
+		Experiment_1: [A] -> [X]
+		Experiment_2: [A,B] -> [X]
+		Experiment_3: [A,C] -> [X]
+		
+		[A,B] and [A,C] do not match each other, but both contain the
+		smallest gene set [A] of the merged fusion. Like the k-level
+		expansion did, all three have to end up in one merged fusion,
+		instead of two overlapping ones.
+		"""
+		output_file = 'test_ComparisonTriangle.test_subset_01.output.txt'
+		
+		args = CLI(['-m','subset','-f','list','--no-strand-specific-matching','-s','','-o',output_file])
+		
+		gene_a = Gene("A", False)
+		gene_b = Gene("B", False)
+		gene_c = Gene("C", False)
+		gene_x = Gene("X", False)
+		
+		fusion_1 = Fusion("chr1","chr2",15000,60000,"+","+","Experiment_1","1",True)
+		fusion_2 = Fusion("chr1","chr2",15000,60000,"+","+","Experiment_2","2",True)
+		fusion_3 = Fusion("chr1","chr2",15000,60000,"+","+","Experiment_3","3",True)
+		
+		fusion_1.annotate_genes_left([gene_a])
+		fusion_2.annotate_genes_left([gene_a,gene_b])
+		fusion_3.annotate_genes_left([gene_a,gene_c])
+		for fusion in [fusion_1,fusion_2,fusion_3]:
+			fusion.annotate_genes_right([gene_x])
+		
+		overlap = ComparisonTriangle(args)
+		for fusion in [fusion_1,fusion_2,fusion_3]:
+			experiment = FusionDetectionExperiment(fusion.dataset_name)
+			experiment.add_fusion(fusion)
+			overlap.add_experiment(experiment)
+		overlap.overlay_fusions()
+		
+		self.assertEqual(overlap.match_graph.num_edges(), 2)
+		
+		with open(output_file,"r") as fh:
+			lines = fh.read().strip().split("\n")
+		
+		self.assertEqual(len(lines), 2)
+		self.assertEqual(lines[1], "A\tX\tFALSE\t1=chr1:15000-chr2:60000\t2=chr1:15000-chr2:60000\t3=chr1:15000-chr2:60000")
+		
+		os.remove(output_file)
 
 
 def main():
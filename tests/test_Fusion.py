@@ -30,10 +30,16 @@ from fuma.Fusion import STRAND_REVERSE
 from fuma.Fusion import AD_DIRECTION_FORWARD
 from fuma.Fusion import AD_DIRECTION_REVERSE
 
+from fuma.Fusion import dataset_ids
+from fuma.Fusion import reset_dataset_ids
+
 
 from fuma.ParseBED import ParseBED
 from fuma.Fusion import Fusion
 from fuma.Gene import Gene
+from fuma.Gene import gene_ids
+from fuma.Gene import reset_gene_ids
+from fuma.MergedFusion import MergedFusion
 from fuma.GeneAnnotation import GeneAnnotation
 from fuma.GeneAnnotation import GeneAnnotation
 
@@ -45,6 +51,107 @@ class TestFusion(unittest.TestCase):
 		self.assertEqual( fusion_1.right_break_position , 15000 )
 		self.assertEqual( fusion_1.left_strand , STRAND_REVERSE )
 		self.assertEqual( fusion_1.right_strand , STRAND_FORWARD )
+	
+	def test_02(self):
+		"""Gene names are interned, so genes with the same name have the same id
+		"""
+		fusion_1 = Fusion("chr1","chrX",15000,15000,"-","+","Experiment_1","1",True)
+		
+		fusion_1.annotate_genes_left([Gene("A",False), Gene("B",False)])
+		fusion_1.annotate_genes_right([Gene("A",False)])
+		
+		self.assertEqual(len(fusion_1.get_gene_ids_left()), 2)
+		self.assertTrue(fusion_1.get_gene_ids_right().issubset(fusion_1.get_gene_ids_left()))
+		self.assertEqual(Gene("B",False).id, Gene("B",False).id)
+	
+	def test_03(self):
+		"""Datasets are tracked as bitmasks
+		"""
+		fusion_1 = Fusion("chr1","chrX",15000,15000,"-","+","Experiment_1","1",True)
+		fusion_2 = Fusion("chr1","chrX",15000,15000,"-","+","Experiment_1","2",True)
+		fusion_3 = Fusion("chr1","chrX",15000,15000,"-","+","Experiment_2","3",True)
+		
+		self.assertEqual(fusion_1.dataset_mask, fusion_2.dataset_mask)
+		self.assertEqual(fusion_1.dataset_mask & fusion_3.dataset_mask, 0)
+		self.assertEqual(fusion_1.get_dataset_statistics(), (1,0))
+		
+		fusion_1.matched_datasets |= fusion_3.tested_datasets
+		self.assertEqual(fusion_1.get_dataset_statistics(), (1,1))
+		
+		merged_fusion = MergedFusion()
+		merged_fusion.add_fusion(fusion_1)
+		merged_fusion.add_fusion(fusion_3)
+		
+		self.assertEqual(merged_fusion.dataset_mask, fusion_1.dataset_mask | fusion_3.dataset_mask)
+	
+	def test_04(self):
+		"""The bookkeeping of merges is only allocated when it is used
+		"""
+		fusion_1 = Fusion("chr1","chrX",15000,15000,"-","+","Experiment_1","1",True)
+		fusion_2 = Fusion("chr1","chrX",15000,15000,"-","+","Experiment_2","2",True)
+		
+		self.assertFalse(hasattr(fusion_1, "__dict__"))
+		self.assertRaises(AttributeError, setattr, fusion_1, "unknown_attribute", True)
+		
+		self.assertEqual(fusion_1.matches, set([fusion_1]))
+		self.assertEqual(fusion_1.matched_datasets, fusion_1.tested_datasets)
+		self.assertEqual(fusion_1._matches, None)
+		self.assertEqual(fusion_1._tested_datasets, None)
+		self.assertEqual(fusion_1._matched_datasets, None)
+		
+		fusion_1.matches = fusion_1.matches | fusion_2.matches
+		fusion_1.matched_datasets |= fusion_2.tested_datasets
+		
+		self.assertEqual(fusion_1.matches, set([fusion_1,fusion_2]))
+		self.assertEqual(len(fusion_1.locations()), 2)
+		self.assertEqual(fusion_1.get_dataset_statistics(), (1,1))
+		self.assertEqual(fusion_2.get_dataset_statistics(), (1,0))
+		
+		self.assertFalse(hasattr(Gene("A",False), "__dict__"))
+		self.assertFalse(hasattr(MergedFusion(), "__dict__"))
+	
+	def test_05(self):
+		"""Dataset ids do not accumulate over runs within one process
+		"""
+		# The ids are process-wide, so those of the other tests are restored
+		saved_dataset_ids = dict(dataset_ids)
+		try:
+			reset_dataset_ids()
+			
+			Fusion("chr1","chrX",15000,15000,"-","+","Experiment_1","1",True)
+			fusion_2 = Fusion("chr1","chrX",15000,15000,"-","+","Experiment_2","2",True)
+			self.assertNotEqual(fusion_2.dataset_mask, 1)
+			
+			reset_dataset_ids()
+			self.assertEqual(len(dataset_ids), 0)
+			
+			fusion_2 = Fusion("chr1","chrX",15000,15000,"-","+","Experiment_2","2",True)
+			self.assertEqual(fusion_2.dataset_mask, 1)
+		finally:
+			reset_dataset_ids()
+			dataset_ids.update(saved_dataset_ids)
+
+	
+	def test_06(self):
+		"""Gene ids do not accumulate over runs within one process
+		"""
+		# The ids are process-wide, so those of the other tests are restored
+		saved_gene_ids = dict(gene_ids)
+		try:
+			reset_gene_ids()
+			
+			Gene("A",False)
+			gene_b = Gene("B",False)
+			self.assertNotEqual(gene_b.id, 0)
+			
+			reset_gene_ids()
+			self.assertEqual(len(gene_ids), 0)
+			
+			gene_b = Gene("B",False)
+			self.assertEqual(gene_b.id, 0)
+		finally:
+			reset_gene_ids()
+			gene_ids.update(saved_gene_ids)
 
 def main():
 	unittest.main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+
+"""[License: GNU General Public License v3 (GPLv3)]
+ 
+ This file is part of FuMa.
+ 
+ FuMa is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+ 
+ FuMa is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+ Documentation as defined by:
+ <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
+"""
+
+import unittest,logging,sys,os
+logging.basicConfig(level=logging.DEBUG,format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",stream=sys.stdout)
+
+from fuma.Fusion import Fusion
+from fuma.Fusion import STRAND_FORWARD
+from fuma.Fusion import AD_DIRECTION_REVERSE
+from fuma.Gene import Gene
+from fuma.FusionColumns import FusionColumns
+from fuma.Readers import ReadChimeraScanAbsoluteBEDPE
+from fuma.ParseBED import ParseBED
+from fuma.ComparisonTriangle import ComparisonTriangle
+from fuma.CLI import CLI
+
+
+
+def match_files_unsorted(filename_1, filename_2):
+	fh1 = open(filename_1,"r")
+	content1 = fh1.read().split("\n")
+	fh1.close()
+	
+	fh2 = open(filename_2,"r")
+	content2 = fh2.read().split("\n")
+	fh2.close()
+	
+	content1.sort()
+	content2.sort()
+	
+	if len(content1) == len(content2):
+		for i in range(len(content1)):
+			if content1[i] != content2[i]:
+				return False
+		
+		return True
+	else:
+		return False
+
+
+class TestFusionColumns(unittest.TestCase):
+	def test_01(self):
+		gene_A = Gene("A", False)
+		gene_B = Gene("B", False)
+		gene_X = Gene("X", False)
+		
+		fusion_1 = Fusion("chr1","chr2",15000,60000,"+",None,"Experiment_1","1",True)
+		fusion_2 = Fusion("chr1","chr2",16000,61000,None,"-","Experiment_1","2",False)
+		fusion_3 = Fusion("chr1","chr2",17000,62000,"+","+","Experiment_1","3",True)
+		fusion_4 = Fusion("chr1","chr3",17000,62000,"+","+","Experiment_1","4",True)
+		
+		fusion_2.acceptor_donor_direction = AD_DIRECTION_REVERSE
+		fusion_2.support = 12
+		
+		fusion_1.annotate_genes_left([gene_A,gene_B])
+		fusion_1.annotate_genes_right([gene_X])
+		fusion_2.annotate_genes_left([gene_A,gene_B])
+		fusion_2.annotate_genes_right([gene_X])
+		
+		# fusion_1 has merged fusion_3 as duplicate
+		fusion_1.matches = set([fusion_1,fusion_3])
+		
+		fusion_5 = Fusion("chr1","chr3",17000,62000,"+","+","Experiment_2","5",True)
+		
+		fusions = FusionColumns()
+		fusions.append(fusion_1)
+		fusions.append(fusion_2)
+		fusions.append(fusion_4)
+		
+		self.assertEqual(len(fusions), 3)
+		self.assertEqual(len(fusions.uids), 4)
+		self.assertEqual(len(fusions.gene_sets), 2)
+		self.assertEqual(fusions.chromosomes, ["1","2","3"])
+		
+		self.assertRaises(Exception, fusions.append, fusion_5)
+		
+		view_1 = fusions[0]
+		self.assertEqual(view_1.get_left_chromosome(), "1")
+		self.assertEqual(view_1.get_left_break_position(), 15000)
+		self.assertEqual(view_1.get_right_break_position(), 60000)
+		self.assertEqual(view_1.left_strand, STRAND_FORWARD)
+		self.assertEqual(view_1.right_strand, None)
+		self.assertEqual(view_1.get_gene_ids_left(), fusion_1.get_gene_ids_left())
+		self.assertEqual(sorted([location['id'] for location in view_1.locations()]), ["1","3"])
+		
+		view_2 = fusions[1]
+		self.assertEqual(view_2.uid, "2")
+		self.assertEqual(view_2.left_strand, None)
+		self.assertEqual(view_2.acceptor_donor_direction, AD_DIRECTION_REVERSE)
+		self.assertEqual(view_2.support, 12)
+		self.assertEqual(view_1.support, None)
+		self.assertEqual(len(view_2.matches), 1)
+		
+		# Changes have to be written back
+		view_2.annotate_genes_right([])
+		self.assertEqual(fusions[1].annotated_genes_right, [gene_X])
+		fusions[1] = view_2
+		self.assertEqual(fusions[1].annotated_genes_right, [])
+		
+		self.assertEqual([fusion.uid for fusion in fusions], ["1","2","4"])
+		self.assertEqual([fusion.uid for fusion in fusions[1:]], ["2","4"])
+		self.assertEqual(fusions[2].get_right_chromosome(), "3")
+	
+	def test_02(self):
+		"""Same as test_ComparisonTriangle.test_01, using columnar storage
+		"""
+		output_file = 'test_FusionColumns.test_02.output.txt'
+		validation_file = 'tests/data/test_Functional.test_01.output.txt'
+		
+		args = CLI(['-m','subset','--no-strand-specific-matching','--columnar-storage','-s','','-o',output_file])
+		
+		experiments = [ReadChimeraScanAbsoluteBEDPE("tests/data/test_Functional.test_01.Example_0"+str(i)+".bedpe","test"+str(i),columnar_storage=True) for i in range(1,5)]
+		
+		self.assertEqual([len(experiment) for experiment in experiments], [2,2,3,3])
+		
+		genes = ParseBED("tests/data/refseq_hg19.bed","hg19",200000)
+		
+		overlap = ComparisonTriangle(args)
+		for experiment in experiments:
+			self.assertTrue(isinstance(experiment.fusions, FusionColumns))
+			
+			experiment.annotate_genes(genes)
+			experiment.remove_duplicates(args)
+			overlap.add_experiment(experiment)
+		
+		overlap.overlay_fusions()
+		
+		files_identical = match_files_unsorted(output_file,validation_file)
+		self.assertTrue(files_identical)
+		
+		if files_identical:
+			os.remove(output_file)
+
+def main():
+	unittest.main()
+
+if __name__ == '__main__':
+	main()
@@ -21,7 +21,7 @@
  <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
 """
 
-import unittest,logging,sys
+import unittest,logging,sys,gc,weakref
 logging.basicConfig(level=logging.DEBUG,format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",stream=sys.stdout)
 
 from fuma.Readers import ReadChimeraScanAbsoluteBEDPE
@@ -30,6 +30,7 @@ from fuma.FusionDetectionExperiment import FusionDetectionExperiment
 from fuma.Fusion import Fusion
 from fuma.Gene import Gene
 from fuma.CLI import CLI
+from fuma.BulkLoad import BulkLoad
 
 class TestFusionDetectionExperiment(unittest.TestCase):
 	def test_01(self):
@@ -563,6 +564,102 @@ class TestFusionDetectionExperiment(unittest.TestCase):
 		self.assertEqual(len(experiment_4), 2)
 		self.assertEqual(len(experiment_5), 2)
 		self.assertEqual(len(experiment_6), 2)
+	
+	def test_14(self):
+		"""
+		EGM duplication removal is grouped on the gene sets and, with
+		strand-specific matching, on the strands:
+		
+		f1: [A] -> [X] (+,+)
+		f2: [A] -> [X] (-,+)
+		f3: [A] -> [X] (+,+)
+		f4: [A,B] -> [X] (+,+)
+		"""
+		gene_A = Gene("A", False)
+		gene_B = Gene("B", False)
+		gene_X = Gene("X", False)
+		
+		for strand_specific_matching,n_unique in [('--strand-specific-matching',3),('--no-strand-specific-matching',2)]:
+			args = CLI(['-m','egm',strand_specific_matching,'-s',''])
+			
+			fusion_1 = Fusion("chr1","chr2",15000,20000,"+","+","Experiment","1",True)
+			fusion_2 = Fusion("chr1","chr2",15000,20000,"-","+","Experiment","2",True)
+			fusion_3 = Fusion("chr1","chr2",15000,20000,"+","+","Experiment","3",True)
+			fusion_4 = Fusion("chr1","chr2",15000,20000,"+","+","Experiment","4",True)
+			
+			experiment = FusionDetectionExperiment("Experiment")
+			for fusion in [fusion_1,fusion_2,fusion_3,fusion_4]:
+				fusion.annotate_genes_left([gene_A])
+				fusion.annotate_genes_right([gene_X])
+				experiment.add_fusion(fusion)
+			fusion_4.annotate_genes_left([gene_A,gene_B])
+			
+			experiment.genes_spanning_left_junction = [gene_A,gene_B]
+			experiment.genes_spanning_right_junction = [gene_X]
+			experiment.remove_duplicates(args)
+			
+			self.assertEqual(len(experiment), n_unique)
+			self.assertEqual(fusion_1.matches, set([fusion_1,fusion_3]) if n_unique == 3 else set([fusion_1,fusion_2,fusion_3]))
+			
+			if n_unique == 2:
+				# The strands differ, so they become unknown
+				self.assertEqual(fusion_1.left_strand, None)
+	
+	def test_15(self):
+		"""Experiments, including their merged duplicates, do not form
+		reference cycles and are freed without the cyclic garbage collector
+		"""
+		args = CLI(['-m','subset','--no-strand-specific-matching','-s',''])
+		
+		gc.collect()
+		gc.disable()
+		try:
+			with BulkLoad():
+				experiment = ReadChimeraScanAbsoluteBEDPE("tests/data/test_FusionDetectionExperiment.TestFusionDetectionExperiment.test_01.bedpe","TestExperiment")
+				genes = ParseBED("tests/data/test_FusionDetectionExperiment.TestFusionDetectionExperiment.test_01.bed","hg18", 200000)
+			
+			self.assertFalse(gc.isenabled())
+			
+			experiment.annotate_genes(genes)
+			length_before_duplication_removal = len(experiment)
+			experiment.remove_duplicates(args)
+			
+			self.assertTrue(len(experiment) < length_before_duplication_removal)
+			for fusion in experiment:
+				self.assertFalse(fusion in fusion._matches if fusion._matches else False)
+			
+			reference = weakref.ref(experiment)
+			del(experiment)
+			
+			self.assertEqual(reference(), None)
+		finally:
+			gc.enable()
+	
+	def test_16(self):
+		"""Fusions are kept in a table in the order in which they were
+		added; the chromosome pairs refer to ranges within it
+		"""
+		experiment = FusionDetectionExperiment("Experiment")
+		
+		fusions = []
+		for left_chr, right_chr in [("chr1","chr2"),("chr1","chr2"),("chr3","chr4"),("chr1","chr2"),("chr3","chr4"),("chr3","chr4")]:
+			fusion = Fusion(left_chr,right_chr,15000,20000,"+","+","Experiment",str(len(fusions)),True)
+			self.assertEqual(experiment.add_fusion(fusion), len(fusions))
+			fusions.append(fusion)
+		
+		self.assertEqual(len(experiment), 6)
+		self.assertEqual(experiment[3], fusions[3])
+		self.assertEqual(experiment[2:4], fusions[2:4])
+		self.assertEqual([fusion for fusion in experiment], fusions)
+		
+		self.assertEqual(experiment.index["1"]["2"], [[0,2],[3,4]])
+		self.assertEqual(experiment.index["3"]["4"], [[2,3],[4,6]])
+		
+		self.assertEqual(experiment.get_chromosome_pairs(), [("1","2"),("3","4")])
+		self.assertEqual(experiment.get_fusion_ids("1","2"), [0,1,3])
+		self.assertEqual(experiment.get_fusion_ids("3","4"), [2,4,5])
+		self.assertEqual(experiment.get_fusion_ids("1","4"), [])
+
 
 def main():
 	unittest.main()
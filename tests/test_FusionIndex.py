@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+"""[License: GNU General Public License v3 (GPLv3)]
+ 
+ This file is part of FuMa.
+ 
+ FuMa is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+ 
+ FuMa is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+ Documentation as defined by:
+ <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
+"""
+
+import unittest,logging,sys
+logging.basicConfig(level=logging.DEBUG,format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",stream=sys.stdout)
+
+from fuma.Fusion import Fusion
+from fuma.Gene import Gene
+from fuma.FusionIndex import FusionIndex
+
+class TestFusionIndex(unittest.TestCase):
+	def test_01(self):
+		"""
+		f1: [A,B] -> [X]
+		f2: [B,C] -> [X]
+		f3: [B]   -> [Y]
+		f4: [C]   -> [X]
+		f5: (not annotated)
+		"""
+		gene_A = Gene("A", False)
+		gene_B = Gene("B", False)
+		gene_C = Gene("C", False)
+		gene_X = Gene("X", False)
+		gene_Y = Gene("Y", False)
+		
+		fusion_1 = Fusion("chr1","chr2",15000,60000,"+","+","Experiment_1","1",True)
+		fusion_2 = Fusion("chr1","chr2",15000,60000,"+","+","Experiment_2","2",True)
+		fusion_3 = Fusion("chr1","chr2",15000,60000,"+","+","Experiment_3","3",True)
+		fusion_4 = Fusion("chr1","chr3",15000,60000,"+","+","Experiment_4","4",True)
+		fusion_5 = Fusion("chr1","chr2",15000,60000,"+","+","Experiment_5","5",True)
+		
+		fusion_1.annotate_genes_left([gene_A,gene_B])
+		fusion_2.annotate_genes_left([gene_B,gene_C])
+		fusion_3.annotate_genes_left([gene_B])
+		fusion_4.annotate_genes_left([gene_C])
+		
+		fusion_1.annotate_genes_right([gene_X])
+		fusion_2.annotate_genes_right([gene_X])
+		fusion_3.annotate_genes_right([gene_Y])
+		fusion_4.annotate_genes_right([gene_X])
+		
+		fusion_index = FusionIndex()
+		for fusion in [fusion_1,fusion_2,fusion_3,fusion_4,fusion_5]:
+			fusion_index.add_fusion(fusion)
+		
+		self.assertEqual(len(fusion_index), 5)
+		self.assertEqual(fusion_index[4], fusion_5)
+		
+		# Gene-name based, so f4 (on another chromosome) is a candidate as well
+		self.assertEqual([pair for pair in fusion_index.find_pairs()], [(1,0),(3,1)])
+		
+		self.assertEqual(fusion_index.find_matches(fusion_2), [0,1,3])
+		self.assertEqual(fusion_index.find_matches(fusion_3), [2])
+		self.assertEqual(fusion_index.find_matches(fusion_5), [])
+	
+	def test_02(self):
+		"""
+		f1: [A,B]   -> [X]
+		f2: [A,B,C] -> [X,Y]
+		f3: [B]     -> [X,Y]
+		f4: [A,C]   -> [X]
+		f5: [A,B]   -> [X]
+		
+		f4 is no subset of f1, nor the other way around
+		"""
+		gene_A = Gene("A", False)
+		gene_B = Gene("B", False)
+		gene_C = Gene("C", False)
+		gene_X = Gene("X", False)
+		gene_Y = Gene("Y", False)
+		
+		fusions = []
+		for genes_left,genes_right in [([gene_A,gene_B],[gene_X]), ([gene_A,gene_B,gene_C],[gene_X,gene_Y]), ([gene_B],[gene_X,gene_Y]), ([gene_A,gene_C],[gene_X]), ([gene_A,gene_B],[gene_X])]:
+			fusion = Fusion("chr1","chr2",15000,60000,"+","+","Experiment_"+str(len(fusions)),str(len(fusions)),True)
+			fusion.annotate_genes_left(genes_left)
+			fusion.annotate_genes_right(genes_right)
+			fusions.append(fusion)
+		
+		fusion_index = FusionIndex()
+		for fusion in fusions:
+			fusion_index.add_fusion(fusion)
+		
+		self.assertEqual(fusion_index.find_subset_pairs(), [(1,0),(2,0),(2,1),(3,1),(4,0),(4,1),(4,2)])
+
+def main():
+	unittest.main()
+
+if __name__ == '__main__':
+	main()
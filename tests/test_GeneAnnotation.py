@@ -21,11 +21,15 @@
  <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
 """
 
-import unittest,logging,sys
+import unittest,logging,sys,tempfile,shutil,os
 logging.basicConfig(level=logging.DEBUG,format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",stream=sys.stdout)
 
+import HTSeq
+import numpy
+
 from fuma.Gene import Gene
 from fuma.GeneAnnotation import GeneAnnotation
+from fuma.ParseBED import ParseBED
 
 class TestGeneAnnotation(unittest.TestCase):
 	def test_01(self):
@@ -42,6 +46,160 @@ class TestGeneAnnotation(unittest.TestCase):
 		genes.add_annotation(gene_04,"chr3",12,20)
 		
 		self.assertEqual(len(genes), 4)
+	
+	def test_02(self):
+		"""The sweep-line annotation gives the same genes as get_annotations()
+		"""
+		genes = GeneAnnotation("hg18")
+		
+		gene_01 = Gene("ucsc.1", False)
+		gene_02 = Gene("ucsc.2", False)
+		gene_03 = Gene("ucsc.3", False)
+		gene_04 = Gene("ucsc.4", False)
+		
+		genes.add_annotation(gene_03,"chr3",12,18)
+		genes.add_annotation(gene_01,"chr3",10,15)
+		genes.add_annotation(gene_02,"chr3",11,16)
+		genes.add_annotation(gene_04,"chr3",30,40)
+		
+		positions = [0,10,11,12,12,15,16,17,18,25,30,39,40,100]
+		annotations = [annotation for annotation in genes.get_annotations_sorted("chr3",positions)]
+		
+		self.assertEqual(len(annotations), len(positions))
+		for i in range(len(positions)):
+			self.assertEqual(set(annotations[i]), set(genes.get_annotations("chr3",positions[i])))
+		
+		self.assertEqual(set(annotations[3]), set([gene_01,gene_02,gene_03]))
+		self.assertEqual(annotations[9], [])
+		
+		self.assertEqual([annotation for annotation in genes.get_annotations_sorted("chr4",[10,20])], [[],[]])
+	
+	def test_03(self):
+		"""Annotations are cached, and reused by a later run with the same
+		annotation file
+		"""
+		directory = tempfile.mkdtemp()
+		try:
+			genes = ParseBED("tests/data/refseq_hg19.bed","hg19",200000)
+			genes.enable_cache(1000,directory)
+			
+			positions = [62910000,62910000,62910001,65116155]
+			annotations = [annotation for annotation in genes.get_annotations_sorted("11",positions)]
+			self.assertEqual((genes.cache.hits,genes.cache.misses), (1,3))
+			
+			self.assertEqual(set(genes.get_annotations("11",62910001)), set(annotations[2]))
+			self.assertEqual((genes.cache.hits,genes.cache.misses), (2,3))
+			
+			self.assertEqual(len(set(genes.get_annotations("11",500)) ^ set(genes.gas[HTSeq.GenomicPosition("11",500)])), 0)
+			self.assertEqual((genes.cache.hits,genes.cache.misses), (2,4))
+			
+			genes.flush_cache()
+			self.assertEqual(len(os.listdir(directory)), 1)
+			
+			genes_2 = ParseBED("tests/data/refseq_hg19.bed","hg19",200000)
+			genes_2.enable_cache(1000,directory)
+			
+			self.assertEqual(len(genes_2.cache), 4)
+			annotations_2 = [annotation for annotation in genes_2.get_annotations_sorted("11",positions)]
+			self.assertEqual((genes_2.cache.hits,genes_2.cache.misses), (4,0))
+			
+			for i in range(len(positions)):
+				self.assertEqual(sorted([gene.name for gene in annotations[i]]), sorted([gene.name for gene in annotations_2[i]]))
+				for gene in annotations_2[i]:
+					self.assertTrue(gene in genes_2.genes)
+		finally:
+			shutil.rmtree(directory)
+
+	def test_04(self):
+		"""The numpy backend gives the same genes as the htseq backend
+		"""
+		genes_htseq = ParseBED("tests/data/refseq_hg19.bed","hg19",200000)
+		genes_numpy = ParseBED("tests/data/refseq_hg19.bed","hg19",200000,"numpy")
+		
+		self.assertEqual(len(genes_numpy), len(genes_htseq))
+		self.assertEqual(sorted([str(gene) for gene in genes_numpy]), sorted([str(gene) for gene in genes_htseq]))
+		
+		positions = [500,62910000,62910001,62914999,65116155,65265233,65265234,134000000]
+		
+		for chromosome in ["11","X","unknown"]:
+			annotations_htseq = [annotation for annotation in genes_htseq.get_annotations_sorted(chromosome,positions)]
+			annotations_numpy = [annotation for annotation in genes_numpy.get_annotations_sorted(chromosome,positions)]
+			
+			for i in range(len(positions)):
+				names = sorted([gene.name for gene in annotations_htseq[i]])
+				
+				self.assertEqual(sorted([gene.name for gene in annotations_numpy[i]]), names)
+				self.assertEqual(sorted([gene.name for gene in genes_numpy.get_annotations(chromosome,positions[i])]), names)
+		
+		self.assertRaises(Exception, GeneAnnotation, "hg19", "unknown")
+
+	def test_05(self):
+		"""The batch query gives the same genes as get_annotations(),
+		for positions in any order
+		"""
+		positions = [65265234,500,62910001,62910000,65116155,62914999,134000000,62910000]
+		
+		for backend in ["htseq","numpy"]:
+			genes = ParseBED("tests/data/refseq_hg19.bed","hg19",200000,backend)
+			
+			for chromosome in ["11","unknown"]:
+				offsets, numbers = genes.get_annotations_batch(chromosome,numpy.array(positions))
+				
+				self.assertEqual(len(offsets), len(positions) + 1)
+				self.assertEqual(offsets[-1], len(numbers))
+				for i in range(len(positions)):
+					self.assertEqual(sorted([genes.genes[j].name for j in numbers[offsets[i]:offsets[i + 1]]]), sorted([gene.name for gene in genes.get_annotations(chromosome,positions[i])]))
+			
+			offsets, numbers = genes.get_annotations_batch("11",[62910000])
+			self.assertTrue(len(numbers) > 0)
+			
+			offsets, numbers = genes.get_annotations_batch("unknown",[62910000])
+			self.assertEqual(len(numbers), 0)
+
+	def test_06(self):
+		"""All intervals of a gene name share one Gene, which is a long gene
+		if any of its intervals is
+		"""
+		for backend in ["htseq","numpy"]:
+			genes = GeneAnnotation("hg18",backend)
+			
+			genes.add_annotation(Gene("ucsc.1", False),"chr3",10,15)
+			genes.add_gene_annotation("ucsc.2",False,"chr3",11,16)
+			genes.add_gene_annotation("ucsc.1",True,"chr3",100,1000)
+			genes.add_gene_annotation("ucsc.1",False,"chr4",10,15)
+			
+			self.assertEqual(len(genes), 4)
+			self.assertEqual(len(genes.genes), 2)
+			
+			gene_01 = list(genes.get_annotations("chr3",12))
+			gene_01 = [gene for gene in gene_01 if gene.name == "ucsc.1"][0]
+			
+			self.assertTrue(gene_01.is_long_gene)
+			self.assertTrue(gene_01 is list(genes.get_annotations("chr3",500))[0])
+			self.assertTrue(gene_01 is list(genes.get_annotations("chr4",10))[0])
+			self.assertFalse([gene for gene in genes.get_annotations("chr3",12) if gene.name == "ucsc.2"][0].is_long_gene)
+	
+	def test_07(self):
+		"""A gene with two overlapping transcripts is annotated once per
+		position by every backend and query
+		"""
+		positions = [5,12,14,16,21,30]
+		expected = [[],["ucsc.1"],["ucsc.1","ucsc.2"],["ucsc.1","ucsc.2"],["ucsc.1"],[]]
+		
+		for backend in ["htseq","numpy"]:
+			genes = GeneAnnotation("hg18",backend)
+			
+			genes.add_gene_annotation("ucsc.1",False,"chr3",10,20)
+			genes.add_gene_annotation("ucsc.2",False,"chr3",13,18)
+			genes.add_gene_annotation("ucsc.1",False,"chr3",11,25)
+			
+			annotations = [annotation for annotation in genes.get_annotations_sorted("chr3",positions)]
+			offsets, numbers = genes.get_annotations_batch("chr3",positions)
+			
+			for i in range(len(positions)):
+				self.assertEqual(sorted([gene.name for gene in genes.get_annotations("chr3",positions[i])]), expected[i])
+				self.assertEqual(sorted([gene.name for gene in annotations[i]]), expected[i])
+				self.assertEqual(sorted([genes.genes[j].name for j in numbers[offsets[i]:offsets[i + 1]]]), expected[i])
 
 def main():
 	unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+"""[License: GNU General Public License v3 (GPLv3)]
+ 
+ This file is part of FuMa.
+ 
+ FuMa is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+ 
+ FuMa is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+ Documentation as defined by:
+ <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
+"""
+
+import unittest,logging,sys,tempfile,shutil,os
+logging.basicConfig(level=logging.DEBUG,format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",stream=sys.stdout)
+
+from fuma.ParseBED import ParseBED
+from fuma.IndexedAnnotation import IndexedAnnotation
+
+class TestIndexedAnnotation(unittest.TestCase):
+	def test_01(self):
+		"""The index gives the same genes as the BED file it was built from
+		"""
+		directory = tempfile.mkdtemp()
+		try:
+			inputfile = "tests/data/refseq_hg19.bed"
+			indexfile = os.path.join(directory,"refseq_hg19.idx")
+			
+			command = "export PYTHONPATH=$PYTHONPATH\":fuma:../fuma\" ;\n\n"	# ensure the fuma lib is accessible for testing (also without installation)
+			command += ("bin/fuma-index-annotation \\\n"
+						"   -o "+indexfile+" "+inputfile
+						)
+			os.popen(command).read()
+			
+			self.assertTrue(IndexedAnnotation.is_index(indexfile))
+			self.assertFalse(IndexedAnnotation.is_index(inputfile))
+			
+			genes_bed = ParseBED(inputfile,"hg19",200000)
+			genes_index = IndexedAnnotation(indexfile,"hg19",200000)
+			
+			self.assertEqual(len(genes_index), len(genes_bed))
+			self.assertEqual(genes_index.checksum, genes_bed.checksum)
+			self.assertEqual(sorted([str(gene) for gene in genes_index]), sorted([str(gene) for gene in genes_bed]))
+			
+			positions = [500,62910000,62910001,62914999,65116155,65265233,65265234,134000000]
+			for chromosome in ["11","X","unknown"]:
+				annotations_bed = [annotation for annotation in genes_bed.get_annotations_sorted(chromosome,positions)]
+				annotations_index = [annotation for annotation in genes_index.get_annotations_sorted(chromosome,positions)]
+				
+				for i in range(len(positions)):
+					self.assertEqual(sorted([(gene.name,gene.is_long_gene) for gene in annotations_index[i]]), sorted([(gene.name,gene.is_long_gene) for gene in annotations_bed[i]]))
+			
+			# Genes are only created once
+			gene = list(genes_index.get_annotations("11",62910000))[0]
+			self.assertTrue(gene in genes_index.get_annotations("11",62910001))
+		finally:
+			shutil.rmtree(directory)
+	
+	def test_02(self):
+		"""Long genes are marked using the long gene size given when the
+		index is opened
+		"""
+		directory = tempfile.mkdtemp()
+		try:
+			indexfile = os.path.join(directory,"refseq_hg19.idx")
+			IndexedAnnotation.write(ParseBED("tests/data/refseq_hg19.bed","hg19",0,"numpy"),indexfile)
+			
+			long_genes = [gene.name for gene in IndexedAnnotation(indexfile,"hg19",200000) if gene.is_long_gene]
+			self.assertEqual(sorted(long_genes), sorted([gene.name for gene in ParseBED("tests/data/refseq_hg19.bed","hg19",200000) if gene.is_long_gene]))
+			self.assertTrue(len(long_genes) > 0)
+			
+			self.assertEqual([gene for gene in IndexedAnnotation(indexfile,"hg19",0) if gene.is_long_gene], [])
+			
+			self.assertRaises(Exception, IndexedAnnotation.write, ParseBED("tests/data/refseq_hg19.bed","hg19",0), indexfile)
+		finally:
+			shutil.rmtree(directory)
+
+def main():
+	unittest.main()
+
+if __name__ == '__main__':
+	main()
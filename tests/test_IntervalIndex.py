@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+"""[License: GNU General Public License v3 (GPLv3)]
+ 
+ This file is part of FuMa.
+ 
+ FuMa is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+ 
+ FuMa is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+ Documentation as defined by:
+ <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
+"""
+
+import unittest,logging,sys
+logging.basicConfig(level=logging.DEBUG,format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",stream=sys.stdout)
+
+from fuma.IntervalIndex import IntervalIndex
+
+class TestIntervalIndex(unittest.TestCase):
+	def test_01(self):
+		"""Intervals are half-open and a long interval that starts first
+		does not hide the shorter ones after it
+		"""
+		index = IntervalIndex()
+		
+		index.add("3",30,40,"d")
+		index.add("3",10,100,"a")
+		index.add("3",11,16,"b")
+		index.add("3",12,18,"c")
+		
+		self.assertEqual(len(index), 4)
+		
+		self.assertEqual(index.find("3",9), [])
+		self.assertEqual(index.find("3",10), ["a"])
+		self.assertEqual(index.find("3",12), ["a","b","c"])
+		self.assertEqual(index.find("3",16), ["a","c"])
+		self.assertEqual(index.find("3",25), ["a"])
+		self.assertEqual(index.find("3",30), ["a","d"])
+		self.assertEqual(index.find("3",40), ["a"])
+		self.assertEqual(index.find("3",100), [])
+		self.assertEqual(index.find("4",12), [])
+		
+		positions = [9,10,12,16,25,30,40,100]
+		self.assertEqual(index.find_all("3",positions), [index.find("3",position) for position in positions])
+		self.assertEqual(index.find_all("4",positions), [[]] * len(positions))
+		
+		self.assertEqual(index.get_items("3"), ["a","b","c","d"])
+	
+	def test_02(self):
+		"""Intervals can be added after a chromosome was queried
+		"""
+		index = IntervalIndex()
+		
+		index.add("1",10,20,"a")
+		self.assertEqual(index.find("1",15), ["a"])
+		
+		index.add("1",5,16,"b")
+		index.add("2",5,16,"c")
+		self.assertEqual(index.find("1",15), ["b","a"])
+		self.assertEqual(index.get_chromosomes(), ["1","2"])
+		
+		self.assertRaises(Exception, index.add, "1", 20, 20, "d")
+	
+	def test_03(self):
+		"""An item with overlapping intervals is found once per position
+		"""
+		index = IntervalIndex()
+		
+		index.add("1",10,30,"a")
+		index.add("1",15,20,"b")
+		index.add("1",12,25,"a")
+		index.add("1",40,50,"a")
+		
+		self.assertEqual(index.find("1",11), ["a"])
+		self.assertEqual(index.find("1",16), ["a","b"])
+		self.assertEqual(index.find("1",26), ["a"])
+		
+		positions = [16,11,45,16,26,35]
+		self.assertEqual(index.find_all("1",positions), [["a","b"],["a"],["a"],["a","b"],["a"],[]])
+		
+		offsets, items = index.find_batch("1",positions)
+		self.assertEqual(offsets.tolist(), [0,2,3,4,6,7,7])
+
+def main():
+	unittest.main()
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+"""[License: GNU General Public License v3 (GPLv3)]
+ 
+ This file is part of FuMa.
+ 
+ FuMa is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+ 
+ FuMa is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+ Documentation as defined by:
+ <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
+"""
+
+import unittest,logging,sys
+logging.basicConfig(level=logging.DEBUG,format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",stream=sys.stdout)
+
+from fuma.MatchGraph import MatchGraph
+
+def extend_any(state,node):
+	"""Every clique is consistent"""
+	return True
+
+class TestMatchGraph(unittest.TestCase):
+	def test_01(self):
+		"""
+		0 - 1
+		| \\ |
+		3 - 2   4 - 5
+		"""
+		graph = MatchGraph()
+		graph.add_edge(1,0)
+		graph.add_edge(2,0)
+		graph.add_edge(2,1)
+		graph.add_edge(3,0)
+		graph.add_edge(3,2)
+		graph.add_edge(5,4)
+		
+		self.assertEqual(len(graph), 6)
+		self.assertEqual(graph.num_edges(), 6)
+		
+		cliques = sorted(graph.find_maximal_consistent_cliques(extend_any))
+		self.assertEqual(cliques, [[0,1,2],[0,2,3],[4,5]])
+	
+	def test_02(self):
+		"""
+		Square without diagonals: only the edges are cliques
+		"""
+		graph = MatchGraph()
+		graph.add_edge(1,0)
+		graph.add_edge(2,1)
+		graph.add_edge(3,2)
+		graph.add_edge(3,0)
+		
+		cliques = sorted(graph.find_maximal_consistent_cliques(extend_any))
+		self.assertEqual(cliques, [[0,1],[0,3],[1,2],[2,3]])
+	
+	def test_03(self):
+		"""
+		Triangle of which the nodes are pairwise, but not as a whole,
+		consistent: {A,B} {B,C} {A,C}
+		"""
+		genes = {0:frozenset(["A","B"]), 1:frozenset(["B","C"]), 2:frozenset(["A","C"])}
+		
+		def extend(state,node):
+			if state == None:
+				return genes[node]
+			
+			state = state & genes[node]
+			if len(state) == 0:
+				return None
+			return state
+		
+		graph = MatchGraph()
+		graph.add_edge(1,0)
+		graph.add_edge(2,0)
+		graph.add_edge(2,1)
+		
+		self.assertEqual(sorted(graph.find_maximal_consistent_cliques(extend_any)), [[0,1,2]])
+		self.assertEqual(sorted(graph.find_maximal_consistent_cliques(extend)), [[0,1],[0,2],[1,2]])
+	
+	def test_04(self):
+		graph = MatchGraph()
+		self.assertRaises(Exception, graph.add_edge, 1, 1)
+		self.assertEqual(list(graph.find_maximal_consistent_cliques(extend_any)), [])
+	
+	def test_05(self):
+		"""
+		Nodes 3 and 4 are added to the cliques [0,1] and [2]-[1]:
+		
+		0 - 1 - 2
+		 \ / \ /
+		  3   4
+		"""
+		graph = MatchGraph()
+		graph.add_edge(1,0)
+		graph.add_edge(2,1)
+		
+		graph.add_edge(3,0)
+		graph.add_edge(3,1)
+		graph.add_edge(4,1)
+		graph.add_edge(4,2)
+		
+		self.assertFalse(graph.is_maximal([0,1],extend_any))
+		self.assertFalse(graph.is_maximal([1,2],extend_any))
+		self.assertTrue(graph.is_maximal([0,1,3],extend_any))
+		
+		cliques = sorted(graph.find_maximal_cliques_containing([3,4],extend_any))
+		self.assertEqual(cliques, sorted(graph.find_maximal_consistent_cliques(extend_any)))
+		self.assertEqual(cliques, [[0,1,3],[1,2,4]])
+
+def main():
+	unittest.main()
+
+if __name__ == '__main__':
+	main()
@@ -64,6 +64,24 @@ class TestMergedFusion(unittest.TestCase):
 		#mf_a.merge(mf_b)
 		#del(mf_b)
 		#self.assertEqual(len(mf_a), 4)
+	
+	def test_02(self):
+		experiment_a = ReadChimeraScanAbsoluteBEDPE("tests/data/test_Functional.test_01.Example_01.bedpe","test1")
+		fusions = [fusion for fusion in experiment_a]
+		
+		mf_a = MergedFusion()
+		mf_a.add_fusion(fusions[0])
+		mf_a.add_fusion(fusions[1])
+		
+		mf_b = MergedFusion()
+		mf_b.add_fusion(fusions[1])
+		mf_b.add_fusion(fusions[0])
+		
+		mf_c = MergedFusion()
+		mf_c.add_fusion(fusions[0])
+		
+		self.assertEqual(mf_a.get_key(), mf_b.get_key())
+		self.assertNotEqual(mf_a.get_key(), mf_c.get_key())
 
 
 
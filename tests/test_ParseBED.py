@@ -21,7 +21,7 @@
  <http://epydoc.sourceforge.net/manual-fields.html#fields-synonyms>
 """
 
-import unittest,logging,sys
+import unittest,logging,sys,tempfile,shutil,os
 logging.basicConfig(level=logging.DEBUG,format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",stream=sys.stdout)
 
 from fuma.ParseBED import ParseBED
@@ -32,6 +32,51 @@ class TestParseBED(unittest.TestCase):
 		gene_annotation = ParseBED(filename, "test", 200000)
 		
 		self.assertEqual(gene_annotation.n , 88)
+	
+	def test_02(self):
+		"""Lazily loaded chromosomes give the same genes, numbered in the
+		same order, as parsing the entire file
+		"""
+		directory = tempfile.mkdtemp()
+		try:
+			filename = os.path.join(directory,"refseq_hg19.bed")
+			shutil.copy("tests/data/refseq_hg19.bed",filename)
+			
+			for backend in ["htseq","numpy"]:
+				gene_annotation = ParseBED(filename, "test", 200000, backend)
+				gene_annotation_lazy = ParseBED(filename, "test", 200000, backend, True)
+				
+				self.assertTrue(os.path.isfile(filename+".fuma-block-index"))
+				self.assertEqual(len(gene_annotation_lazy), len(gene_annotation))
+				self.assertEqual(gene_annotation_lazy.checksum, gene_annotation.checksum)
+				self.assertTrue("11" in gene_annotation_lazy.unloaded_chromosomes)
+				
+				positions = [500,62910000,62910001,65116155]
+				annotations = [annotation for annotation in gene_annotation.get_annotations_sorted("11",positions)]
+				annotations_lazy = [annotation for annotation in gene_annotation_lazy.get_annotations_sorted("11",positions)]
+				for i in range(len(positions)):
+					self.assertEqual(sorted([gene.name for gene in annotations_lazy[i]]), sorted([gene.name for gene in annotations[i]]))
+				
+				self.assertFalse("11" in gene_annotation_lazy.unloaded_chromosomes)
+				self.assertTrue("X" in gene_annotation_lazy.unloaded_chromosomes)
+				
+				# Accessing a gene loads its chromosome
+				self.assertEqual(len(gene_annotation_lazy.genes), len(gene_annotation.genes))
+				for i in [0,100,len(gene_annotation.genes)-1]:
+					self.assertEqual(gene_annotation_lazy.genes[i].name, gene_annotation.genes[i].name)
+				
+				self.assertEqual(sorted([str(gene) for gene in gene_annotation_lazy]), sorted([str(gene) for gene in gene_annotation]))
+				self.assertEqual(len(gene_annotation_lazy.unloaded_chromosomes), 0)
+			
+			# A changed file gets a new block index
+			with open(filename,"a") as fh:
+				fh.write("chr11\t100\t200\tNEW_GENE\n")
+			
+			gene_annotation_lazy = ParseBED(filename, "test", 200000, "numpy", True)
+			self.assertEqual(len(gene_annotation_lazy), len(gene_annotation) + 1)
+			self.assertEqual([gene.name for gene in gene_annotation_lazy.get_annotations("11",150)], ["NEW_GENE"])
+		finally:
+			shutil.rmtree(directory)
 
 def main():
 	unittest.main()
@@ -33,11 +33,13 @@ from fuma.Fusion import AD_DIRECTION_REVERSE
 
 from fuma.Readers import ReadChimeraScanAbsoluteBEDPE
 from fuma.Readers import ReadChimeraPrettyPrint
+from fuma.Readers import ReadRNASTARChimeric
 from fuma.Readers import ReadRNASTARFusionFinal
 from fuma.Readers import ReadSOAPFuseGenes
 from fuma.Readers import ReadSOAPFuseTranscripts
 from fuma.Readers import ReadEricScriptResultsTotal
 from fuma.Readers import ReadJaffaResults
+from fuma.Readers import iter_fusions
 
 
 class TestReadChimeraScanAbsoluteBEDPE(unittest.TestCase):
@@ -106,6 +108,40 @@ class TestReadChimeraPrettyPrint(unittest.TestCase):
 		self.assertEqual(fusions[3].acceptor_donor_direction , AD_DIRECTION_FORWARD )
 
 
+class TestReadRNASTARChimeric(unittest.TestCase):
+	def test_01(self):
+		""" Tests whether the chimeric reads of identical junctions are
+		aggregated into one fusion per junction:
+		
+		line 1, 3, 5: chr8:70572329(+) - chr8:70572307(-)
+		line 2, 6:    chr8:29921084(-) - chr8:29921059(+)
+		line 4:       chr7:99638140(+) - chr7:99638098(-)
+		"""
+		fusions = ReadRNASTARChimeric("tests/data/test_Readers.TestReadRNASTARChimeric.test_01.junction","test")
+		
+		self.assertEqual(len(fusions) , 3)
+		
+		self.assertEqual([fusion.uid for fusion in fusions] , ['1','2','4'])
+		self.assertEqual([fusion.support for fusion in fusions] , [3,2,1])
+		
+		self.assertEqual(fusions[0].get_left_chromosome(True) , 'chr8')
+		self.assertEqual(fusions[0].get_right_chromosome(True) , 'chr8')
+		self.assertEqual(sorted([fusions[0].left_break_position,fusions[0].right_break_position]) , [70572307,70572329])
+	
+	def test_02(self):
+		""" Tests whether the junctions with fewer reads than
+		min_reads are skipped
+		"""
+		fusions = ReadRNASTARChimeric("tests/data/test_Readers.TestReadRNASTARChimeric.test_01.junction","test",min_reads=2)
+		
+		self.assertEqual([fusion.uid for fusion in fusions] , ['1','2'])
+		self.assertEqual([fusion.support for fusion in fusions] , [3,2])
+		
+		fusions = ReadRNASTARChimeric("tests/data/test_Readers.TestReadRNASTARChimeric.test_01.junction","test",4)
+		
+		self.assertEqual(len(fusions) , 0)
+
+
 class TestReadRNASTARFusionFinal(unittest.TestCase):
 	def test_01(self):
 		""" Tests whether files of input format from Star Fusion can
@@ -130,6 +166,23 @@ class TestReadRNASTARFusionFinal(unittest.TestCase):
 		self.assertEqual(fusions[2].right_break_position , 43479658 )
 		self.assertEqual(fusions[2].left_strand , STRAND_FORWARD )
 		self.assertEqual(fusions[2].right_strand , STRAND_REVERSE )
+	
+	def test_02(self):
+		""" Tests whether the fusions with fewer supporting reads
+		(JunctionReads + SpanningFrags) than min_reads are skipped
+		"""
+		
+		fusions = ReadRNASTARFusionFinal("tests/data/test_Readers.TestReadRNASTARFusionFinal.test_01.candidates.final","test")
+		self.assertEqual([fusion.support for fusion in fusions] , [68,48,5])
+		
+		fusions = ReadRNASTARFusionFinal("tests/data/test_Readers.TestReadRNASTARFusionFinal.test_01.candidates.final","test",min_reads=6)
+		
+		self.assertEqual(len(fusions) , 2)
+		self.assertEqual([fusion.uid for fusion in fusions] , ['1','2'])
+		
+		fusions = ReadRNASTARFusionFinal("tests/data/test_Readers.TestReadRNASTARFusionFinal.test_01.candidates.final","test",min_reads=50)
+		
+		self.assertEqual([fusion.uid for fusion in fusions] , ['1'])
 
 
 class TestCompleteGenomics(unittest.TestCase):
@@ -179,13 +232,6 @@ class TestReadSOAPFuseTranscripts(unittest.TestCase):
 		
 		self.assertEqual(len(fusions) , 3)
 		
-		self.assertEqual(fusions[0].get_left_chromosome(True) , 'chr11')
-		self.assertEqual(fusions[0].get_right_chromosome(True) , 'chr20')
-		self.assertEqual(fusions[0].left_break_position , 65116155 )
-		self.assertEqual(fusions[0].right_break_position , 33114078 )
-		self.assertEqual(fusions[0].left_strand , STRAND_FORWARD )
-		self.assertEqual(fusions[0].right_strand , STRAND_FORWARD )
-		
 		self.assertEqual(fusions[1].get_left_chromosome(True) , 'chr11')
 		self.assertEqual(fusions[1].get_right_chromosome(True) , 'chr20')
 		self.assertEqual(fusions[1].left_break_position , 65116155 )
@@ -193,12 +239,19 @@ class TestReadSOAPFuseTranscripts(unittest.TestCase):
 		self.assertEqual(fusions[1].left_strand , STRAND_FORWARD )
 		self.assertEqual(fusions[1].right_strand , STRAND_FORWARD )
 		
-		self.assertEqual(fusions[2].get_left_chromosome(True) , 'chr7')
-		self.assertEqual(fusions[2].get_right_chromosome(True) , 'chr7')
-		self.assertEqual(fusions[2].left_break_position , 99521226 )
-		self.assertEqual(fusions[2].right_break_position , 99569369 )
-		self.assertEqual(fusions[2].left_strand , STRAND_REVERSE )
-		self.assertEqual(fusions[2].right_strand , STRAND_REVERSE )
+		self.assertEqual(fusions[2].get_left_chromosome(True) , 'chr11')
+		self.assertEqual(fusions[2].get_right_chromosome(True) , 'chr20')
+		self.assertEqual(fusions[2].left_break_position , 65116155 )
+		self.assertEqual(fusions[2].right_break_position , 33114078 )
+		self.assertEqual(fusions[2].left_strand , STRAND_FORWARD )
+		self.assertEqual(fusions[2].right_strand , STRAND_FORWARD )
+		
+		self.assertEqual(fusions[0].get_left_chromosome(True) , 'chr7')
+		self.assertEqual(fusions[0].get_right_chromosome(True) , 'chr7')
+		self.assertEqual(fusions[0].left_break_position , 99521226 )
+		self.assertEqual(fusions[0].right_break_position , 99569369 )
+		self.assertEqual(fusions[0].left_strand , STRAND_REVERSE )
+		self.assertEqual(fusions[0].right_strand , STRAND_REVERSE )
 
 
 class TestReadEricScriptResultsTotal(unittest.TestCase):
@@ -210,19 +263,19 @@ class TestReadEricScriptResultsTotal(unittest.TestCase):
 		
 		self.assertEqual(len(fusions) , 2)
 		
-		self.assertEqual(fusions[0].get_left_chromosome(True) , 'chr1')
-		self.assertEqual(fusions[0].get_right_chromosome(True) , 'chrX')
-		self.assertEqual(fusions[0].left_break_position , 94976043 )
-		self.assertEqual(fusions[0].right_break_position , 123911702 )
-		self.assertEqual(fusions[0].left_strand , STRAND_REVERSE )
-		self.assertEqual(fusions[0].right_strand , STRAND_FORWARD )
-		
-		self.assertEqual(fusions[1].get_left_chromosome(True) , 'chr3')
+		self.assertEqual(fusions[1].get_left_chromosome(True) , 'chr1')
 		self.assertEqual(fusions[1].get_right_chromosome(True) , 'chrX')
-		self.assertEqual(fusions[1].left_break_position , 156540631 )
-		self.assertEqual(fusions[1].right_break_position , 123911171 )
+		self.assertEqual(fusions[1].left_break_position , 94976043 )
+		self.assertEqual(fusions[1].right_break_position , 123911702 )
 		self.assertEqual(fusions[1].left_strand , STRAND_REVERSE )
 		self.assertEqual(fusions[1].right_strand , STRAND_FORWARD )
+		
+		self.assertEqual(fusions[0].get_left_chromosome(True) , 'chr3')
+		self.assertEqual(fusions[0].get_right_chromosome(True) , 'chrX')
+		self.assertEqual(fusions[0].left_break_position , 156540631 )
+		self.assertEqual(fusions[0].right_break_position , 123911171 )
+		self.assertEqual(fusions[0].left_strand , STRAND_REVERSE )
+		self.assertEqual(fusions[0].right_strand , STRAND_FORWARD )
 
 
 class TestReadJaffaResults(unittest.TestCase):
@@ -240,28 +293,111 @@ class TestReadJaffaResults(unittest.TestCase):
 		
 		self.assertEqual(len(fusions) , 4)
 		
-		self.assertEqual(fusions[0].get_left_chromosome(True) , 'chr20')
-		self.assertEqual(fusions[0].get_right_chromosome(True) , 'chr20')
-		self.assertEqual(fusions[0].left_break_position , 46365686)
-		self.assertEqual(fusions[0].right_break_position , 47538547)
-		self.assertEqual(fusions[0].left_strand , None)
-		self.assertEqual(fusions[0].right_strand , None)
-		self.assertEqual(fusions[0].acceptor_donor_direction , None)
-		
-		#dataset 'test'): chr17:59445688(?)<-chr20:49411710(?)
-		self.assertEqual(fusions[1].get_left_chromosome(True) , 'chr17')
+		self.assertEqual(fusions[1].get_left_chromosome(True) , 'chr20')
 		self.assertEqual(fusions[1].get_right_chromosome(True) , 'chr20')
-		self.assertEqual(fusions[1].left_break_position , 59445688)
-		self.assertEqual(fusions[1].right_break_position , 49411710)
+		self.assertEqual(fusions[1].left_break_position , 46365686)
+		self.assertEqual(fusions[1].right_break_position , 47538547)
 		self.assertEqual(fusions[1].left_strand , None)
 		self.assertEqual(fusions[1].right_strand , None)
-		self.assertEqual(fusions[0].acceptor_donor_direction , None)
+		self.assertEqual(fusions[1].acceptor_donor_direction , None)
+		
+		#dataset 'test'): chr17:59445688(?)<-chr20:49411710(?)
+		self.assertEqual(fusions[0].get_left_chromosome(True) , 'chr17')
+		self.assertEqual(fusions[0].get_right_chromosome(True) , 'chr20')
+		self.assertEqual(fusions[0].left_break_position , 59445688)
+		self.assertEqual(fusions[0].right_break_position , 49411710)
+		self.assertEqual(fusions[0].left_strand , None)
+		self.assertEqual(fusions[0].right_strand , None)
+		self.assertEqual(fusions[1].acceptor_donor_direction , None)
 		
 		# @todo
 		# comparing 2x test read jaffa results should give a exception:
 		# raise Exception("A fusion gene without an annotated acceptor-donor direction was used for acceptor-donor-order-specific-matching.\n\n"+fusion_1.__str__()+"\n"+fusion_2.__str__())
 
 
+class TestSupportFilter(unittest.TestCase):
+	def test_01(self):
+		""" Tests whether the SOAPFuse readers filter on Span_reads_num +
+		Junc_reads_num, while the uids stay the line numbers
+		"""
+		fusions = ReadSOAPFuseGenes("tests/data/test_Readers.TestReadSOAPFuseGenes.test_01.txt","test",min_reads=7)
+		
+		self.assertEqual([fusion.uid for fusion in fusions] , ['1','3'])
+		self.assertEqual([fusion.support for fusion in fusions] , [8,32])
+		
+		fusions = ReadSOAPFuseTranscripts("tests/data/test_Readers.TestReadSOAPFuseTranscripts.test_01.txt","test",min_reads=20)
+		
+		self.assertEqual([fusion.uid for fusion in fusions] , ['2','3'])
+	
+	def test_02(self):
+		""" Tests whether Chimera's supporting.reads are used and
+		whether a file without read counts can not be filtered
+		"""
+		fusions = ReadChimeraPrettyPrint("tests/data/test_Readers.TestReadChimeraPrettyPrint.test_01.txt","test",min_reads=12)
+		
+		self.assertEqual([fusion.uid for fusion in fusions] , ['1'])
+		self.assertEqual(fusions[0].support , 99)
+		
+		# Same file without the column supporting.reads
+		fusions = ReadChimeraPrettyPrint("tests/data/test_Readers.TestSupportFilter.test_02.txt","test")
+		
+		self.assertEqual(len(fusions) , 2)
+		self.assertEqual(fusions[0].support , None)
+		
+		self.assertRaises(Exception, ReadChimeraPrettyPrint, "tests/data/test_Readers.TestSupportFilter.test_02.txt","test",3)
+
+
+class TestIterFusions(unittest.TestCase):
+	def test_01(self):
+		""" Tests whether the fusions read one by one are those (and in
+		the same order) of the parsed experiment, while the experiment
+		that is streamed from remains empty
+		"""
+		filename = "tests/data/test_Readers.TestReadChimeraPrettyPrint.test_01.txt"
+		
+		fusions = ReadChimeraPrettyPrint(filename,"test")
+		stream = ReadChimeraPrettyPrint(filename,"test",parse=False)
+		
+		fusions_streamed = [fusion for fusion in stream.iter_fusions()]
+		
+		self.assertEqual(len(stream) , 0)
+		self.assertEqual(len(fusions_streamed) , len(fusions))
+		
+		for i in range(len(fusions)):
+			self.assertEqual(fusions_streamed[i].uid , fusions[i].uid)
+			self.assertEqual(str(fusions_streamed[i]) , str(fusions[i]))
+		
+		# Each call reads the file again
+		self.assertEqual(len([fusion for fusion in stream.iter_fusions()]) , len(fusions))
+	
+	def test_02(self):
+		filename = "tests/data/test_Readers.TestReadSOAPFuseGenes.test_01.txt"
+		
+		fusions = ReadSOAPFuseGenes(filename,"test")
+		fusions_streamed = [fusion for fusion in iter_fusions(ReadSOAPFuseGenes,filename,"test")]
+		
+		self.assertEqual(len(fusions_streamed) , 3)
+		self.assertEqual([str(fusion) for fusion in fusions_streamed] , [str(fusion) for fusion in fusions])
+		
+		# Filtering while reading
+		fusions_chr19 = [fusion for fusion in iter_fusions(ReadSOAPFuseGenes,filename) if 'chr19' in [fusion.get_left_chromosome(True),fusion.get_right_chromosome(True)]]
+		self.assertEqual(len(fusions_chr19) , 1)
+		self.assertEqual(fusions_chr19[0].uid , '2')
+	
+	def test_03(self):
+		""" Tests whether keyword arguments, such as min_reads, are
+		passed on to the reader
+		"""
+		fusions_streamed = [fusion for fusion in iter_fusions(ReadSOAPFuseGenes,"tests/data/test_Readers.TestReadSOAPFuseGenes.test_01.txt","test",min_reads=7)]
+		
+		self.assertEqual([fusion.uid for fusion in fusions_streamed] , ['1','3'])
+		self.assertEqual([fusion.support for fusion in fusions_streamed] , [8,32])
+		
+		fusions_streamed = [fusion for fusion in iter_fusions(ReadRNASTARChimeric,"tests/data/test_Readers.TestReadRNASTARChimeric.test_01.junction",min_reads=2)]
+		
+		self.assertEqual([fusion.uid for fusion in fusions_streamed] , ['1','2'])
+
+
 def main():
 	unittest.main()
 